@@ -0,0 +1,73 @@
+"""
+Micro-benchmark of the per-call overhead of provider clients.
+
+Times ``llm.provider.client`` served from the process wide client registry
+against a client built on every call, as before the registry. With
+``--requests``, also times that many model listings sent through each, so
+that the TLS handshakes of new connections are measured, which needs the
+provider to be reachable.
+
+Usage:
+    python3 llm/benchmarks/bench_client_registry.py -c odoo.conf -d db \\
+        --provider NAME [--calls 1000] [--requests 0]
+"""
+
+import argparse
+import time
+from contextlib import nullcontext
+from unittest.mock import patch
+
+import odoo
+from odoo import SUPERUSER_ID, api
+
+from odoo.addons.llm.models.llm_client_registry import client_registry
+
+
+def timed(label, count, func):
+    start = time.perf_counter()
+    for _i in range(count):
+        func()
+    duration = time.perf_counter() - start
+    print(f"{label:>24}: {duration / count * 1000:.3f} ms per call")
+
+
+def uncached():
+    """Build the client on every access, as without the registry"""
+    return patch.object(client_registry, "get", lambda key, factory: factory())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-c", "--config")
+    parser.add_argument("-d", "--database", required=True)
+    parser.add_argument("--provider", required=True)
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=0)
+    args = parser.parse_args()
+
+    odoo.tools.config.parse_config(["-c", args.config] if args.config else [])
+    registry = odoo.registry(args.database)
+
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        provider = env["llm.provider"].search([("name", "=", args.provider)], limit=1)
+        if not provider:
+            raise SystemExit(f"No llm.provider named {args.provider}")
+        print(f"Provider {provider.name} ({provider.service})")
+
+        for label, context in (("registry", nullcontext()), ("new client", uncached())):
+            with context:
+                timed(f"{label} client", args.calls, lambda: provider.client)
+                if args.requests:
+                    timed(
+                        f"{label} request",
+                        args.requests,
+                        lambda: list(provider.list_models()),
+                    )
+        cr.rollback()
+
+
+if __name__ == "__main__":
+    main()
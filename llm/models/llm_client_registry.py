@@ -0,0 +1,81 @@
+"""
+Process wide registry of provider SDK clients.
+
+Building a client per call throws away its HTTP connection pool, so every
+chat or embedding request pays a new TCP/TLS handshake. Clients are kept
+here, keyed by everything that affects how they are built, and evicted in
+LRU order once the registry is full. Evicted clients are not closed
+explicitly since a concurrent request may still be using them; their
+connections are released when they are garbage collected.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+DEFAULT_REGISTRY_SIZE = 32
+
+
+class LLMClientRegistry:
+    def __init__(self, max_size=DEFAULT_REGISTRY_SIZE):
+        self.max_size = max_size
+        self._clients = OrderedDict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def make_key(dbname, provider):
+        """Build the cache key of a provider record.
+
+        The api key is hashed so that secrets are not kept as dict keys, and
+        any credential or endpoint change results in a new client even in
+        workers which did not see the write.
+        """
+        api_key_hash = hashlib.sha256((provider.api_key or "").encode()).hexdigest()
+        return (
+            dbname,
+            provider.id,
+            provider.service,
+            api_key_hash,
+            provider.api_base or "",
+            provider.connection_pool_size,
+        )
+
+    def get(self, key, factory):
+        """Return the client cached under ``key``, building it if needed."""
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                return client
+            client = factory()
+            self._clients[key] = client
+            while len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+            return client
+
+    def discard(self, key):
+        """Drop the client cached under ``key``, if any."""
+        with self._lock:
+            self._clients.pop(key, None)
+
+    def invalidate(self, dbname, provider_ids):
+        """Drop every client built for the given provider ids."""
+        provider_ids = set(provider_ids)
+        with self._lock:
+            stale_keys = [
+                key
+                for key in self._clients
+                if key[0] == dbname and key[1] in provider_ids
+            ]
+            for key in stale_keys:
+                del self._clients[key]
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self):
+        return len(self._clients)
+
+
+client_registry = LLMClientRegistry()
@@ -30,6 +30,22 @@ class LLMModel(models.Model):
     parameters = fields.Text()
     template = fields.Text()
 
+    # Context window
+    context_window = fields.Integer(
+        help="Maximum number of tokens the model accepts (prompt and output). "
+        "When empty, it is read from the model details if available.",
+    )
+    reserved_output_tokens = fields.Integer(
+        default=1024,
+        help="Tokens kept free in the context window for the model answer",
+    )
+
+    # Embedding dimension
+    embedding_dimension = fields.Integer(
+        help="Size of the vectors returned by an embedding model. When empty, "
+        "it is detected once from the model details or a sample embedding.",
+    )
+
     @api.model
     def _get_available_model_usages(self):
         return [
@@ -63,6 +79,82 @@ class LLMModel(models.Model):
         """Generate embeddings using this model"""
         return self.provider_id.embedding(texts, model=self)
 
+    def get_embedding_function(self):
+        """Function computing embeddings with this model from any thread"""
+        return self.provider_id.get_embedding_function(model=self)
+
+    def count_tokens(self, text):
+        """Count the tokens of text with this model's tokenizer"""
+        return self.provider_id.count_tokens(text, model=self)
+
+    def get_tokenizer(self):
+        """Tokenizer of this model, to split text in tokens"""
+        return self.provider_id.get_tokenizer(model=self)
+
+    def get_context_window(self):
+        """Context window of the model, from its configuration or details
+
+        Returns:
+            int: Number of tokens, 0 if unknown
+        """
+        self.ensure_one()
+        if self.context_window:
+            return self.context_window
+        for info in (self.details, self.model_info):
+            if not isinstance(info, dict):
+                continue
+            for key in ("context_window", "context_length", "max_input_tokens"):
+                if isinstance(info.get(key), int):
+                    return info[key]
+        return 0
+
+    def get_embedding_dimension(self):
+        """Size of the vectors returned by this embedding model
+
+        Read from the configuration, then from the model details. As a last
+        resort a sample text is embedded, and the detected dimension is
+        stored so that the provider is only called once.
+
+        Returns:
+            int: Number of dimensions, 0 if it could not be detected
+        """
+        self.ensure_one()
+        if self.embedding_dimension:
+            return self.embedding_dimension
+        dimension = self._get_embedding_dimension_from_details()
+        if not dimension:
+            vectors = self.embedding(["sample"])
+            dimension = len(vectors[0]) if vectors and vectors[0] is not None else 0
+        if dimension:
+            self.sudo().write({"embedding_dimension": dimension})
+        return dimension
+
+    def _get_embedding_dimension_from_details(self):
+        for info in (self.details, self.model_info):
+            if not isinstance(info, dict):
+                continue
+            for key, value in info.items():
+                if not isinstance(value, int):
+                    continue
+                # Ollama reports it as "<architecture>.embedding_length"
+                if key in ("dimension", "dimensions", "embedding_dimension") or (
+                    key.endswith("embedding_length")
+                ):
+                    return value
+        return 0
+
+    def get_prompt_token_budget(self):
+        """Tokens available for the prompt once the output is reserved
+
+        Returns:
+            int: Number of tokens, 0 if the context window is unknown
+        """
+        self.ensure_one()
+        context_window = self.get_context_window()
+        if not context_window:
+            return 0
+        return max(context_window - (self.reserved_output_tokens or 0), 0)
+
     def action_open_fetch_this_model_wizard(self):
         self.ensure_one()
         return {
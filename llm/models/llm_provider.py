@@ -3,6 +3,9 @@ from datetime import datetime
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError, ValidationError
 
+from .llm_client_registry import client_registry
+from .llm_tokenizer import estimate_tokenizer
+
 
 class LLMProvider(models.Model):
     _name = "llm.provider"
@@ -23,6 +26,10 @@ class LLMProvider(models.Model):
     )
     api_key = fields.Char()
     api_base = fields.Char()
+    connection_pool_size = fields.Integer(
+        default=10,
+        help="Maximum number of keep-alive HTTP connections of the provider client",
+    )
     model_ids = fields.One2many("llm.model", "provider_id", string="Models")
 
     @api.constrains("name")
@@ -37,10 +44,25 @@ class LLMProvider(models.Model):
 
         return True
 
+    def write(self, vals):
+        res = super().write(vals)
+        client_registry.invalidate(self.env.cr.dbname, self.ids)
+        return res
+
+    def unlink(self):
+        client_registry.invalidate(self.env.cr.dbname, self.ids)
+        return super().unlink()
+
     @property
     def client(self):
-        """Get client instance using dispatch pattern"""
-        return self._dispatch("get_client")
+        """Get client instance using dispatch pattern
+
+        Clients are shared through a process wide registry so that their
+        HTTP connection pool is reused across calls.
+        """
+        self.ensure_one()
+        key = client_registry.make_key(self.env.cr.dbname, self)
+        return client_registry.get(key, lambda: self._dispatch("get_client"))
 
     def _dispatch(self, method, *args, record=None, **kwargs):
         """Dispatch method call to appropriate service implementation on self or a given record."""
@@ -80,6 +102,49 @@ class LLMProvider(models.Model):
         """Generate embeddings using this provider"""
         return self._dispatch("embedding", texts, model=model)
 
+    def get_embedding_function(self, model=None):
+        """Function computing the embeddings of texts, safe to call from
+        other threads than the one of this environment
+
+        Only services implementing `<service>_get_embedding_function` are
+        cursor free: it reads the model and client once, in this thread, so
+        that calls do not use the ORM. For other services, each call opens
+        a cursor of its own to run `embedding`, holding a database
+        connection for the duration of the provider request.
+        """
+        self.ensure_one()
+        if self.service and hasattr(self, f"{self.service}_get_embedding_function"):
+            return self._dispatch("get_embedding_function", model=model)
+        registry, uid, context = self.env.registry, self.env.uid, self.env.context
+        provider_id, model_id = self.id, model.id if model else False
+
+        def embed(texts):
+            with registry.cursor() as cr:
+                env = api.Environment(cr, uid, context)
+                return (
+                    env["llm.provider"]
+                    .browse(provider_id)
+                    .embedding(texts, model=env["llm.model"].browse(model_id))
+                )
+
+        return embed
+
+    def count_tokens(self, text, model=None):
+        """Count the tokens of text for the given model, see get_tokenizer"""
+        if not text:
+            return 0
+        return self.get_tokenizer(model=model).count(text)
+
+    def get_tokenizer(self, model=None):
+        """Tokenizer of the given model, see llm_tokenizer
+
+        Services may implement `<service>_get_tokenizer` with the model's
+        encoding, otherwise a conservative estimating tokenizer is used.
+        """
+        if self.service and hasattr(self, f"{self.service}_get_tokenizer"):
+            return self._dispatch("get_tokenizer", model=model)
+        return estimate_tokenizer
+
     def list_models(self, model_id=None):
         """List available models from the provider"""
         return self._dispatch("models", model_id=model_id)
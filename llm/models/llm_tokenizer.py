@@ -0,0 +1,37 @@
+"""
+Tokenizers used to measure and split text in model tokens.
+
+Providers return a tokenizer for each of their models with
+`llm.provider.get_tokenizer`. A tokenizer exposes:
+
+- ``name``: identifies the encoding, so that results computed with another
+  tokenizer can be told apart
+- ``count(text)``: number of tokens of text
+- ``token_offsets(text)``: character offset where each token of text starts,
+  so that callers can split text on token boundaries after a single encoding
+
+Tokenizer instances are stateless and shared across threads, providers
+should cache them rather than building one per call.
+"""
+
+import re
+
+# Words are counted as one token per 4 characters at most, other symbols as
+# one token each. This overestimates BPE tokenizers on most text, so that
+# sizes computed with it stay within the limits of the actual model.
+ESTIMATE_TOKEN_RE = re.compile(r"\s*(?:\w{1,4}|\S)")
+
+
+class EstimateTokenizer:
+    """Tokenizer of models without a known encoding"""
+
+    name = "estimate"
+
+    def count(self, text):
+        return sum(1 for _match in ESTIMATE_TOKEN_RE.finditer(text or ""))
+
+    def token_offsets(self, text):
+        return [match.start() for match in ESTIMATE_TOKEN_RE.finditer(text or "")]
+
+
+estimate_tokenizer = EstimateTokenizer()
@@ -11,7 +11,7 @@
     "author": "Mpve Solutions LLC",
     "website": "https://github.com/maxxcte",
     "external_dependencies": {
-        "python": ["anthropic"],
+        "python": ["anthropic", "httpx"],
     },
     "data": [
         "data/llm_publisher.xml",
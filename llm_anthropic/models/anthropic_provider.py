@@ -1,3 +1,4 @@
+import httpx
 from anthropic import Anthropic
 
 from odoo import api, models
@@ -13,8 +14,15 @@ class LLMProvider(models.Model):
 
     def anthropic_get_client(self):
         """Get Anthropic client instance"""
+        pool_size = self.connection_pool_size or None
         return Anthropic(
             api_key=self.api_key,
+            http_client=httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=pool_size,
+                    max_keepalive_connections=pool_size,
+                )
+            ),
         )
 
     def anthropic_chat(self, messages, model=None, stream=False, **kwargs):
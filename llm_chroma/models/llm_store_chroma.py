@@ -30,7 +30,12 @@ class LLMStoreChroma(models.Model):
     # -------------------------------------------------------------------------
 
     def _get_chroma_client(self):
-        """Get a Chroma client for the current store configuration"""
+        """Get the Chroma client of the current store configuration
+
+        The client is shared across calls, see _get_cached_client, and its
+        connection is checked by chroma_check_connection instead of on
+        every call.
+        """
         self.ensure_one()
         if self.service != "chroma":
             return None
@@ -48,10 +53,11 @@ class LLMStoreChroma(models.Model):
         headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else None
 
         try:
-            client = chromadb.HttpClient(host=host, port=port, ssl=ssl, headers=headers)
-            # Test connection
-            client.heartbeat()
-            return client
+            return self._get_cached_client(
+                lambda: chromadb.HttpClient(
+                    host=host, port=port, ssl=ssl, headers=headers
+                )
+            )
         except Exception as err:
             _logger.error(f"Failed to connect to Chroma server: {str(err)}")
             raise UserError(
@@ -76,8 +82,16 @@ class LLMStoreChroma(models.Model):
         collection_name = self.get_santized_collection_name(collection_id)
 
         # Check if collection exists in Chroma
-        collections = client.list_collections()
-        return any(c.name == collection_name for c in collections)
+        return self._collection_exists_cached(
+            collection_name,
+            lambda: any(c.name == collection_name for c in client.list_collections()),
+        )
+
+    def chroma_check_connection(self):
+        """Check that the Chroma server answers"""
+        self.ensure_one()
+        self._get_chroma_client().heartbeat()
+        return True
 
     def chroma_create_collection(
         self, collection_id, dimension=None, metadata=None, **kwargs
@@ -134,6 +148,7 @@ class LLMStoreChroma(models.Model):
             # Delete collection in Chroma
             collection_name = self.get_santized_collection_name(collection_id)
             client.delete_collection(name=collection_name)
+            self._forget_collection(collection_name)
             _logger.info(f"Deleted collection {collection_name} from Chroma")
             return True
         except Exception as err:
@@ -161,7 +176,11 @@ class LLMStoreChroma(models.Model):
     # -------------------------------------------------------------------------
 
     def _get_chroma_collection(self, collection_id):
-        """Get a Chroma collection by ID or name"""
+        """Get a Chroma collection by ID or name
+
+        Collection handles are cached, so that vector operations only take
+        a single request.
+        """
         self.ensure_one()
 
         client = self._get_chroma_client()
@@ -172,7 +191,11 @@ class LLMStoreChroma(models.Model):
 
         try:
             # Get collection from Chroma
-            return client.get_collection(name=collection_name)
+            return self._get_cached_client(
+                lambda: client.get_collection(name=collection_name),
+                "collection",
+                collection_name,
+            )
         except Exception as e:
             _logger.error(f"Error getting collection {collection_name}: {str(e)}")
             return None
@@ -231,6 +254,7 @@ class LLMStoreChroma(models.Model):
             return True
         except Exception as e:
             _logger.error(f"Error deleting vectors: {str(e)}")
+            self._forget_collection(self.get_santized_collection_name(collection_id))
             return False
 
     def chroma_search_vectors(
@@ -292,6 +316,7 @@ class LLMStoreChroma(models.Model):
             return formatted_results
         except Exception as e:
             _logger.error(f"Error searching vectors: {str(e)}")
+            self._forget_collection(self.get_santized_collection_name(collection_id))
             return []
 
     def _convert_odoo_filter_to_chroma(self, odoo_filter):
@@ -31,6 +31,7 @@
         "wizards/upload_resource_wizard_views.xml",
         # Data / Actions
         "data/server_actions.xml",
+        "data/ir_cron.xml",
         # Menus must come last
         "views/menu.xml",
     ],
@@ -0,0 +1,130 @@
+"""
+Benchmark of the default chunker on a large markdown document.
+
+Generates a markdown document of the given size, with headings, paragraphs,
+lists, code blocks and tables, then times on an llm.resource holding it:
+
+- the split of its content, ``_split_text_default``
+- the creation of its chunks, ``_sync_chunks`` with no existing chunk
+- the same call again, where every chunk is kept
+
+Usage:
+    python3 llm_knowledge/benchmarks/bench_chunking.py -c odoo.conf -d db \\
+        [--size-mb 10] [--chunk-size 200] [--chunk-overlap 20] [--model NAME]
+
+``--model`` measures the chunks with the tokenizer of the named llm.model,
+the estimate tokenizer is used otherwise. Nothing is committed.
+"""
+
+import argparse
+import random
+import time
+
+import odoo
+from odoo import SUPERUSER_ID, api
+
+from odoo.addons.llm.models.llm_tokenizer import estimate_tokenizer
+
+WORDS = (
+    "answers chunk collection documents embedding invoices model orders partners "
+    "passages products question record retrieved similar stored the a of or"
+)
+
+
+def sentence(rng):
+    words = rng.choices(WORDS.split(), k=rng.randint(6, 24))
+    return " ".join(words).capitalize() + rng.choice([".", ".", ".", "?", "!"])
+
+
+def section(rng, index):
+    parts = [f"## Section {index}", " ".join(sentence(rng) for _i in range(6))]
+    kind = rng.randrange(4)
+    if kind == 0:
+        parts.append("\n".join(f"- {sentence(rng)}" for _i in range(5)))
+    elif kind == 1:
+        code = "\n".join(
+            f"    value_{line} = compute({line}, {rng.randint(0, 99)})"
+            for line in range(8)
+        )
+        parts.append(f"```python\ndef step_{index}():\n{code}\n```")
+    elif kind == 2:
+        names = WORDS.split()
+        rows = "\n".join(
+            f"| {rng.choice(names)} | {rng.randint(0, 9999)} | {rng.random():.4f} |"
+            for _i in range(6)
+        )
+        parts.append(f"| Name | Quantity | Ratio |\n| --- | --- | --- |\n{rows}")
+    parts.append(" ".join(sentence(rng) for _i in range(4)))
+    return "\n\n".join(parts)
+
+
+def generate_markdown(size):
+    """Markdown document of about ``size`` characters"""
+    rng = random.Random(42)
+    sections = ["# Benchmark document"]
+    length = 0
+    while length < size:
+        sections.append(section(rng, len(sections)))
+        length += len(sections[-1]) + 2
+    return "\n\n".join(sections)
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:>24}: {time.perf_counter() - start:.2f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-c", "--config")
+    parser.add_argument("-d", "--database", required=True)
+    parser.add_argument("--size-mb", type=float, default=10)
+    parser.add_argument("--chunk-size", type=int, default=200)
+    parser.add_argument("--chunk-overlap", type=int, default=20)
+    parser.add_argument("--model")
+    args = parser.parse_args()
+
+    odoo.tools.config.parse_config(["-c", args.config] if args.config else [])
+    registry = odoo.registry(args.database)
+
+    content = generate_markdown(int(args.size_mb * 1024 * 1024))
+    print(f"Document of {len(content) / 1024 / 1024:.1f} MB")
+
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        tokenizer = estimate_tokenizer
+        if args.model:
+            model = env["llm.model"].search([("name", "=", args.model)], limit=1)
+            if not model:
+                raise SystemExit(f"No llm.model named {args.model}")
+            tokenizer = model.get_tokenizer()
+        print(f"Tokenizer {tokenizer.name}")
+
+        resource = env["llm.resource"].create(
+            {
+                "name": "Chunking benchmark",
+                "model_id": env["ir.model"]._get_id("res.partner"),
+                "res_id": env.user.partner_id.id,
+                "content": content,
+                "target_chunk_size": args.chunk_size,
+                "target_chunk_overlap": args.chunk_overlap,
+            }
+        )
+        specs = timed(
+            "split",
+            lambda: resource._split_text_default(
+                content, args.chunk_size, args.chunk_overlap, tokenizer
+            ),
+        )
+        print(f"{len(specs)} chunks")
+        timed("create chunks", lambda: resource._sync_chunks(specs).flush_model())
+        timed("keep chunks", lambda: resource._sync_chunks(specs).flush_model())
+        cr.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,3 +3,5 @@ from . import llm_resource_chunker
 from . import llm_knowledge_chunk
 from . import llm_knowledge_collection
 from . import llm_knowledge_domain
+from . import llm_knowledge_embedding_cache
+from . import llm_pipeline_job
@@ -0,0 +1,100 @@
+"""
+Helpers for the pipelined embedding of collection chunks.
+
+Provider requests run in a thread pool, with an embedding function of
+`llm.provider.get_embedding_function` built by the calling thread, which
+alone uses the ORM, writes vectors to the store and commits. Batch sizes
+adapt to the provider's token limit and to its latency and rate-limit
+feedback.
+"""
+
+import time
+
+RATE_LIMIT_STATUS = 429
+
+
+def estimate_tokens(text):
+    """Rough token estimate used to size embedding batches."""
+    return len(text or "") // 4
+
+
+def is_rate_limit_error(error):
+    """Whether an exception raised by a provider SDK is a rate limit error."""
+    status = getattr(error, "status_code", None) or getattr(
+        getattr(error, "response", None), "status_code", None
+    )
+    if status == RATE_LIMIT_STATUS:
+        return True
+    message = str(error).lower()
+    return "rate limit" in message or "too many requests" in message
+
+
+def embed_texts(embed, texts, delay=0):
+    """Compute embeddings from a worker thread.
+
+    The ORM is not thread safe, so ``embed`` is a function of
+    `llm.model.get_embedding_function`, built by the caller, which does not
+    hold a cursor during the provider request.
+
+    Returns:
+        tuple: (list of vectors, provider latency in seconds)
+    """
+    if delay:
+        time.sleep(delay)
+    start = time.monotonic()
+    vectors = embed(texts)
+    return vectors, time.monotonic() - start
+
+
+class AdaptiveBatchSizer:
+    """AIMD batch sizing driven by provider feedback.
+
+    The batch size grows while requests are answered faster than
+    ``target_latency``, shrinks when they are slower, and is halved with an
+    exponential backoff delay when the provider rate limits us. Batches
+    never exceed ``max_batch_tokens`` estimated tokens.
+    """
+
+    def __init__(
+        self,
+        batch_size,
+        min_batch_size=1,
+        max_batch_size=None,
+        max_batch_tokens=None,
+        target_latency=5.0,
+        max_backoff=60.0,
+    ):
+        self.batch_size = max(batch_size, min_batch_size)
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size or batch_size * 8
+        self.max_batch_tokens = max_batch_tokens
+        self.target_latency = target_latency
+        self.max_backoff = max_backoff
+        self.backoff = 0.0
+
+    def take(self, texts, start):
+        """Return the end index of the next batch starting at ``start``."""
+        end = min(start + self.batch_size, len(texts))
+        if not self.max_batch_tokens:
+            return end
+        tokens = 0
+        for index in range(start, end):
+            tokens += estimate_tokens(texts[index])
+            if tokens > self.max_batch_tokens and index > start:
+                return index
+        return end
+
+    def on_success(self, latency):
+        self.backoff = 0.0
+        if latency > self.target_latency:
+            self.batch_size = max(self.min_batch_size, int(self.batch_size * 0.75))
+        else:
+            self.batch_size = min(
+                self.max_batch_size, self.batch_size + max(1, self.batch_size // 4)
+            )
+
+    def on_rate_limit(self):
+        """Shrink batches and return the delay to wait before retrying."""
+        self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+        self.backoff = min(self.max_backoff, (self.backoff * 2) or 1.0)
+        return self.backoff
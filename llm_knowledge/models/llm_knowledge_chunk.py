@@ -1,10 +1,34 @@
 import logging
+import time
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
+from odoo.tools import str2bool
+
+from .llm_query_embedding_cache import (
+    DEFAULT_QUERY_CACHE_SIZE,
+    DEFAULT_QUERY_CACHE_TTL,
+    query_embedding_cache,
+)
+from .llm_search_cursor_cache import search_cursor_cache
 
 _logger = logging.getLogger(__name__)
 
+# Text search configuration of the full-text index on the chunk content. The
+# simple configuration neither stems nor drops stop words, so product codes,
+# invoice numbers and the like are matched as written.
+FULLTEXT_CONFIG = "simple"
+FULLTEXT_INDEX = "llm_knowledge_chunk_content_fts_idx"
+
+# Candidates fetched from each ranking of a hybrid search, per result
+HYBRID_CANDIDATE_FACTOR = 2
+
+# Vector search counts stop at this many results, see _vector_search_aggregate
+DEFAULT_COUNT_LIMIT = 1000
+
+# Query embedding cache statistics are logged every this many lookups
+QUERY_CACHE_STATS_INTERVAL = 100
+
 
 class LLMKnowledgeChunk(models.Model):
     _name = "llm.knowledge.chunk"
@@ -38,6 +62,25 @@ class LLMKnowledgeChunk(models.Model):
         default={},
         help="Additional metadata for this chunk",
     )
+    content_hash = fields.Char(
+        string="Content Fingerprint",
+        compute="_compute_content_hash",
+        store=True,
+        index=True,
+        help="Hash of the normalized content, used to keep unchanged chunks "
+        "when their resource is chunked again",
+    )
+    embedded_collection_ids = fields.Many2many(
+        "llm.knowledge.collection",
+        "llm_knowledge_chunk_embedded_collection_rel",
+        "chunk_id",
+        "collection_id",
+        string="Embedded In",
+        copy=False,
+        help="Collections whose store holds the vector of the current content "
+        "of the chunk. It still has to be embedded in the other collections "
+        "of its resource.",
+    )
     # Related field to resource collections
     collection_ids = fields.Many2many(
         "llm.knowledge.collection",
@@ -57,6 +100,15 @@ class LLMKnowledgeChunk(models.Model):
         string="Similarity Score", store=False, compute="_compute_similarity"
     )
 
+    def init(self):
+        self.env.cr.execute(
+            f"""
+            CREATE INDEX IF NOT EXISTS {FULLTEXT_INDEX}
+            ON llm_knowledge_chunk
+            USING gin (to_tsvector('{FULLTEXT_CONFIG}', content))
+            """
+        )
+
     @api.depends("resource_id.name", "sequence")
     def compute_name(self):
         for chunk in self:
@@ -65,6 +117,12 @@ class LLMKnowledgeChunk(models.Model):
             else:
                 chunk.name = f"Chunk {chunk.sequence}"
 
+    @api.depends("content")
+    def _compute_content_hash(self):
+        hash_text = self.env["llm.knowledge.embedding.cache"]._hash_text
+        for chunk in self:
+            chunk.content_hash = hash_text(chunk.content)
+
     def _compute_similarity(self):
         """Compute method for the similarity field."""
         for record in self:
@@ -206,9 +264,9 @@ class LLMKnowledgeChunk(models.Model):
 
             for model in embedding_models:
                 try:
-                    model_vector_map[model.id] = model.embedding(
-                        vector_search_term.strip()
-                    )[0]
+                    model_vector_map[model.id] = self._embed_query(
+                        model, vector_search_term
+                    )
                 except Exception:
                     collections = collections.filtered(
                         lambda c, failed_model_id=model.id: c.embedding_model_id.id
@@ -238,11 +296,89 @@ class LLMKnowledgeChunk(models.Model):
             query_operator=kwargs.get(
                 "query_operator", self.env.context.get("search_vector_operator", "<=>")
             ),
+            search_mode=kwargs.get("search_mode"),
+            search_after=kwargs.get("search_after"),
+            count_limit=kwargs.get(
+                "count_limit",
+                self.env.context.get("search_count_limit", DEFAULT_COUNT_LIMIT),
+            ),
             offset=offset,
             limit=limit,
             count=count,
         )
 
+    @api.model
+    def _embed_query(self, embedding_model, query_text):
+        """Embed a search query, reusing the vectors of recent identical queries
+
+        Query vectors are cached in process for
+        ``llm_knowledge.query_embedding_cache_ttl`` seconds, up to
+        ``llm_knowledge.query_embedding_cache_size`` entries. When
+        ``llm_knowledge.query_embedding_cache_use_db`` is set, they are also
+        shared with the other workers through the embedding cache table.
+
+        Returns:
+            list: the query vector
+        """
+        get_param = self.env["ir.config_parameter"].sudo().get_param
+        query_embedding_cache.configure(
+            int(
+                get_param(
+                    "llm_knowledge.query_embedding_cache_size",
+                    DEFAULT_QUERY_CACHE_SIZE,
+                )
+            ),
+            int(
+                get_param(
+                    "llm_knowledge.query_embedding_cache_ttl",
+                    DEFAULT_QUERY_CACHE_TTL,
+                )
+            ),
+        )
+        use_db = str2bool(
+            get_param("llm_knowledge.query_embedding_cache_use_db", "False")
+        )
+
+        EmbeddingCache = self.env["llm.knowledge.embedding.cache"]
+        text = EmbeddingCache._normalize_text(query_text)
+        content_hash = EmbeddingCache._hash_text(text)
+        key = query_embedding_cache.make_key(
+            self.env.cr.dbname, embedding_model, content_hash
+        )
+
+        vector = query_embedding_cache.get(key)
+        if vector is None and use_db:
+            vector = EmbeddingCache._lookup(embedding_model.id, [content_hash]).get(
+                content_hash
+            )
+            if vector is not None:
+                query_embedding_cache.put(key, vector)
+        if vector is None:
+            start = time.monotonic()
+            vector = embedding_model.embedding(text)[0]
+            query_embedding_cache.put(key, vector, time.monotonic() - start)
+            if use_db:
+                EmbeddingCache._store(embedding_model.id, {content_hash: vector})
+
+        stats = query_embedding_cache.stats()
+        if (stats["hits"] + stats["misses"]) % QUERY_CACHE_STATS_INTERVAL == 0:
+            _logger.info(
+                f"Query embedding cache: {stats['size']} entries, "
+                f"hit rate {stats['hit_rate']:.1%} "
+                f"({stats['hits']} hits, {stats['misses']} misses), "
+                f"{stats['saved_seconds']:.1f}s of embedding latency saved"
+            )
+        return [float(value) for value in vector]
+
+    @api.model
+    def get_query_embedding_cache_stats(self):
+        """Statistics of the query embedding cache of this worker"""
+        return query_embedding_cache.stats()
+
+    def _get_pending_chunks(self, collection):
+        """Chunks not embedded in the store of the collection yet"""
+        return self.filtered(lambda c: collection not in c.embedded_collection_ids)
+
     def _vector_search_aggregate(
         self,
         collections,
@@ -255,48 +391,348 @@ class LLMKnowledgeChunk(models.Model):
         offset,
         limit,
         count,
+        search_mode=None,
+        search_after=None,
+        count_limit=None,
     ):
-        """Performs vector search across collections, aggregates, sorts, and limits."""
+        """Performs vector search across collections, aggregates, sorts, and limits.
+
+        Collections are grouped by store, embedding model and search settings,
+        each group is searched with a single store request, and the sorted
+        results of the groups are merged. Similarities of vector searches and
+        fused scores of hybrid or lexical searches are not comparable, so
+        when such groups are searched together, their results are fused by
+        rank instead, see _fuse_ranked_results. ``search_mode`` overrides the
+        search mode of the collections.
+
+        Results are ordered by descending score, then chunk id. Each store is
+        asked for ``offset + limit`` results, or only ``limit`` results after
+        a (score, chunk id) keyset cursor. The cursor is either given as
+        ``search_after``, ``offset`` then being relative to it, or the one
+        ending the previous page of the same search. Counts stop at
+        ``count_limit`` results, so they are approximate above it and exact
+        when it is empty.
+        """
+        search_key = (
+            self.env.cr.dbname,
+            self.env.uid,
+            vector_search_term or tuple(query_vector or ()),
+            tuple(collections.ids),
+            # Cursors of collections re-embedded or edited since are dropped
+            tuple(collections.mapped("write_date")),
+            repr(search_args),
+            search_mode,
+            min_similarity,
+            query_operator,
+        )
+        groups = self._group_collections_for_search(
+            collections, query_vector, vector_search_term, model_vector_map, search_mode
+        )
+        fuse = len(groups) > 1 and any(
+            settings[0] != "vector" for _store, _model_id, settings in groups
+        )
+        if count:
+            # Results are only counted up to count_limit, exactly when empty
+            fetch_limit, cursor, skip = count_limit or None, None, 0
+        else:
+            cursor, skip = search_after, offset
+            if cursor is None and offset and not fuse:
+                cursor = search_cursor_cache.get(search_key, offset)
+                if cursor is not None:
+                    skip = 0
+            fetch_limit = limit + skip if limit else None
+
+        search_kwargs = {
+            "vector_search_term": vector_search_term,
+            "search_args": search_args,
+            "min_similarity": min_similarity,
+            "query_operator": query_operator,
+            "position": offset,
+        }
+        if fuse:
+            results = self._search_groups_fused(
+                groups, fetch_limit, cursor, **search_kwargs
+            )
+        else:
+            results = self.env["llm.store"]._merge_search_results(
+                self._search_groups(groups, fetch_limit, cursor, **search_kwargs),
+                limit=fetch_limit,
+            )
+
         # List of tuples: (score, chunk_id)
-        aggregated_results = []
+        aggregated_results = [
+            (result.get("score", 0.0), result.get("id")) for result in results
+        ]
+
+        if count:
+            return len(aggregated_results)
 
+        final_results = aggregated_results[skip : skip + limit if limit else None]
+        if limit and len(final_results) == limit and not fuse:
+            search_cursor_cache.put(search_key, offset + limit, final_results[-1])
+        if not final_results:
+            return self.browse([])
+
+        chunk_ids = [res[1] for res in final_results]
+        similarities = [res[0] for res in final_results]
+        similarity_scores = dict(zip(chunk_ids, similarities))  # noqa: B905
+        return self.browse(chunk_ids).with_context(similarity_scores=similarity_scores)
+
+    def _group_collections_for_search(
+        self, collections, query_vector, vector_search_term, model_vector_map, mode
+    ):
+        """Group the collections searched with a single store request
+
+        Returns:
+            dict: {(store, embedding model id, search settings): {
+            "query_vector": ..., "collections": ...}}, the embedding model id
+            being False when the query vector is given
+        """
+        groups = {}
         for collection in collections:
             current_query_vector = query_vector
+            model_id = False
             if not current_query_vector and vector_search_term:
-                current_query_vector = model_vector_map.get(
-                    collection.embedding_model_id.id
-                )
+                model_id = collection.embedding_model_id.id
+                current_query_vector = model_vector_map.get(model_id)
 
             if not current_query_vector or not collection.store_id:
                 continue
 
+            collection_mode = mode or collection.search_mode or "vector"
+            if not vector_search_term:
+                collection_mode = "vector"
+            settings = (
+                collection_mode,
+                collection.hybrid_vector_weight,
+                collection.hybrid_lexical_weight,
+                collection.hybrid_rrf_k,
+            )
+            group = groups.setdefault(
+                (collection.store_id, model_id, settings),
+                {
+                    "query_vector": current_query_vector,
+                    "collections": self.env["llm.knowledge.collection"],
+                },
+            )
+            group["collections"] |= collection
+        return groups
+
+    def _search_groups(self, groups, limit, cursor=None, **kwargs):
+        """Sorted results of each group, see _search_collection_group.
+        Groups whose search fails are skipped."""
+        result_lists = []
+        for (store, _model_id, settings), group in groups.items():
             try:
-                results = collection.search_vectors(
-                    query_vector=current_query_vector,
-                    limit=limit,
-                    filter=search_args if search_args else None,
-                    query_operator=query_operator,
-                    min_similarity=min_similarity,
-                    offset=0,
-                )
-                for result in results:
-                    aggregated_results.append(
-                        (result.get("score", 0.0), result.get("id"))
+                result_lists.append(
+                    self._search_collection_group(
+                        store, group, settings, limit=limit, cursor=cursor, **kwargs
                     )
+                )
             except Exception as e:
-                _logger.error(f"Error searching collection {collection.name}: {e}")
-                continue
+                _logger.error(
+                    f"Error searching collections {group['collections'].mapped('name')}: {e}"
+                )
+        return result_lists
 
-        if not aggregated_results:
-            return 0 if count else self.browse([])
+    def _search_groups_fused(self, groups, fetch_limit, cursor=None, **kwargs):
+        """Results of the groups fused by rank, the first ``fetch_limit``
+        ones after ``cursor``
 
-        aggregated_results.sort(key=lambda x: (x[0], -x[1]), reverse=True)
+        Fused ranks cannot be resumed from a cursor in each group, so the
+        window of each group is fetched from the start, and doubled until the
+        fused results reach past the cursor.
+        """
+        rrf_k = max(settings[3] or 0 for _store, _model, settings in groups)
+        window = fetch_limit
+        while True:
+            result_lists = self._search_groups(groups, window, **kwargs)
+            results = self._fuse_ranked_results(
+                result_lists, [1.0] * len(result_lists), rrf_k
+            )
+            if cursor is not None:
+                results = [r for r in results if self._is_after(r, cursor)]
+            if (
+                cursor is None
+                or window is None
+                or len(results) >= fetch_limit
+                or all(len(group) < window for group in result_lists)
+            ):
+                break
+            window *= 2
+        return results[: fetch_limit or None]
 
-        if count:
-            return len(aggregated_results)
+    def _search_collection_group(
+        self,
+        store,
+        group,
+        settings,
+        vector_search_term,
+        search_args,
+        min_similarity,
+        query_operator,
+        limit,
+        cursor=None,
+        position=0,
+    ):
+        """Search collections sharing a store, embedding model and search
+        settings with a single store request
 
-        final_results = aggregated_results[offset : offset + limit if limit else None]
-        chunk_ids = [res[1] for res in final_results]
-        similarities = [res[0] for res in final_results]
-        similarity_scores = dict(zip(chunk_ids, similarities))  # noqa: B905
-        return self.browse(chunk_ids).with_context(similarity_scores=similarity_scores)
+        With a ``cursor``, only the ``limit`` results ranked after it are
+        returned. Stores supporting keyset searches apply it themselves,
+        otherwise results are over-fetched from the start, assuming the
+        cursor is around ``position``, and the ones before it are dropped.
+
+        Returns:
+            list of search results, best score first
+        """
+        mode, vector_weight, lexical_weight, rrf_k = settings
+        search_kwargs = {
+            "filter": search_args if search_args else None,
+            "query_operator": query_operator,
+            "min_similarity": min_similarity,
+            "offset": 0,
+        }
+
+        if mode == "vector" and cursor is not None and store._supports_keyset_search():
+            return store._search_vectors_multi(
+                group["collections"].ids,
+                group["query_vector"],
+                limit=limit,
+                search_after=cursor,
+                search_depth=position,
+                **search_kwargs,
+            )
+
+        def search(search_limit):
+            if mode == "vector":
+                return store._search_vectors_multi(
+                    group["collections"].ids,
+                    group["query_vector"],
+                    limit=search_limit,
+                    **search_kwargs,
+                )
+            if store._supports_hybrid_search():
+                return store._search_vectors_multi(
+                    group["collections"].ids,
+                    group["query_vector"],
+                    limit=search_limit,
+                    query_text=vector_search_term,
+                    search_mode=mode,
+                    vector_weight=vector_weight,
+                    lexical_weight=lexical_weight,
+                    rrf_k=rrf_k,
+                    **search_kwargs,
+                )
+            candidate_limit = (
+                search_limit * HYBRID_CANDIDATE_FACTOR if search_limit else None
+            )
+            vector_results = []
+            if mode == "hybrid":
+                # Not every store applies the threshold, it must be applied to
+                # similarities before they are turned into ranks
+                vector_results = [
+                    result
+                    for result in store._search_vectors_multi(
+                        group["collections"].ids,
+                        group["query_vector"],
+                        limit=candidate_limit,
+                        **search_kwargs,
+                    )
+                    if result.get("score", 0.0) >= min_similarity
+                ]
+            lexical_results = self._lexical_search(
+                group["collections"].ids,
+                vector_search_term,
+                limit=candidate_limit,
+                domain=search_args,
+            )
+            return self._fuse_ranked_results(
+                [vector_results, lexical_results],
+                [vector_weight if mode == "hybrid" else 0.0, lexical_weight],
+                rrf_k,
+                limit=search_limit,
+            )
+
+        if cursor is None:
+            return search(limit)
+
+        # Grow the window until it reaches past the cursor
+        window = position + limit if limit else None
+        while True:
+            results = search(window)
+            after = [result for result in results if self._is_after(result, cursor)]
+            if window is None or len(results) < window or len(after) >= limit:
+                return after[:limit] if limit else after
+            window *= 2
+
+    @api.model
+    def _is_after(self, result, cursor):
+        """Whether a search result is ranked after a (score, chunk id) cursor"""
+        score, chunk_id = cursor
+        return (-result.get("score", 0.0), result.get("id")) > (-score, chunk_id)
+
+    @api.model
+    def _lexical_search(self, collection_ids, query_text, limit=None, domain=None):
+        """Rank the chunks of collections matching ``query_text`` on the
+        full-text index of their content
+
+        Returns:
+            list of dicts with 'id' and 'score', best match first
+        """
+        tsvector = f"to_tsvector('{FULLTEXT_CONFIG}', c.content)"
+        where_clause = ""
+        params = [FULLTEXT_CONFIG, query_text, list(collection_ids)]
+        if domain:
+            subquery, subquery_params = self._search(domain).subselect()
+            where_clause = f"AND c.id IN ({subquery})"
+            params += subquery_params
+        self.env.cr.execute(
+            f"""
+            SELECT c.id, ts_rank_cd({tsvector}, query.q) AS rank
+            FROM llm_knowledge_chunk c
+            CROSS JOIN websearch_to_tsquery(%s, %s) AS query(q)
+            WHERE {tsvector} @@ query.q
+            AND EXISTS (
+                SELECT 1 FROM llm_knowledge_resource_collection_rel rel
+                WHERE rel.resource_id = c.resource_id
+                AND rel.collection_id = ANY(%s)
+            )
+            {where_clause}
+            ORDER BY rank DESC, c.id
+            LIMIT %s
+            """,
+            params + [limit],
+        )
+        return [
+            {"id": chunk_id, "score": rank, "metadata": {}}
+            for chunk_id, rank in self.env.cr.fetchall()
+        ]
+
+    @api.model
+    def _fuse_ranked_results(self, result_lists, weights, rrf_k, limit=None):
+        """Reciprocal rank fusion of search results each sorted best first
+
+        A result ranked r in a list scores weight / (rrf_k + r), summed over
+        the lists it appears in. Scores are divided by their maximum, so they
+        stay between 0 and 1, but are not comparable to similarities.
+
+        Returns:
+            list of search results, best score first
+        """
+        rrf_k = max(rrf_k or 0, 0)
+        weights = [max(weight or 0.0, 0.0) for weight in weights]
+        scores, metadata = {}, {}
+        for results, weight in zip(result_lists, weights):  # noqa: B905
+            if not weight:
+                continue
+            for rank, result in enumerate(results, start=1):
+                chunk_id = result.get("id")
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + weight / (rrf_k + rank)
+                metadata.setdefault(chunk_id, result.get("metadata") or {})
+        max_score = sum(weights) / (rrf_k + 1) or 1.0
+        fused = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [
+            {"id": chunk_id, "score": score / max_score, "metadata": metadata[chunk_id]}
+            for chunk_id, score in fused[: limit or None]
+        ]
@@ -1,13 +1,23 @@
 import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
 from odoo.tools.safe_eval import safe_eval
 
+from .llm_embedding_pipeline import (
+    AdaptiveBatchSizer,
+    embed_texts,
+    estimate_tokens,
+    is_rate_limit_error,
+)
 from .llm_resource_chunker import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_SIZE
 
 _logger = logging.getLogger(__name__)
 
+MAX_RATE_LIMIT_RETRIES = 5
+
 
 class LLMKnowledgeCollection(models.Model):
     _name = "llm.knowledge.collection"
@@ -101,6 +111,74 @@ class LLMKnowledgeCollection(models.Model):
         tracking=True,
     )
 
+    embedding_concurrency = fields.Integer(
+        string="Embedding Concurrency",
+        default=4,
+        help="Number of embedding requests sent to the provider in parallel",
+    )
+    embedding_max_batch_tokens = fields.Integer(
+        string="Max Tokens per Embedding Request",
+        default=100000,
+        help="Upper bound of the estimated tokens sent in a single embedding "
+        "request. Leave empty to only limit batches by their size.",
+    )
+    use_embedding_cache = fields.Boolean(
+        string="Use Embedding Cache",
+        default=True,
+        help="Reuse embeddings already computed by the embedding model for the "
+        "same text instead of calling the provider again",
+    )
+    embedding_cache_hits = fields.Integer(
+        string="Embedding Cache Hits",
+        readonly=True,
+        copy=False,
+    )
+    embedding_cache_misses = fields.Integer(
+        string="Embedding Cache Misses",
+        readonly=True,
+        copy=False,
+    )
+    embedding_cache_hit_rate = fields.Float(
+        string="Embedding Cache Hit Rate",
+        compute="_compute_embedding_cache_hit_rate",
+    )
+    last_embedding_date = fields.Datetime(
+        string="Last Embedding",
+        readonly=True,
+        copy=False,
+        help="When chunks of this collection were last embedded",
+    )
+
+    search_mode = fields.Selection(
+        [
+            ("vector", "Semantic"),
+            ("hybrid", "Hybrid"),
+            ("lexical", "Keywords"),
+        ],
+        string="Search Mode",
+        default="vector",
+        required=True,
+        help="Semantic searches the embeddings, Keywords the full-text index of "
+        "the chunks, and Hybrid fuses both rankings so that exact terms such as "
+        "product codes or invoice numbers are also found",
+    )
+    hybrid_vector_weight = fields.Float(
+        string="Semantic Weight",
+        default=1.0,
+        help="Weight of the semantic ranking in hybrid searches",
+    )
+    hybrid_lexical_weight = fields.Float(
+        string="Keyword Weight",
+        default=1.0,
+        help="Weight of the full-text ranking in hybrid searches",
+    )
+    hybrid_rrf_k = fields.Integer(
+        string="Rank Fusion Constant",
+        default=60,
+        help="Constant k of the reciprocal rank fusion, a result ranked r "
+        "scores weight / (k + r). Higher values flatten the rankings.",
+    )
+
     @api.model
     def _get_available_parsers(self):
         return self.env["llm.resource"]._get_available_parsers()
@@ -124,6 +202,14 @@ class LLMKnowledgeCollection(models.Model):
         for record in self:
             record.chunk_count = len(record.chunk_ids)
 
+    @api.depends("embedding_cache_hits", "embedding_cache_misses")
+    def _compute_embedding_cache_hit_rate(self):
+        for record in self:
+            total = record.embedding_cache_hits + record.embedding_cache_misses
+            record.embedding_cache_hit_rate = (
+                record.embedding_cache_hits / total if total else 0.0
+            )
+
     @api.model_create_multi
     def create(self, vals_list):
         """Extend create to initialize store collection if needed"""
@@ -160,6 +246,12 @@ class LLMKnowledgeCollection(models.Model):
             # Handle removed resources
             collection._handle_removed_resources(removed_resource_ids)
 
+            # Chunks of added resources are not in this collection's store yet
+            added_resource_ids = set(current_resource_ids) - set(old_resource_ids)
+            self.env["llm.resource"].browse(list(added_resource_ids)).chunk_ids.write(
+                {"embedded_collection_ids": [(3, collection.id)]}
+            )
+
         return True
 
     def write(self, vals):
@@ -281,6 +373,8 @@ class LLMKnowledgeCollection(models.Model):
         """Finds ready resources, resets their state to 'chunked', and posts a message."""
         self.ensure_one()
         ready_resources = self.resource_ids.filtered(lambda r: r.state == "ready")
+        # Vectors of the previous model or store are not valid anymore
+        self.resource_ids.chunk_ids.write({"embedded_collection_ids": [(3, self.id)]})
         if ready_resources:
             count = len(ready_resources)
             ready_resources.write({"state": "chunked"})
@@ -446,9 +540,10 @@ class LLMKnowledgeCollection(models.Model):
                 )
 
     def process_resources(self):
-        """Process resources through retrieval, parsing, and chunking (up to chunked state)"""
-        for collection in self:
-            collection.resource_ids.process_resource()
+        """Queue the resources to be processed through retrieval, parsing,
+        chunking and embedding by the pipeline workers"""
+        resources = self.resource_ids
+        return resources._notify_enqueued(resources._enqueue_pipeline_job())
 
     def reindex_collection(self):
         """
@@ -520,32 +615,21 @@ class LLMKnowledgeCollection(models.Model):
     def action_embed_resources(self, specific_resource_ids=None):
         """
         Action handler for embedding resources in the UI.
-        Wraps the embed_resources method and returns a proper action dictionary.
+        Queues the chunked resources to be embedded by the pipeline workers.
 
         Args:
             specific_resource_ids: Optional list of resource IDs to process.
         """
         self.ensure_one()
-        result = self.embed_resources(specific_resource_ids=specific_resource_ids)
-
-        # Return a proper action dictionary with the result in context
-        if result and result.get("success"):
-            return True
-        else:
-            return {
-                "type": "ir.actions.client",
-                "tag": "display_notification",
-                "params": {
-                    "title": _("Embedding Failed"),
-                    "message": _(
-                        "Failed to embed resources. Check the logs for details."
-                    ),
-                    "type": "warning",
-                    "sticky": False,
-                },
-            }
-
-    def embed_resources(self, specific_resource_ids=None, batch_size=50):
+        resources = self.resource_ids
+        if specific_resource_ids:
+            resources = resources.filtered(lambda r: r.id in specific_resource_ids)
+        resources = resources.filtered(lambda r: r.state == "chunked")
+        return resources._notify_enqueued(resources._enqueue_pipeline_job())
+
+    def embed_resources(
+        self, specific_resource_ids=None, batch_size=50, specific_chunk_ids=None
+    ):
         """
         Embed all chunked resources using the collection's embedding model and store.
 
@@ -553,6 +637,9 @@ class LLMKnowledgeCollection(models.Model):
             specific_resource_ids: Optional list of resource IDs to process.
                                 If provided, only chunks from these resources will be processed.
             batch_size: Number of chunks to process in each batch
+            specific_chunk_ids: Optional list of chunk IDs to process, the
+                                other chunks of their resources being
+                                already embedded.
         """
         for collection in self:
             if not collection.embedding_model_id:
@@ -583,6 +670,8 @@ class LLMKnowledgeCollection(models.Model):
                 chunk_domain.append(("resource_id", "in", specific_resource_ids))
             else:
                 chunk_domain.append(("resource_id.state", "=", "chunked"))
+            if specific_chunk_ids:
+                chunk_domain.append(("id", "in", specific_chunk_ids))
 
             # Get all relevant chunks in one query
             # Fetch chunks and build the target map simultaneously
@@ -618,76 +707,11 @@ class LLMKnowledgeCollection(models.Model):
                 f"Collection '{collection.name}': Starting embedding for {total_chunks} chunks from {len(resource_target_chunks)} resources."
             )
 
-            # Process in batches
-            for batch_num, i in enumerate(range(0, total_chunks, batch_size)):
-                batch = chunks_to_process[i : i + batch_size]
-                batch_start_index = i
-                batch_end_index = i + len(batch) - 1
-                _logger.info(
-                    f"Processing batch {batch_num + 1}/{ (total_chunks + batch_size - 1)//batch_size } (chunks {batch_start_index}-{batch_end_index})..."
-                )
-
-                # Prepare chunked data for the store
-                texts = []
-                metadata_list = []
-                chunk_ids_in_batch = []  # IDs for this specific batch
-                resource_ids_in_batch = set()  # Resources touched in this batch
-
-                for chunk in batch:
-                    texts.append(chunk.content)
-                    metadata = {
-                        "resource_id": chunk.resource_id.id,
-                        "resource_name": chunk.resource_id.name,
-                        "chunk_id": chunk.id,
-                        "sequence": chunk.sequence,
-                    }
-                    # Add custom metadata if present
-                    if chunk.metadata:
-                        metadata.update(chunk.metadata)
-
-                    metadata_list.append(metadata)
-                    chunk_ids_in_batch.append(chunk.id)
-                    resource_ids_in_batch.add(chunk.resource_id.id)
-
-                try:
-                    # Generate embeddings using the collection's embedding model
-                    embeddings = collection.embedding_model_id.embedding(texts)
-                    # Insert vectors into the store
-                    collection.insert_vectors(
-                        vectors=embeddings,
-                        metadata=metadata_list,
-                        ids=chunk_ids_in_batch,
-                    )
-
-                    # Mark chunks in this batch as successfully processed
-                    successfully_processed_chunk_ids.update(chunk_ids_in_batch)
-                    processed_chunks_count += len(batch)
-
-                    _logger.info(
-                        f"Batch {batch_num + 1} successful. Committing transaction."
-                    )
-                    # Commit transaction after each successful batch
-                    self.env.cr.commit()
-                except Exception as e:
-                    # Format resource IDs for the message
-                    resource_ids_str = ", ".join(
-                        map(str, sorted(list(resource_ids_in_batch)))
-                    )
-                    error_msg = _(
-                        "Error processing batch %d (chunks %d-%d, resources [%s]): %s"
-                    ) % (
-                        batch_num + 1,
-                        batch_start_index,
-                        batch_end_index,
-                        resource_ids_str,
-                        str(e),
-                    )
-                    _logger.error(error_msg)
-                    collection._post_styled_message(error_msg, message_type="error")
-                    # Post messages to individual resources
-                    # Batch read all resources at once
-                    self._post_resources_error(resource_ids_in_batch, str(e), batch_num)
-                    # Continue with the next batch
+            # Process in batches, keeping several provider requests in flight
+            (
+                processed_chunks_count,
+                successfully_processed_chunk_ids,
+            ) = collection._embed_chunks_pipelined(chunks_to_process, batch_size)
 
             # Update resource states to ready - only update resources that had chunks processed
             # Determine which resources are fully processed
@@ -700,6 +724,214 @@ class LLMKnowledgeCollection(models.Model):
                 fully_processed_resource_ids, processed_chunks_count
             )
 
+    def _embed_chunks_pipelined(self, chunks, batch_size):
+        """Embed chunks with up to ``embedding_concurrency`` provider requests
+        in flight.
+
+        Provider calls run in a thread pool while this thread alone inserts
+        vectors into the store and commits after each successful batch. Batch
+        sizes adapt to ``embedding_max_batch_tokens`` and to the provider
+        latency, and rate limited batches are retried with a backoff. Other
+        failures are reported and the batch is skipped.
+
+        Returns:
+            tuple: (number of processed chunks, set of processed chunk ids)
+        """
+        self.ensure_one()
+        texts = [chunk.content or "" for chunk in chunks]
+        total_chunks = len(texts)
+        concurrency = max(1, self.embedding_concurrency)
+        sizer = AdaptiveBatchSizer(
+            batch_size, max_batch_tokens=self.embedding_max_batch_tokens
+        )
+        embed = self.embedding_model_id.get_embedding_function()
+        stats = {
+            "processed": 0,
+            "chunk_ids": set(),
+            "calls": 0,
+            "tokens": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+        }
+        start_time = time.monotonic()
+        position = 0
+        batch_num = 0
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while position < total_chunks or in_flight:
+                while position < total_chunks and len(in_flight) < concurrency:
+                    end = sizer.take(texts, position)
+                    batch = self._prepare_embedding_batch(
+                        batch_num, position, chunks[position:end], texts[position:end]
+                    )
+                    batch_num += 1
+                    position = end
+                    _logger.info(
+                        f"Processing batch {batch['num'] + 1} (chunks {batch['start']}-{end - 1})..."
+                    )
+                    if not batch["missing"]:
+                        self._write_embedding_batch(batch, [], stats)
+                        continue
+                    future = executor.submit(
+                        embed_texts, embed, list(batch["missing"].values())
+                    )
+                    in_flight[future] = batch
+
+                if not in_flight:
+                    continue
+                done, _pending = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = in_flight.pop(future)
+                    try:
+                        vectors, latency = future.result()
+                    except Exception as e:
+                        if (
+                            is_rate_limit_error(e)
+                            and batch["retries"] < MAX_RATE_LIMIT_RETRIES
+                        ):
+                            batch["retries"] += 1
+                            delay = sizer.on_rate_limit()
+                            _logger.warning(
+                                f"Batch {batch['num'] + 1} rate limited, retrying in {delay:.0f}s."
+                            )
+                            future = executor.submit(
+                                embed_texts,
+                                embed,
+                                list(batch["missing"].values()),
+                                delay=delay,
+                            )
+                            in_flight[future] = batch
+                        else:
+                            self._handle_embedding_batch_error(batch, e)
+                        continue
+                    sizer.on_success(latency)
+                    stats["calls"] += 1
+                    stats["tokens"] += sum(
+                        estimate_tokens(text) for text in batch["missing"].values()
+                    )
+                    self._write_embedding_batch(batch, vectors, stats)
+
+        if stats["cache_hits"] or stats["cache_misses"]:
+            self.write(
+                {
+                    "embedding_cache_hits": self.embedding_cache_hits
+                    + stats["cache_hits"],
+                    "embedding_cache_misses": self.embedding_cache_misses
+                    + stats["cache_misses"],
+                }
+            )
+            self.env.cr.commit()
+
+        elapsed = max(time.monotonic() - start_time, 1e-6)
+        if stats["processed"]:
+            self._post_styled_message(
+                _(
+                    "Embedding throughput: %(chunks).1f chunks/s, ~%(tokens).0f tokens/s "
+                    "(%(processed)d chunks, %(calls)d provider calls in %(elapsed).1fs, "
+                    "final batch size %(batch_size)d)."
+                )
+                % {
+                    "chunks": stats["processed"] / elapsed,
+                    "tokens": stats["tokens"] / elapsed,
+                    "processed": stats["processed"],
+                    "calls": stats["calls"],
+                    "elapsed": elapsed,
+                    "batch_size": sizer.batch_size,
+                },
+                message_type="info",
+            )
+        return stats["processed"], stats["chunk_ids"]
+
+    def _prepare_embedding_batch(self, batch_num, start, chunks, texts):
+        """Build a batch, resolving the texts already in the embedding cache."""
+        batch = {
+            "num": batch_num,
+            "start": start,
+            "chunks": chunks,
+            "retries": 0,
+        }
+        if self.use_embedding_cache:
+            hashes, cached, missing = self.env[
+                "llm.knowledge.embedding.cache"
+            ]._partition(self.embedding_model_id, texts)
+        else:
+            hashes = [str(index) for index in range(len(texts))]
+            cached = {}
+            missing = dict(zip(hashes, texts))  # noqa: B905
+        batch.update(hashes=hashes, cached=cached, missing=missing)
+        return batch
+
+    def _write_embedding_batch(self, batch, vectors, stats):
+        """Insert the vectors of a batch into the store and commit."""
+        chunks = batch["chunks"]
+        try:
+            computed = dict(zip(batch["missing"], vectors))  # noqa: B905
+            if self.use_embedding_cache:
+                self.env["llm.knowledge.embedding.cache"]._store(
+                    self.embedding_model_id.id, computed
+                )
+            computed.update(batch["cached"])
+            embeddings = [computed[content_hash] for content_hash in batch["hashes"]]
+
+            metadata_list = []
+            for chunk in chunks:
+                metadata = {
+                    "resource_id": chunk.resource_id.id,
+                    "resource_name": chunk.resource_id.name,
+                    "chunk_id": chunk.id,
+                    "sequence": chunk.sequence,
+                }
+                # Add custom metadata if present
+                if chunk.metadata:
+                    metadata.update(chunk.metadata)
+                metadata_list.append(metadata)
+
+            # Insert vectors into the store
+            self.insert_vectors(
+                vectors=embeddings,
+                metadata=metadata_list,
+                ids=chunks.ids,
+            )
+
+            # Mark chunks in this batch as successfully processed
+            chunks.write({"embedded_collection_ids": [(4, self.id)]})
+            stats["chunk_ids"].update(chunks.ids)
+            stats["processed"] += len(chunks)
+            if self.use_embedding_cache:
+                # Written once at the end of the run, see _embed_chunks_pipelined
+                stats["cache_hits"] += len(batch["hashes"]) - len(batch["missing"])
+                stats["cache_misses"] += len(batch["missing"])
+
+            _logger.info(f"Batch {batch['num'] + 1} successful. Committing transaction.")
+            # Commit transaction after each successful batch
+            self.env.cr.commit()
+        except Exception as e:
+            self._handle_embedding_batch_error(batch, e)
+
+    def _handle_embedding_batch_error(self, batch, error):
+        """Report a failed batch on the collection and its resources."""
+        chunks = batch["chunks"]
+        resource_ids_in_batch = set(chunks.mapped("resource_id").ids)
+        # Format resource IDs for the message
+        resource_ids_str = ", ".join(map(str, sorted(resource_ids_in_batch)))
+        error_msg = _(
+            "Error processing batch %d (chunks %d-%d, resources [%s]): %s"
+        ) % (
+            batch["num"] + 1,
+            batch["start"],
+            batch["start"] + len(chunks) - 1,
+            resource_ids_str,
+            str(error),
+        )
+        _logger.error(error_msg)
+        self._post_styled_message(error_msg, message_type="error")
+        # Post messages to individual resources
+        self._post_resources_error(resource_ids_in_batch, str(error), batch["num"])
+
+    def action_reset_embedding_cache_stats(self):
+        self.write({"embedding_cache_hits": 0, "embedding_cache_misses": 0})
+
     def _post_resources_error(self, resource_ids, error_msg, batch_num):
         resources = self.env["llm.resource"].browse(list(resource_ids))
         for resource in resources:
@@ -712,14 +944,21 @@ class LLMKnowledgeCollection(models.Model):
             resource._post_styled_message(resource_error_msg, message_type="error")
 
     def _finalize_embedding(self, fully_processed_resource_ids, processed_chunks_count):
+        if processed_chunks_count:
+            # Also moves write_date, which keys the search cursors
+            self.write({"last_embedding_date": fields.Datetime.now()})
         # Update states only for fully processed resources
         if fully_processed_resource_ids:
             _logger.info(
                 f"Updating state to 'ready' for {len(fully_processed_resource_ids)} fully processed resources."
             )
-            self.env["llm.resource"].browse(list(fully_processed_resource_ids)).write(
-                {"state": "ready"}
+            # Resources of other collections are ready once embedded in all
+            ready_resources = (
+                self.env["llm.resource"]
+                .browse(list(fully_processed_resource_ids))
+                .filtered(lambda r: r._is_embedded())
             )
+            ready_resources.write({"state": "ready"})
             # Final commit after state updates
             self.env.cr.commit()
 
@@ -800,6 +1039,7 @@ class LLMKnowledgeCollection(models.Model):
 
             # Process each removed resource
             resources = self.env["llm.resource"].browse(removed_resource_ids)
+            resources.chunk_ids.write({"embedded_collection_ids": [(3, self.id)]})
             for resource in resources:
                 # Handle resource removal (vector cleanup)
                 self._handle_resource_removal(resource)
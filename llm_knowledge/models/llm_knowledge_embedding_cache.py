@@ -0,0 +1,195 @@
+import hashlib
+import logging
+import re
+import unicodedata
+
+import numpy as np
+import psycopg2
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+DEFAULT_CACHE_MAX_AGE_DAYS = 90
+DEFAULT_CACHE_MAX_ENTRIES = 1000000
+
+
+class LLMKnowledgeEmbeddingCache(models.Model):
+    """Embeddings already computed by a model, keyed by the hash of the text.
+
+    The cache is shared by every collection using the same embedding model, so
+    reindexing, switching stores, re-chunking identical content or adding a
+    resource to several collections does not call the provider again.
+    Vectors are stored as raw float32 bytes and only accessed through SQL.
+    """
+
+    _name = "llm.knowledge.embedding.cache"
+    _description = "Embedding Cache for Knowledge Chunks"
+    _log_access = False
+
+    embedding_model_id = fields.Many2one(
+        "llm.model",
+        string="Embedding Model",
+        required=True,
+        ondelete="cascade",
+    )
+    content_hash = fields.Char(
+        string="Content Hash",
+        required=True,
+        help="SHA-256 of the normalized text",
+    )
+    vector = fields.Binary(
+        string="Vector",
+        attachment=False,
+        help="Raw float32 bytes of the embedding",
+    )
+    cache_date = fields.Datetime(string="Cached on", readonly=True)
+    last_used = fields.Datetime(string="Last Used", readonly=True, index=True)
+
+    _sql_constraints = [
+        (
+            "unique_model_content_hash",
+            "UNIQUE(embedding_model_id, content_hash)",
+            "A text can only be cached once per embedding model",
+        ),
+    ]
+
+    @api.model
+    def _normalize_text(self, text):
+        """Normalize text so that trivial differences share a cache entry."""
+        text = unicodedata.normalize("NFC", text or "")
+        return WHITESPACE_RE.sub(" ", text).strip()
+
+    @api.model
+    def _hash_text(self, text):
+        return hashlib.sha256(self._normalize_text(text).encode()).hexdigest()
+
+    @api.model
+    def get_embeddings(self, embedding_model, texts):
+        """Return the embeddings of ``texts``, only sending cache misses to the model.
+
+        Args:
+            embedding_model: llm.model record used to compute the embeddings
+            texts: list of strings
+
+        Returns:
+            tuple: (list of vectors in the order of texts, hit count, miss count)
+        """
+        hashes, cached, missing = self._partition(embedding_model, texts)
+        if missing:
+            new_vectors = embedding_model.embedding(list(missing.values()))
+            computed = dict(zip(missing.keys(), new_vectors))  # noqa: B905
+            self._store(embedding_model.id, computed)
+            cached.update(computed)
+
+        vectors = [cached[content_hash] for content_hash in hashes]
+        misses = len(missing)
+        return vectors, len(hashes) - misses, misses
+
+    @api.model
+    def _partition(self, embedding_model, texts):
+        """Split texts between cached vectors and texts still to embed.
+
+        Returns:
+            tuple: (hash of each text, {hash: cached vector},
+                {hash: text to embed} without duplicates)
+        """
+        hashes = [self._hash_text(text) for text in texts]
+        cached = self._lookup(embedding_model.id, hashes)
+        missing = {}
+        for text, content_hash in zip(texts, hashes):  # noqa: B905
+            if content_hash not in cached and content_hash not in missing:
+                missing[content_hash] = text
+        return hashes, cached, missing
+
+    @api.model
+    def _lookup(self, embedding_model_id, hashes):
+        """Fetch cached vectors in bulk and refresh their last use date."""
+        if not hashes:
+            return {}
+        self.env.cr.execute(
+            """
+            UPDATE llm_knowledge_embedding_cache
+            SET last_used = (now() AT TIME ZONE 'UTC')
+            WHERE embedding_model_id = %s AND content_hash = ANY(%s)
+            RETURNING content_hash, vector
+            """,
+            (embedding_model_id, list(set(hashes))),
+        )
+        return {
+            content_hash: np.frombuffer(vector, dtype=np.float32).tolist()
+            for content_hash, vector in self.env.cr.fetchall()
+            if vector is not None
+        }
+
+    @api.model
+    def _store(self, embedding_model_id, vectors_by_hash):
+        """Insert computed vectors, ignoring entries cached concurrently."""
+        if not vectors_by_hash:
+            return
+        values = [
+            (
+                embedding_model_id,
+                content_hash,
+                psycopg2.Binary(np.asarray(vector, dtype=np.float32).tobytes()),
+            )
+            for content_hash, vector in vectors_by_hash.items()
+        ]
+        placeholders = ", ".join(
+            ["(%s, %s, %s, now() AT TIME ZONE 'UTC', now() AT TIME ZONE 'UTC')"]
+            * len(values)
+        )
+        params = [value for row in values for value in row]
+        self.env.cr.execute(
+            f"""
+            INSERT INTO llm_knowledge_embedding_cache
+                (embedding_model_id, content_hash, vector, cache_date, last_used)
+            VALUES {placeholders}
+            ON CONFLICT (embedding_model_id, content_hash) DO NOTHING
+            """,
+            params,
+        )
+
+    @api.model
+    def _gc_embedding_cache(self):
+        """Evict entries unused for too long, then the least recently used
+        entries above the size cap. Called by a scheduled action."""
+        get_param = self.env["ir.config_parameter"].sudo().get_param
+        max_age_days = int(
+            get_param(
+                "llm_knowledge.embedding_cache_max_age_days",
+                DEFAULT_CACHE_MAX_AGE_DAYS,
+            )
+        )
+        max_entries = int(
+            get_param(
+                "llm_knowledge.embedding_cache_max_entries",
+                DEFAULT_CACHE_MAX_ENTRIES,
+            )
+        )
+        cr = self.env.cr
+        if max_age_days > 0:
+            cr.execute(
+                """
+                DELETE FROM llm_knowledge_embedding_cache
+                WHERE last_used < (now() AT TIME ZONE 'UTC') - %s * interval '1 day'
+                """,
+                (max_age_days,),
+            )
+            _logger.info("Evicted %s expired embedding cache entries", cr.rowcount)
+        if max_entries > 0:
+            cr.execute(
+                """
+                DELETE FROM llm_knowledge_embedding_cache
+                WHERE id IN (
+                    SELECT id FROM llm_knowledge_embedding_cache
+                    ORDER BY last_used DESC
+                    OFFSET %s
+                )
+                """,
+                (max_entries,),
+            )
+            _logger.info("Evicted %s embedding cache entries over cap", cr.rowcount)
+        return True
@@ -0,0 +1,13 @@
+from odoo import fields, models
+
+
+class LLMPipelineJob(models.Model):
+    _inherit = "llm.pipeline.job"
+
+    stage = fields.Selection(
+        selection_add=[
+            ("chunk", "Chunk"),
+            ("embed", "Embed"),
+        ],
+        ondelete={"chunk": "cascade", "embed": "cascade"},
+    )
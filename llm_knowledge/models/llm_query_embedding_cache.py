@@ -0,0 +1,97 @@
+"""
+Process wide cache of query embeddings.
+
+Every knowledge search embeds its query once per embedding model, and agents
+often repeat the same search several times in a thread. Query vectors are
+kept here as read-only float32 arrays, keyed by everything that affects
+them, expire after a TTL and are evicted in LRU order once the cache is full.
+Hits, misses and the provider latency saved by hits are counted.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_QUERY_CACHE_SIZE = 1024
+DEFAULT_QUERY_CACHE_TTL = 3600
+
+
+class QueryEmbeddingCache:
+    def __init__(self, max_size=DEFAULT_QUERY_CACHE_SIZE, ttl=DEFAULT_QUERY_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def make_key(dbname, embedding_model, content_hash):
+        """Build the cache key of a query embedded by a model.
+
+        The model name is part of the key so that pointing a model record to
+        another provider model does not serve vectors of the previous one.
+        """
+        return (dbname, embedding_model.id, embedding_model.name, content_hash)
+
+    def configure(self, max_size, ttl):
+        with self._lock:
+            self.max_size = max_size
+            self.ttl = ttl
+            self._evict()
+
+    def get(self, key):
+        """Return the cached vector of ``key``, None when missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                vector, expires_at, latency = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self.saved_seconds += latency
+                    return vector
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, vector, latency=0.0):
+        """Cache a vector computed in ``latency`` seconds."""
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        array = np.array(vector, dtype=np.float32)
+        array.flags.writeable = False
+        with self._lock:
+            self._entries[key] = (array, time.monotonic() + self.ttl, latency)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > max(self.max_size, 0):
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_seconds": self.saved_seconds,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+            self.saved_seconds = 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+query_embedding_cache = QueryEmbeddingCache()
@@ -110,6 +110,7 @@ class LLMKnowledgeChunker(models.Model):
 
         # Set resource back to chunked state to trigger re-embedding
         self.write({"state": "chunked"})
+        chunks.write({"embedded_collection_ids": [(5, 0, 0)]})
 
         # Delete chunks from each collection's store
         for collection in collections:
@@ -189,12 +190,28 @@ class LLMKnowledgeChunker(models.Model):
             )
             return False
 
+        # Resources whose chunks are all embedded already, e.g. unchanged
+        # chunks kept by a new chunking, only need their state updated
+        up_to_date_docs = chunked_docs.filtered(
+            lambda d: d.collection_ids and d.chunk_ids and d._is_embedded()
+        )
+        up_to_date_docs.write({"state": "ready"})
+        chunked_docs -= up_to_date_docs
+
         # Track if any resources were embedded
-        any_embedded = False
+        any_embedded = bool(up_to_date_docs)
 
-        # Let each collection handle the embedding
+        # Let each collection embed the chunks missing from its store
         for collection in collections:
-            result = collection.embed_resources(specific_resource_ids=chunked_docs.ids)
+            pending_chunks = chunked_docs.filtered(
+                lambda d, c=collection: c in d.collection_ids
+            ).chunk_ids._get_pending_chunks(collection)
+            if not pending_chunks:
+                continue
+            result = collection.embed_resources(
+                specific_resource_ids=pending_chunks.resource_id.ids,
+                specific_chunk_ids=pending_chunks.ids,
+            )
             # Check if result is not None before trying to access .get()
             if (
                 result
@@ -255,32 +272,47 @@ class LLMKnowledgeChunker(models.Model):
             }
 
         resources = self.browse(active_ids)
-        # Process all selected resources
-        result = resources.process_resource()
+        # Queue all selected resources, workers process them in the background
+        return resources._notify_enqueued(resources._enqueue_pipeline_job())
 
-        if result:
-            return {
-                "type": "ir.actions.client",
-                "tag": "reload",
-            }
-
-        else:
-            return {
-                "type": "ir.actions.client",
-                "tag": "display_notification",
-                "params": {
-                    "title": _("Processing Failed"),
-                    "message": _("Mass processing resources failed"),
-                    "sticky": False,
-                    "type": "danger",
-                },
-            }
+    def _get_pipeline_stage(self):
+        """Chunk parsed resources, and embed chunked ones when they belong to
+        a collection"""
+        self.ensure_one()
+        if self.state == "parsed":
+            return "chunk"
+        if self.state == "chunked":
+            return "embed" if self.collection_ids else False
+        return super()._get_pipeline_stage()
+
+    def _get_unchanged_content_state(self):
+        """Keep the chunks, and their embeddings, of resources whose content
+        did not change, unless their chunking settings did"""
+        self.ensure_one()
+        if (
+            self.chunk_ids
+            and self.chunking_fingerprint == self._get_chunking_fingerprint()
+        ):
+            if self.collection_ids and self._is_embedded():
+                return "ready"
+            return "chunked"
+        return super()._get_unchanged_content_state()
+
+    def _is_embedded(self):
+        """Whether every chunk is embedded in every collection of the
+        resource"""
+        self.ensure_one()
+        return all(
+            not self.chunk_ids._get_pending_chunks(collection)
+            for collection in self.collection_ids
+        )
 
     def _reset_state_if_needed(self):
         """Reset resource state to 'chunked' if it's in 'ready' state and not in any collection."""
         self.ensure_one()
         if self.state == "ready" and not self.collection_ids:
             self.write({"state": "chunked"})
+            self.chunk_ids.write({"embedded_collection_ids": [(5, 0, 0)]})
             _logger.info(
                 f"Reset resource {self.id} to 'chunked' state after removal from all collections"
             )
@@ -305,6 +337,17 @@ class LLMKnowledgeChunker(models.Model):
                 cid for cid in old_collection_ids if cid not in current_collection_ids
             ]
 
+            # Chunks are not in the stores of the collections it was added to
+            added_collection_ids = set(current_collection_ids) - set(old_collection_ids)
+            if added_collection_ids:
+                resource.chunk_ids.write(
+                    {
+                        "embedded_collection_ids": [
+                            (3, cid) for cid in added_collection_ids
+                        ]
+                    }
+                )
+
             # Clean up vectors in those collections' stores
             if removed_collection_ids:
                 collections = self.env["llm.knowledge.collection"].browse(
@@ -1,15 +1,71 @@
+import bisect
+import hashlib
 import logging
 import re
+from collections import defaultdict
+
+from psycopg2.extras import execute_values
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
 
+from odoo.addons.llm.models.llm_tokenizer import estimate_tokenizer
+
 _logger = logging.getLogger(__name__)
 
 # Define default values as constants
 DEFAULT_CHUNK_SIZE = 200
 DEFAULT_CHUNK_OVERLAP = 20
 
+# Whitespace ending a sentence or a paragraph, where chunks preferably end
+SENTENCE_BOUNDARY_RE = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+
+def sentence_boundaries(content, offsets):
+    """Indexes of the tokens starting a sentence or a paragraph of content,
+    in increasing order
+
+    Args:
+        content: Text of the tokens
+        offsets: Character offset where each token of content starts
+    """
+    return sorted(
+        {
+            bisect.bisect_right(offsets, match.end()) - 1
+            for match in SENTENCE_BOUNDARY_RE.finditer(content)
+        }
+    )
+
+
+def split_token_windows(token_count, boundaries, chunk_size, chunk_overlap):
+    """Sliding window over token_count tokens, in (start, end) token indexes.
+
+    Each window holds at most ``chunk_size`` tokens and starts with exactly
+    the last ``chunk_overlap`` tokens of the previous one. Windows end on a
+    boundary when one keeps them at least half full and longer than the
+    overlap, otherwise after ``chunk_size`` tokens.
+
+    Args:
+        token_count: Number of tokens to split
+        boundaries: Indexes of the tokens where windows preferably end, in
+            increasing order
+        chunk_size: Maximum size of the windows, at least 1
+        chunk_overlap: Size of the overlap between windows, at most half of
+            ``chunk_size``
+    """
+    min_size = max(chunk_size // 2, chunk_overlap + 1)
+    start = 0
+    while start < token_count:
+        end = min(start + chunk_size, token_count)
+        if end < token_count:
+            index = bisect.bisect_right(boundaries, end) - 1
+            if index >= 0 and boundaries[index] >= start + min_size:
+                end = boundaries[index]
+        yield start, end
+        if end >= token_count:
+            break
+        start = end - chunk_overlap
+
 
 class LLMKnowledgeChunker(models.Model):
     _inherit = "llm.resource"
@@ -48,6 +104,12 @@ class LLMKnowledgeChunker(models.Model):
         compute="_compute_chunk_count",
         store=True,
     )
+    chunking_fingerprint = fields.Char(
+        string="Chunking Fingerprint",
+        readonly=True,
+        copy=False,
+        help="Fingerprint of the content and chunking settings of the current chunks",
+    )
 
     @api.model
     def _get_available_chunkers(self):
@@ -101,8 +163,7 @@ class LLMKnowledgeChunker(models.Model):
                         success = resource._chunk_default()
 
                     if success:
-                        # Mark as chunked
-                        resource.write({"state": "chunked"})
+                        resource._mark_chunked()
                     else:
                         resource._post_styled_message(
                             "Failed to create chunks - no content or empty result",
@@ -123,95 +184,181 @@ class LLMKnowledgeChunker(models.Model):
             resources._unlock()
             raise UserError(_("Error in batch chunking: %s") % str(e)) from e
 
+    def _get_chunking_fingerprint(self):
+        """Fingerprint of what the chunks of the resource are made from"""
+        self.ensure_one()
+        key = "|".join(
+            [
+                self._get_content_hash(),
+                self.chunker or "",
+                str(self.target_chunk_size),
+                str(self.target_chunk_overlap),
+                # Only the default chunker measures chunks with the tokenizer
+                self._get_chunk_tokenizer().name if self.chunker == "default" else "",
+            ]
+        )
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _mark_chunked(self):
+        """Move the resource to the chunked state once its chunks are built"""
+        self.ensure_one()
+        self.write(
+            {
+                "state": "chunked",
+                "chunking_fingerprint": self._get_chunking_fingerprint(),
+            }
+        )
+
+    def _sync_chunks(self, chunk_specs):
+        """Make the chunks of the resource match ``chunk_specs``.
+
+        Existing chunks whose text is unchanged are kept along with their
+        vectors, the other ones are deleted and the missing chunks are
+        created with a single ``create``. Only kept chunks whose metadata
+        changed are embedded again, from the embedding cache, to update their
+        payload in the stores. Sequences shifted by text inserted or removed
+        before them are updated in one statement, see `_write_chunk_sequences`.
+
+        Args:
+            chunk_specs: List of dicts with the ``sequence``, ``content`` and
+                optionally ``metadata`` of each chunk
+
+        Returns:
+            llm.knowledge.chunk recordset of the chunks, in sequence order
+        """
+        self.ensure_one()
+        Chunk = self.env["llm.knowledge.chunk"]
+        hash_text = self.env["llm.knowledge.embedding.cache"]._hash_text
+
+        reusable = defaultdict(list)
+        for chunk in self.chunk_ids.sorted(lambda c: (c.sequence, c.id)):
+            reusable[chunk.content_hash].append(chunk)
+
+        kept = Chunk
+        sequences = []
+        vals_list = []
+        for spec in chunk_specs:
+            candidates = reusable.get(hash_text(spec["content"]))
+            if not candidates:
+                vals_list.append(dict(spec, resource_id=self.id))
+                continue
+            chunk = candidates.pop(0)
+            if "sequence" in spec and chunk.sequence != spec["sequence"]:
+                sequences.append((chunk.id, spec["sequence"]))
+            updates = {
+                name: value
+                for name, value in spec.items()
+                if name in ("content", "metadata") and chunk[name] != value
+            }
+            if updates:
+                updates["embedded_collection_ids"] = [(5, 0, 0)]
+                chunk.write(updates)
+            kept |= chunk
+        if sequences:
+            self._write_chunk_sequences(sequences)
+
+        stale_ids = [chunk.id for chunks in reusable.values() for chunk in chunks]
+        if stale_ids:
+            Chunk.browse(stale_ids).unlink()
+        created = Chunk.create(vals_list) if vals_list else Chunk
+        return (kept | created).sorted(lambda c: (c.sequence, c.id))
+
+    def _write_chunk_sequences(self, sequences):
+        """Set the sequence of chunks with a single UPDATE
+
+        The stored fields depending on the sequence, such as its copy on the
+        pgvector embeddings, are recomputed as after a ``write``. Chunks are
+        not embedded again, so the payload of external stores keeps the
+        sequence of their last embedding.
+
+        Args:
+            sequences: List of (chunk id, sequence) tuples
+        """
+        Chunk = self.env["llm.knowledge.chunk"]
+        Chunk.flush_model(["sequence"])
+        execute_values(
+            self.env.cr,
+            f"""
+            UPDATE llm_knowledge_chunk AS c
+            SET sequence = v.sequence,
+                write_uid = {int(self.env.uid)},
+                write_date = now() AT TIME ZONE 'UTC'
+            FROM (VALUES %s) AS v(id, sequence)
+            WHERE c.id = v.id
+            """,
+            sequences,
+        )
+        chunks = Chunk.browse([chunk_id for chunk_id, sequence in sequences])
+        chunks.invalidate_recordset(["sequence", "write_uid", "write_date"])
+        chunks.modified(["sequence"])
+
+    def _get_chunk_tokenizer(self):
+        """Tokenizer measuring the chunks of the resource, the one of the
+        embedding model of its first collection"""
+        self.ensure_one()
+        embedding_model = self.collection_ids[:1].embedding_model_id
+        if embedding_model:
+            return embedding_model.get_tokenizer()
+        return estimate_tokenizer
+
+    @api.model
+    def _split_text_default(self, content, chunk_size, chunk_overlap, tokenizer=None):
+        """Split text into chunk specs with a sliding window over its tokens.
+
+        The text is encoded once. Each chunk holds at most ``chunk_size``
+        tokens of the text and repeats the last ``chunk_overlap`` tokens of
+        the previous one, see `split_token_windows`. Chunks end on a sentence
+        or paragraph boundary when one is found in the second half of the
+        window, otherwise on a token boundary.
+
+        Args:
+            content: Text to split
+            chunk_size: Maximum size of the chunks in tokens
+            chunk_overlap: Size of the overlap between chunks in tokens
+            tokenizer: Tokenizer measuring the chunks, see llm_tokenizer
+
+        Returns:
+            List of dicts with the ``sequence`` and ``content`` of each chunk
+        """
+        tokenizer = tokenizer or estimate_tokenizer
+        chunk_size = max(chunk_size, 1)
+        chunk_overlap = max(min(chunk_overlap, chunk_size // 2), 0)
+
+        offsets = tokenizer.token_offsets(content)
+        specs = []
+        for start, end in split_token_windows(
+            len(offsets),
+            sentence_boundaries(content, offsets),
+            chunk_size,
+            chunk_overlap,
+        ):
+            chunk_end = offsets[end] if end < len(offsets) else len(content)
+            chunk_text = content[offsets[start] : chunk_end].strip()
+            if chunk_text:
+                specs.append({"sequence": len(specs) + 1, "content": chunk_text})
+
+        return specs
+
     def _chunk_default(self):
         """
         Default implementation for splitting document into chunks.
-        Uses a simple sentence-based splitting approach.
+        Uses a sentence-aware sliding window over the tokens of the content.
         """
         self.ensure_one()
 
         if not self.content:
             raise UserError(_("No content to chunk"))
 
-        # Delete existing chunks
-        self.chunk_ids.unlink()
-
         # Get chunking parameters
         chunk_size = self.target_chunk_size
         chunk_overlap = min(
             self.target_chunk_overlap, chunk_size // 2
         )  # Ensure overlap is not too large
 
-        # Split content into sentences (simple regex-based approach)
-        # Note: for a more sophisticated approach, consider using a NLP library
-        sentences = re.split(r"(?<=[.!?])\s+", self.content)
-
-        # Function to estimate token count (approximation)
-        def estimate_tokens(text):
-            # Simple approximation: 1 token ≈ 4 characters for English text
-            return len(text) // 4
-
-        # Create chunks using a sliding window approach
-        chunks = []
-        current_chunk = []
-        current_size = 0
-
-        for _i, sentence in enumerate(sentences):
-            sentence_tokens = estimate_tokens(sentence)
-
-            # If a single sentence exceeds chunk size, we have to include it anyway
-            if current_size + sentence_tokens > chunk_size and current_chunk:
-                # Create a chunk from accumulated sentences
-                chunk_text = " ".join(current_chunk)
-                chunk_seq = len(chunks) + 1
-
-                # Create chunk record
-                chunk = self.env["llm.knowledge.chunk"].create(
-                    {
-                        "resource_id": self.id,
-                        "sequence": chunk_seq,
-                        "content": chunk_text,
-                        # Note: No need to set collection_ids as it's a related field
-                    }
-                )
-                chunks.append(chunk)
-
-                # Handle overlap: keep some sentences for the next chunk
-                overlap_tokens = 0
-                overlap_sentences = []
-
-                # Work backwards through current_chunk to build overlap
-                for sent in reversed(current_chunk):
-                    sent_tokens = estimate_tokens(sent)
-                    if overlap_tokens + sent_tokens <= chunk_overlap:
-                        overlap_sentences.insert(0, sent)
-                        overlap_tokens += sent_tokens
-                    else:
-                        break
-
-                # Start new chunk with overlap sentences
-                current_chunk = overlap_sentences
-                current_size = overlap_tokens
-
-            # Add current sentence to the chunk
-            current_chunk.append(sentence)
-            current_size += sentence_tokens
-
-        # Don't forget the last chunk if there's anything left
-        if current_chunk:
-            chunk_text = " ".join(current_chunk)
-            chunk_seq = len(chunks) + 1
-
-            # Create chunk record
-            chunk = self.env["llm.knowledge.chunk"].create(
-                {
-                    "resource_id": self.id,
-                    "sequence": chunk_seq,
-                    "content": chunk_text,
-                    # Note: No need to set collection_ids as it's a related field
-                }
-            )
-            chunks.append(chunk)
+        chunk_specs = self._split_text_default(
+            self.content, chunk_size, chunk_overlap, self._get_chunk_tokenizer()
+        )
+        chunks = self._sync_chunks(chunk_specs)
 
         # Post success message
         self._post_styled_message(
@@ -0,0 +1,62 @@
+"""
+Process wide cache of keyset cursors of chunk vector searches.
+
+List views page through search results with an offset. The (score, chunk
+id) of the last result of each page is kept here, keyed by the search and
+the offset of the next page, so that the next page is fetched after that
+cursor instead of fetching and skipping every previous result again.
+
+Cursors are only shared by the requests of a worker. Searches are keyed by
+the write date of their collections, which moves when they are embedded
+again, so that a page is not fetched after a cursor of previous vectors.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CURSOR_CACHE_SIZE = 512
+DEFAULT_CURSOR_CACHE_TTL = 600
+
+
+class SearchCursorCache:
+    def __init__(
+        self, max_size=DEFAULT_CURSOR_CACHE_SIZE, ttl=DEFAULT_CURSOR_CACHE_TTL
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._cursors = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, search_key, offset):
+        """Return the cursor preceding ``offset`` in a search, if known."""
+        key = (search_key, offset)
+        with self._lock:
+            entry = self._cursors.get(key)
+            if entry is None:
+                return None
+            cursor, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._cursors[key]
+                return None
+            self._cursors.move_to_end(key)
+            return cursor
+
+    def put(self, search_key, offset, cursor):
+        """Remember the cursor preceding ``offset`` in a search."""
+        key = (search_key, offset)
+        with self._lock:
+            self._cursors[key] = (cursor, time.monotonic() + self.ttl)
+            self._cursors.move_to_end(key)
+            while len(self._cursors) > self.max_size:
+                self._cursors.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._cursors.clear()
+
+    def __len__(self):
+        return len(self._cursors)
+
+
+search_cursor_cache = SearchCursorCache()
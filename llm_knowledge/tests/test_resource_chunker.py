@@ -0,0 +1,120 @@
+import random
+
+from odoo.tests import tagged
+from odoo.tests.common import TransactionCase
+
+from odoo.addons.llm.models.llm_tokenizer import estimate_tokenizer
+
+from ..models.llm_resource_chunker import sentence_boundaries, split_token_windows
+
+try:
+    from odoo.addons.llm_openai.models.openai_provider import (
+        _get_tiktoken_tokenizer,
+        tiktoken,
+    )
+except ImportError:
+    tiktoken = None
+
+PROSE = (
+    "Chunks are embedded one by one. Each of them is sent to the model! "
+    "Is the overlap kept between them? It should be, exactly.\n\n"
+) * 40
+MARKDOWN = (
+    "# Title\n\nSome text with **bold** and `code`.\n\n"
+    "- first item\n- second item\n\n"
+    "| Name | Quantity |\n| --- | --- |\n| chair | 12 |\n\n"
+) * 30
+CODE = (
+    "def compute(values):\n    return [value * 2 for value in values if value % 3]\n\n"
+) * 40
+NO_BOUNDARY = "word " * 1500
+UNICODE = "Les élèves étudient l'économie. 東京は日本の首都です。 Ünïcödé ✓ 🚀\n\n" * 40
+
+# (chunk_size, chunk_overlap), the overlap being at most half of the size
+CHUNK_SIZES = ((1, 0), (2, 1), (10, 0), (10, 5), (50, 10), (200, 20), (64, 32))
+
+
+@tagged("post_install", "-at_install")
+class TestResourceChunker(TransactionCase):
+    def _get_tokenizers(self):
+        tokenizers = [estimate_tokenizer]
+        if tiktoken is not None:
+            tokenizers.append(_get_tiktoken_tokenizer("gpt-4o"))
+        return tokenizers
+
+    def _assert_windows(self, windows, token_count, chunk_size, chunk_overlap):
+        self.assertEqual(windows[0][0], 0)
+        self.assertEqual(windows[-1][1], token_count)
+        for start, end in windows:
+            self.assertGreater(end - start, 0)
+            self.assertLessEqual(end - start, chunk_size)
+        for (_start, previous_end), (start, _end) in zip(windows, windows[1:]):
+            self.assertEqual(previous_end - start, chunk_overlap)
+
+    def test_split_token_windows(self):
+        rng = random.Random(42)
+        for _i in range(500):
+            token_count = rng.randint(1, 400)
+            chunk_size = rng.randint(1, 80)
+            chunk_overlap = rng.randint(0, chunk_size // 2)
+            boundaries = sorted(
+                rng.sample(range(token_count + 1), rng.randint(0, token_count))
+            )
+            windows = list(
+                split_token_windows(token_count, boundaries, chunk_size, chunk_overlap)
+            )
+            self._assert_windows(windows, token_count, chunk_size, chunk_overlap)
+
+    def test_split_token_windows_empty(self):
+        self.assertEqual(list(split_token_windows(0, [], 10, 2)), [])
+
+    def _check_split(self, tokenizer, content, chunk_size, chunk_overlap):
+        offsets = tokenizer.token_offsets(content)
+        windows = list(
+            split_token_windows(
+                len(offsets),
+                sentence_boundaries(content, offsets),
+                chunk_size,
+                chunk_overlap,
+            )
+        )
+        self._assert_windows(windows, len(offsets), chunk_size, chunk_overlap)
+
+        # Chunks are the text of the windows, their tokens being the ones of
+        # the whole text
+        offsets.append(len(content))
+        expected = [
+            content[offsets[start] : offsets[end]].strip() for start, end in windows
+        ]
+        specs = self.env["llm.resource"]._split_text_default(
+            content, chunk_size, chunk_overlap, tokenizer
+        )
+        self.assertEqual(
+            [spec["content"] for spec in specs], [text for text in expected if text]
+        )
+        self.assertEqual(
+            [spec["sequence"] for spec in specs], list(range(1, len(specs) + 1))
+        )
+        if tokenizer is estimate_tokenizer:
+            for spec in specs:
+                self.assertLessEqual(tokenizer.count(spec["content"]), chunk_size)
+
+    def test_split_text_default_sizes(self):
+        for tokenizer in self._get_tokenizers():
+            for content in (PROSE, MARKDOWN, CODE, NO_BOUNDARY, UNICODE):
+                for chunk_size, chunk_overlap in CHUNK_SIZES:
+                    with self.subTest(
+                        tokenizer=tokenizer.name,
+                        content=content[:20],
+                        chunk_size=chunk_size,
+                        chunk_overlap=chunk_overlap,
+                    ):
+                        self._check_split(tokenizer, content, chunk_size, chunk_overlap)
+
+    def test_split_text_default_sentence_boundaries(self):
+        """Chunks end on sentences when one keeps them half full"""
+        specs = self.env["llm.resource"]._split_text_default(
+            PROSE, 50, 0, estimate_tokenizer
+        )
+        for spec in specs[:-1]:
+            self.assertIn(spec["content"][-1], ".!?")
@@ -101,9 +101,10 @@ class BaseAutomation(models.Model):
                     }
                 )
 
-                # Process the resource if auto_process is enabled
+                # Queue the resource to be processed once the triggering
+                # transaction is committed, if auto_process is enabled
                 if self.llm_auto_process:
-                    resource.process_resource()
+                    resource._enqueue_pipeline_job()
 
         # For on_write and on_unlink, handle records that no longer match the domain
         if self.trigger in ["on_write", "on_unlink"]:
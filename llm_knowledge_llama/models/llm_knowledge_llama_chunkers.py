@@ -52,9 +52,9 @@ class LLMResourceLlamaChunker(models.Model):
 
         return res
 
-    def _create_chunks_from_nodes(self, nodes, get_extra_metadata=None):
-        """Create chunks from LlamaIndex nodes"""
-        created_chunks = []
+    def _get_chunk_specs_from_nodes(self, nodes, get_extra_metadata=None):
+        """Build chunk specs from LlamaIndex nodes"""
+        chunk_specs = []
         for idx, node in enumerate(nodes, 1):
             metadata = (
                 {
@@ -72,17 +72,22 @@ class LLMResourceLlamaChunker(models.Model):
                 if extra_metadata:
                     metadata.update(extra_metadata)
 
-            chunk = self.env["llm.knowledge.chunk"].create(
+            chunk_specs.append(
                 {
-                    "resource_id": self.id,
                     "sequence": idx,
                     "content": node.text,
                     "metadata": metadata,
                 }
             )
-            created_chunks.append(chunk)
 
-        return created_chunks
+        return chunk_specs
+
+    def _create_chunks_from_nodes(self, nodes, get_extra_metadata=None):
+        """Create chunks from LlamaIndex nodes, keeping the existing chunks
+        whose text is unchanged"""
+        return self._sync_chunks(
+            self._get_chunk_specs_from_nodes(nodes, get_extra_metadata)
+        )
 
     def _finalize_chunking(self, created_chunks, chunker_name, extra_info=""):
         """Finalize chunking process with success message"""
@@ -197,9 +202,6 @@ class LLMResourceLlamaChunker(models.Model):
         if not self.content:
             raise UserError(_("No content to chunk"))
 
-        # Delete existing chunks
-        self.chunk_ids.unlink()
-
         # Create a LlamaIndex document
         return LlamaDocument(
             text=self.content,
@@ -251,8 +253,7 @@ class LLMResourceLlamaChunker(models.Model):
                             success = resource._chunk_default()
 
                     if success:
-                        # Mark as chunked
-                        resource.write({"state": "chunked"})
+                        resource._mark_chunked()
                     else:
                         resource._post_styled_message(
                             "Failed to create chunks - no content or empty result",
@@ -45,7 +45,7 @@ class LLMResourceParser(models.Model):
         mimetype = field["mimetype"]
         if not self.llm_model_id or not self.llm_provider_id:
             raise ValueError("Please select a model and provider.")
-        value = field["rawcontent"]
+        value = self._get_field_rawcontent(field)
         ocr_response = self.llm_provider_id.process_ocr(
             self.llm_model_id.name, value, mimetype
         )
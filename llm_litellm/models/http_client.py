@@ -1,16 +1,21 @@
 import json
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
 
 
 class LiteLLMClient:
     """HTTP client for LiteLLM proxy"""
 
-    def __init__(self, api_key, api_base=None):
+    def __init__(self, api_key, api_base=None, pool_size=None):
         self.api_key = api_key
         self.api_base = api_base or "http://localhost:4000"
         self.session = requests.Session()
+        if pool_size:
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
         self.session.headers.update(
             {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
         )
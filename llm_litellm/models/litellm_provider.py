@@ -33,6 +33,7 @@ class LLMProvider(models.Model):
         return LiteLLMClient(
             api_key=self.api_key,
             api_base=self.api_base,
+            pool_size=self.connection_pool_size,
         )
 
     def litellm_chat(self, messages, model=None, stream=False, **kwargs):
@@ -55,10 +56,17 @@ class LLMProvider(models.Model):
 
     def litellm_embedding(self, texts, model=None):
         """Generate embeddings using LiteLLM proxy"""
+        return self.litellm_get_embedding_function(model)(texts)
+
+    def litellm_get_embedding_function(self, model=None):
         model = self.get_model(model, "embedding")
+        client, model_name = self.client, model.name
+
+        def embed(texts):
+            response = client.create_embeddings(texts=texts, model=model_name)
+            return [data["embedding"] for data in response["data"]]
 
-        response = self.client.create_embeddings(texts=texts, model=model.name)
-        return [data["embedding"] for data in response["data"]]
+        return embed
 
     def litellm_models(self, model_id=None):
         """List available LiteLLM models"""
@@ -1,3 +1,13 @@
 LLM_USER_SUBTYPE_XMLID = "llm_mail_message_subtypes.mt_llm_user"
 LLM_ASSISTANT_SUBTYPE_XMLID = "llm_mail_message_subtypes.mt_llm_assistant"
 LLM_TOOL_RESULT_SUBTYPE_XMLID = "llm_mail_message_subtypes.mt_llm_tool_result"
+
+LLM_USER_ROLE = "user"
+LLM_ASSISTANT_ROLE = "assistant"
+LLM_TOOL_ROLE = "tool"
+
+LLM_SUBTYPE_ROLES = {
+    LLM_USER_SUBTYPE_XMLID: LLM_USER_ROLE,
+    LLM_ASSISTANT_SUBTYPE_XMLID: LLM_ASSISTANT_ROLE,
+    LLM_TOOL_RESULT_SUBTYPE_XMLID: LLM_TOOL_ROLE,
+}
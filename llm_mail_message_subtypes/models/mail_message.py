@@ -1,11 +1,12 @@
 import logging
 
-from odoo import api, models
+from odoo import api, models, tools
 
 from ..const import (
-    LLM_ASSISTANT_SUBTYPE_XMLID,
-    LLM_TOOL_RESULT_SUBTYPE_XMLID,
-    LLM_USER_SUBTYPE_XMLID,
+    LLM_ASSISTANT_ROLE,
+    LLM_SUBTYPE_ROLES,
+    LLM_TOOL_ROLE,
+    LLM_USER_ROLE,
 )
 
 _logger = logging.getLogger(__name__)
@@ -19,28 +20,55 @@ class MailMessageLLMSubtypes(models.Model):
         return ["subtype_id"]
 
     @api.model
-    def _get_llm_subtype_data(self):
+    @tools.ormcache()
+    def _get_llm_subtype_xmlid_map(self):
         """
-        Helper to get the database IDs and XML IDs of the core LLM subtypes.
+        Database ID to XML ID of the core LLM subtypes.
+
+        Cached per registry, the cache is cleared whenever the registry caches
+        are (e.g. on module install or update).
         Returns:
-            tuple: (set_of_llm_subtype_ids, dict_mapping_id_to_xmlid)
+            dict: {subtype_id: xmlid}
         """
-        ids = set()
         id_to_xmlid = {}
-        subtype_xml_ids = [
-            LLM_USER_SUBTYPE_XMLID,
-            LLM_ASSISTANT_SUBTYPE_XMLID,
-            LLM_TOOL_RESULT_SUBTYPE_XMLID,
-        ]
-        for xmlid in subtype_xml_ids:
+        for xmlid in LLM_SUBTYPE_ROLES:
             res_id = self.env["ir.model.data"]._xmlid_to_res_id(
                 xmlid, raise_if_not_found=True
             )
             if isinstance(res_id, int):
-                ids.add(res_id)
                 id_to_xmlid[res_id] = xmlid
+        return id_to_xmlid
 
-        return ids, id_to_xmlid
+    @api.model
+    def _get_llm_subtype_data(self):
+        """
+        Helper to get the database IDs and XML IDs of the core LLM subtypes.
+        Returns:
+            tuple: (set_of_llm_subtype_ids, dict_mapping_id_to_xmlid)
+        """
+        id_to_xmlid = dict(self._get_llm_subtype_xmlid_map())
+        return set(id_to_xmlid), id_to_xmlid
+
+    def _get_llm_roles(self):
+        """
+        Classify messages in one pass from their subtype.
+        Returns:
+            dict: {message_id: "user" | "assistant" | "tool" | None}
+        """
+        id_to_xmlid = self._get_llm_subtype_xmlid_map()
+        return {
+            message.id: LLM_SUBTYPE_ROLES.get(id_to_xmlid.get(message.subtype_id.id))
+            for message in self
+        }
+
+    def _get_llm_role(self):
+        """Role of the message, None for an empty recordset or a message
+        which is not an LLM one"""
+        if not self:
+            return None
+        return LLM_SUBTYPE_ROLES.get(
+            self._get_llm_subtype_xmlid_map().get(self.subtype_id.id)
+        )
 
     # Override message_format to add llm related fields for frontend formatting
     def message_format(self, format_reply=True):
@@ -84,10 +112,10 @@ class MailMessageLLMSubtypes(models.Model):
         return vals_list
 
     def is_llm_user_message(self):
-        return self.subtype_id == self.env.ref(LLM_USER_SUBTYPE_XMLID)
+        return self._get_llm_role() == LLM_USER_ROLE
 
     def is_llm_assistant_message(self):
-        return self.subtype_id == self.env.ref(LLM_ASSISTANT_SUBTYPE_XMLID)
+        return self._get_llm_role() == LLM_ASSISTANT_ROLE
 
     def is_llm_tool_result_message(self):
-        return self.subtype_id == self.env.ref(LLM_TOOL_RESULT_SUBTYPE_XMLID)
+        return self._get_llm_role() == LLM_TOOL_ROLE
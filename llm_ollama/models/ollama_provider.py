@@ -3,6 +3,7 @@ import json
 import logging
 import uuid
 
+import httpx
 import ollama
 
 from odoo import api, models
@@ -12,6 +13,9 @@ from ..utils.ollama_tool_call_id_utils import OllamaToolCallIdUtils
 
 _logger = logging.getLogger(__name__)
 
+# Bump when ollama_format_message output changes to invalidate cached payloads
+OLLAMA_MESSAGE_FORMAT_VERSION = 1
+
 
 class LLMProvider(models.Model):
     _inherit = "llm.provider"
@@ -23,7 +27,14 @@ class LLMProvider(models.Model):
 
     def ollama_get_client(self):
         """Get Ollama client instance"""
-        return ollama.Client(host=self.api_base or "http://localhost:11434")
+        pool_size = self.connection_pool_size or None
+        return ollama.Client(
+            host=self.api_base or "http://localhost:11434",
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+            ),
+        )
 
     # Ollama specific implementation
     def ollama_format_tools(self, tools):
@@ -280,18 +291,25 @@ class LLMProvider(models.Model):
 
     def ollama_embedding(self, texts, model=None):
         """Generate embeddings using Ollama"""
+        return self.ollama_get_embedding_function(model)(texts)
+
+    def ollama_get_embedding_function(self, model=None):
         model = self.get_model(model, "embedding")
+        client, model_name = self.client, model.name
+
+        def embed(texts):
+            # Ensure texts is a list
+            if isinstance(texts, str):
+                texts = [texts]
 
-        # Ensure texts is a list
-        if isinstance(texts, str):
-            texts = [texts]
+            # Get embeddings for each text
+            embeddings = []
+            for text in texts:
+                response = client.embed(model=model_name, input=[text])
+                embeddings.append(response["embeddings"][0])
+            return embeddings
 
-        # Get embeddings for each text
-        embeddings = []
-        for text in texts:
-            response = self.client.embed(model=model.name, input=[text])
-            embeddings.append(response["embeddings"][0])
-        return embeddings
+        return embed
 
     def ollama_models(self, model_id=None):
         """List available Ollama models"""
@@ -350,9 +368,10 @@ class LLMProvider(models.Model):
         if system_prompt:
             formatted_messages.append({"role": "system", "content": system_prompt})
 
-        # Add all other messages, properly formatted
-        for message in messages:
-            formatted_msg = self._dispatch("format_message", record=message)
+        # Add all other messages, properly formatted, reusing cached payloads
+        for formatted_msg in self._format_messages_cached(
+            messages, "ollama", OLLAMA_MESSAGE_FORMAT_VERSION
+        ):
             if formatted_msg is not None:
                 formatted_messages.append(formatted_msg)
 
@@ -11,7 +11,7 @@
     "version": "16.0.1.1.2",
     "depends": ["llm", "llm_tool", "llm_mail_message_subtypes"],
     "external_dependencies": {
-        "python": ["openai"],
+        "python": ["openai", "httpx"],
     },
     "data": [
         "data/llm_publisher.xml",
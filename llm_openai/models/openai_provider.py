@@ -1,15 +1,52 @@
+import functools
 import json
 import logging
 import uuid
 
+import httpx
 from openai import OpenAI
 
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
 from odoo import api, models
 
+from odoo.addons.llm.models.llm_tokenizer import estimate_tokenizer
+
 from ..utils.openai_message_validator import OpenAIMessageValidator
 
 _logger = logging.getLogger(__name__)
 
+# Bump when openai_format_message output changes to invalidate cached payloads
+OPENAI_MESSAGE_FORMAT_VERSION = 1
+
+
+class TiktokenTokenizer:
+    """Tokenizer of a tiktoken encoding, see llm.models.llm_tokenizer"""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        self.name = f"tiktoken:{encoding.name}"
+
+    def count(self, text):
+        return len(self.encoding.encode(text or "", disallowed_special=()))
+
+    def token_offsets(self, text):
+        tokens = self.encoding.encode(text or "", disallowed_special=())
+        return self.encoding.decode_with_offsets(tokens)[1]
+
+
+@functools.lru_cache(maxsize=32)
+def _get_tiktoken_tokenizer(model_name):
+    """Return the (cached) tokenizer of a model's tiktoken encoding"""
+    try:
+        encoding = tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        encoding = tiktoken.get_encoding("cl100k_base")
+    return TiktokenTokenizer(encoding)
+
 
 class LLMProvider(models.Model):
     _inherit = "llm.provider"
@@ -21,7 +58,23 @@ class LLMProvider(models.Model):
 
     def openai_get_client(self):
         """Get OpenAI client instance"""
-        return OpenAI(api_key=self.api_key, base_url=self.api_base or None)
+        pool_size = self.connection_pool_size or None
+        return OpenAI(
+            api_key=self.api_key,
+            base_url=self.api_base or None,
+            http_client=httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=pool_size,
+                    max_keepalive_connections=pool_size,
+                )
+            ),
+        )
+
+    def openai_get_tokenizer(self, model=None):
+        """Tokenizer of the model's tiktoken encoding, if tiktoken is installed"""
+        if tiktoken is None:
+            return estimate_tokenizer
+        return _get_tiktoken_tokenizer(model.name if model else "gpt-4o")
 
     # OpenAI specific implementation
     def openai_format_tools(self, tools):
@@ -300,10 +353,17 @@ class LLMProvider(models.Model):
 
     def openai_embedding(self, texts, model=None):
         """Generate embeddings using OpenAI"""
+        return self.openai_get_embedding_function(model)(texts)
+
+    def openai_get_embedding_function(self, model=None):
         model = self.get_model(model, "embedding")
+        client, model_name = self.client, model.name
+
+        def embed(texts):
+            response = client.embeddings.create(model=model_name, input=texts)
+            return [r.embedding for r in response.data]
 
-        response = self.client.embeddings.create(model=model.name, input=texts)
-        return [r.embedding for r in response.data]
+        return embed
 
     def openai_models(self, model_id=None):
         """List available OpenAI models"""
@@ -370,9 +430,10 @@ class LLMProvider(models.Model):
         if system_prompt:
             formatted_messages.append({"role": "system", "content": system_prompt})
 
-        # Format the rest of the messages
-        for message in messages:
-            formatted_message = self._dispatch("format_message", record=message)
+        # Format the rest of the messages, reusing cached payloads
+        for formatted_message in self._format_messages_cached(
+            messages, "openai", OPENAI_MESSAGE_FORMAT_VERSION
+        ):
             if formatted_message:
                 formatted_messages.append(formatted_message)
 
@@ -0,0 +1,116 @@
+"""
+Benchmark of the ingestion of embeddings in the pgvector store.
+
+Creates ``--vectors`` chunks and times the storage of random embeddings of
+``--dimensions`` dimensions for them, by batches of ``--batch`` as the
+embedding pipeline does, through:
+
+- ``_replace_embeddings``: ORM delete and create of the embeddings
+- ``_upsert_embeddings``: single INSERT ... ON CONFLICT DO UPDATE
+
+each once on chunks without embeddings and once on chunks embedded already.
+The vector indexes are left untouched. Nothing is committed.
+
+Usage:
+    python3 llm_pgvector/benchmarks/bench_bulk_upsert.py -c odoo.conf -d db \\
+        [--vectors 100000] [--dimensions 1536] [--batch 1000]
+"""
+
+import argparse
+import time
+
+import numpy
+
+import odoo
+from odoo import SUPERUSER_ID, api
+
+from odoo.addons.llm_pgvector.models.llm_store_pgvector import HALF_COLUMN
+
+
+def create_chunks(env, count):
+    resource = env["llm.resource"].create(
+        {
+            "name": "Ingestion benchmark",
+            "model_id": env["ir.model"]._get_id("res.partner"),
+            "res_id": env.user.partner_id.id,
+        }
+    )
+    chunk_ids = []
+    for start in range(0, count, 10000):
+        chunks = env["llm.knowledge.chunk"].create(
+            [
+                {
+                    "resource_id": resource.id,
+                    "sequence": index + 1,
+                    "content": f"Chunk {index}",
+                }
+                for index in range(start, min(start + 10000, count))
+            ]
+        )
+        chunk_ids.extend(chunks.ids)
+    env.flush_all()
+    return chunk_ids
+
+
+def ingest(env, method, embedding_model_id, chunk_ids, dimensions, batch):
+    rng = numpy.random.default_rng(42)
+    start = time.perf_counter()
+    for index in range(0, len(chunk_ids), batch):
+        ids = chunk_ids[index : index + batch]
+        vectors = rng.random((len(ids), dimensions), dtype=numpy.float32)
+        method(embedding_model_id, ids, list(vectors))
+        env.flush_all()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-c", "--config")
+    parser.add_argument("-d", "--database", required=True)
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    odoo.tools.config.parse_config(["-c", args.config] if args.config else [])
+    registry = odoo.registry(args.database)
+
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        store = env["llm.store"].search([("service", "=", "pgvector")], limit=1)
+        embedding_model = env["llm.model"].search(
+            [("model_use", "=", "embedding")], limit=1
+        )
+        if not store or not embedding_model:
+            raise SystemExit("A pgvector store and an embedding model are needed")
+        chunk_ids = create_chunks(env, args.vectors)
+        Embedding = env["llm.knowledge.chunk.embedding"]
+        domain = [("chunk_id", "in", chunk_ids)]
+
+        methods = [("upsert", store._upsert_embeddings)]
+        # The float16 column is unknown to the ORM
+        if store._get_storage_column() != HALF_COLUMN:
+            methods.insert(0, ("replace", store._replace_embeddings))
+        for name, method in methods:
+            for label in ("insert", "update"):
+                duration = ingest(
+                    env,
+                    method,
+                    embedding_model.id,
+                    chunk_ids,
+                    args.dimensions,
+                    args.batch,
+                )
+                print(
+                    f"{name:>7} {label}: {args.vectors} vectors in "
+                    f"{duration:.1f}s, {args.vectors / duration:.0f} vectors/s"
+                )
+            Embedding.search(domain).unlink()
+            env.flush_all()
+        cr.rollback()
+
+
+if __name__ == "__main__":
+    main()
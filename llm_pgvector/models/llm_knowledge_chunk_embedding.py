@@ -46,6 +46,25 @@ class LLMKnowledgeChunkEmbedding(models.Model):
         readonly=True,
         index=True,
     )
+    # Chunk data copied on the embedding so that vector searches can be
+    # filtered in the same query, without joins
+    res_model = fields.Char(
+        related="chunk_id.resource_id.res_model",
+        store=True,
+        readonly=True,
+        index=True,
+    )
+    chunk_sequence = fields.Integer(
+        related="chunk_id.sequence",
+        store=True,
+        readonly=True,
+        index=True,
+    )
+    chunk_metadata = fields.Json(
+        related="chunk_id.metadata",
+        store=True,
+        readonly=True,
+    )
 
     _sql_constraints = [
         (
@@ -55,6 +74,14 @@ class LLMKnowledgeChunkEmbedding(models.Model):
         ),
     ]
 
+    def init(self):
+        self.env.cr.execute(
+            """
+            CREATE INDEX IF NOT EXISTS llm_knowledge_chunk_embedding_chunk_metadata_idx
+            ON llm_knowledge_chunk_embedding USING gin (chunk_metadata jsonb_path_ops)
+            """
+        )
+
     def name_get(self):
         """Override to provide a better display name"""
         result = []
@@ -1,13 +1,53 @@
+import json
 import logging
+import math
+from contextlib import contextmanager
+from functools import partial
 
 from pgvector import Vector
 from pgvector.psycopg2 import register_vector
+from psycopg2.extras import execute_values
 
-from odoo import _, api, fields, models
-from odoo.exceptions import UserError
+from odoo import _, api, fields, models, tools
+from odoo.exceptions import UserError, ValidationError
+from odoo.osv import expression
+
+from odoo.addons.llm_knowledge.models.llm_knowledge_chunk import (
+    FULLTEXT_CONFIG,
+    HYBRID_CANDIDATE_FACTOR,
+)
 
 _logger = logging.getLogger(__name__)
 
+# Column holding the embeddings of each storage format. The float16 column
+# is not an ORM field, see _ensure_half_column
+HALF_COLUMN = "embedding_half"
+STORAGE_COLUMNS = {
+    "vector": "embedding",
+    "halfvec": HALF_COLUMN,
+    "bit": HALF_COLUMN,
+}
+STORAGE_MIGRATION_BATCH_SIZE = 5000
+
+# Chunk fields with a copy on the embedding table, usable in search filters
+FILTER_COLUMNS = {
+    "id": "chunk_id",
+    "resource_id": "resource_id",
+    "resource_id.res_model": "res_model",
+    "sequence": "chunk_sequence",
+}
+FILTER_OPERATORS = ("=", "!=", "<", "<=", ">", ">=")
+
+# Default and largest hnsw.ef_search of pgvector
+HNSW_DEFAULT_EF_SEARCH = 40
+HNSW_MAX_EF_SEARCH = 1000
+# Default number of lists of IVFFlat indexes built without the lists option
+IVFFLAT_DEFAULT_LISTS = 100
+
+# (database name, index name) of the vector indexes known to exist in this
+# worker, see _vector_index_exists
+known_vector_indexes = set()
+
 
 class LLMStorePgVector(models.Model):
     _inherit = "llm.store"
@@ -28,6 +68,76 @@ class LLMStorePgVector(models.Model):
         default="ivfflat",
         help="The index method to use for vector search",
     )
+    pgvector_storage_format = fields.Selection(
+        [
+            ("vector", "Float32 (vector)"),
+            ("halfvec", "Float16 (halfvec)"),
+            ("bit", "Binary quantized (bit) with re-ranking"),
+        ],
+        string="Storage Format",
+        default="vector",
+        help="How embeddings are stored and indexed. halfvec halves the size "
+        "of embeddings and indexes. bit indexes a binary quantization of the "
+        "float16 embeddings, 32 times smaller than float32, and re-ranks the "
+        "candidates with their float16 distance. halfvec and bit require "
+        "pgvector 0.7. After changing it, use 'Migrate Storage' to convert "
+        "existing embeddings.",
+    )
+    pgvector_rerank_factor = fields.Integer(
+        string="Re-ranking Factor",
+        default=10,
+        help="With binary quantization, number of candidates fetched from the "
+        "index per requested result before re-ranking",
+    )
+    pgvector_bulk_insert = fields.Boolean(
+        string="Bulk Insert",
+        default=True,
+        help="Upsert embeddings with a single SQL statement per batch instead "
+        "of deleting and recreating them through the ORM",
+    )
+    pgvector_index_min_rows = fields.Integer(
+        string="Minimum Rows for Index",
+        default=1000,
+        help="The vector index of an embedding model is only built once it "
+        "has this many embeddings. Below that, searches scan the table, "
+        "which is exact and fast enough.",
+    )
+    pgvector_ivfflat_lists = fields.Integer(
+        string="IVFFlat Lists",
+        help="Number of inverted lists of IVFFlat indexes. When empty, it is "
+        "derived from the number of embeddings when the index is built.",
+    )
+    pgvector_ivfflat_probes = fields.Integer(
+        string="IVFFlat Probes",
+        help="Lists scanned by a search (ivfflat.probes). Higher values "
+        "improve recall at the cost of latency. Empty uses the pgvector default.",
+    )
+    pgvector_hnsw_m = fields.Integer(
+        string="HNSW M",
+        default=16,
+        help="Maximum number of connections per layer of HNSW indexes",
+    )
+    pgvector_hnsw_ef_construction = fields.Integer(
+        string="HNSW ef_construction",
+        default=64,
+        help="Size of the candidate list used to build HNSW indexes",
+    )
+    pgvector_hnsw_ef_search = fields.Integer(
+        string="HNSW ef_search",
+        help="Size of the candidate list of a search (hnsw.ef_search). Higher "
+        "values improve recall at the cost of latency. Empty uses the "
+        "pgvector default.",
+    )
+    pgvector_exact_filter_rows = fields.Integer(
+        string="Exact Filtered Search Rows",
+        default=10000,
+        help="Index scans filter the nearest embeddings they found, so a "
+        "selective filter can leave fewer results than requested. Filtered "
+        "searches matching at most this many embeddings compute the distance "
+        "of each of them instead, which is exact and fast at that size. "
+        "Larger ones scan the index deeper, which costs latency. 0 always "
+        "uses the index.",
+    )
 
     # -------------------------------------------------------------------------
     # Store Interface Implementation
@@ -129,33 +239,99 @@ class LLMStorePgVector(models.Model):
         # Get the embedding model
         embedding_model_id = collection.embedding_model_id.id
 
+        # The float16 column is unknown to the ORM
+        if self.pgvector_bulk_insert or self._get_storage_column() == HALF_COLUMN:
+            self._upsert_embeddings(embedding_model_id, ids, vectors)
+        else:
+            self._replace_embeddings(embedding_model_id, ids, vectors)
+
+        # Make sure the index exists
+        self._create_vector_index(embedding_model_id)
+
+    def _replace_embeddings(self, embedding_model_id, chunk_ids, vectors):
+        """Delete then recreate the embeddings of the chunks through the ORM"""
+        Embedding = self.env["llm.knowledge.chunk.embedding"]
+
         # First, delete any existing embeddings for these chunks with this embedding model
         # This handles the update case by replacing existing embeddings
-        if ids:
-            self.env["llm.knowledge.chunk.embedding"].search(
-                [
-                    ("chunk_id", "in", ids),
-                    ("embedding_model_id", "=", embedding_model_id),
-                ]
-            ).unlink()
+        Embedding.search(
+            [
+                ("chunk_id", "in", chunk_ids),
+                ("embedding_model_id", "=", embedding_model_id),
+            ]
+        ).unlink()
 
         # Prepare values for batch creation
+        column = self._get_storage_column()
         vals_list = []
-        for chunk_id, vector in zip(ids, vectors):  # noqa: B905
+        for chunk_id, vector in zip(chunk_ids, vectors):  # noqa: B905
             vals_list.append(
                 {
                     "chunk_id": chunk_id,
                     "embedding_model_id": embedding_model_id,
-                    "embedding": vector,
+                    column: vector,
                 }
             )
 
         # Batch create all embeddings in a single operation
         if vals_list:
-            self.env["llm.knowledge.chunk.embedding"].create(vals_list)
+            Embedding.create(vals_list)
 
-        # Make sure the index exists
-        self._create_vector_index(embedding_model_id)
+    def _upsert_embeddings(self, embedding_model_id, chunk_ids, vectors):
+        """Insert or update the embeddings of the chunks in one statement
+
+        Bypasses the ORM: vectors are sent in pgvector text format, the stored
+        related fields are taken from the chunk and resource in SQL, and
+        existing embeddings are updated in place instead of deleted and
+        recreated.
+        """
+        rows = [
+            (chunk_id, Vector._to_db(vector))
+            for chunk_id, vector in zip(chunk_ids, vectors)  # noqa: B905
+            if vector is not None
+        ]
+        if not rows:
+            return
+        self.env["llm.knowledge.chunk"].flush_model(
+            ["resource_id", "sequence", "metadata"]
+        )
+        self.env["llm.resource"].flush_model(["res_model"])
+        uid = self.env.uid
+        column = self._get_storage_column()
+        vector_type = "vector" if column == "embedding" else "halfvec"
+        other_column = "embedding" if column == HALF_COLUMN else None
+        if not other_column and self._half_column_exists():
+            other_column = HALF_COLUMN
+        clear_other = f"{other_column} = NULL," if other_column else ""
+        execute_values(
+            self.env.cr,
+            f"""
+            INSERT INTO llm_knowledge_chunk_embedding
+                (chunk_id, embedding_model_id, {column}, resource_id,
+                 res_model, chunk_sequence, chunk_metadata,
+                 create_uid, create_date, write_uid, write_date)
+            SELECT v.chunk_id, {int(embedding_model_id)}, v.embedding::{vector_type},
+                c.resource_id, r.res_model, c.sequence, c.metadata,
+                {int(uid)}, now() AT TIME ZONE 'UTC',
+                {int(uid)}, now() AT TIME ZONE 'UTC'
+            FROM (VALUES %s) AS v(chunk_id, embedding)
+            JOIN llm_knowledge_chunk c ON c.id = v.chunk_id
+            JOIN llm_resource r ON r.id = c.resource_id
+            ON CONFLICT (chunk_id, embedding_model_id) DO UPDATE
+            SET {column} = EXCLUDED.{column},
+                {clear_other}
+                resource_id = EXCLUDED.resource_id,
+                res_model = EXCLUDED.res_model,
+                chunk_sequence = EXCLUDED.chunk_sequence,
+                chunk_metadata = EXCLUDED.chunk_metadata,
+                write_uid = EXCLUDED.write_uid,
+                write_date = EXCLUDED.write_date
+            """,
+            rows,
+            template="(%s::integer, %s)",
+            page_size=1000,
+        )
+        self.env["llm.knowledge.chunk.embedding"].invalidate_model()
 
     def pgvector_delete_vectors(self, collection_id, ids, **kwargs):
         """Delete vectors (embeddings) for specified chunk IDs"""
@@ -193,6 +369,16 @@ class LLMStorePgVector(models.Model):
 
         return True
 
+    def _supports_hybrid_search(self):
+        return self.service == "pgvector" or super()._supports_hybrid_search()
+
+    def _supports_keyset_search(self):
+        # Binary quantized searches re-rank a window of candidates counted
+        # from the best match, which a cursor cannot skip
+        if self.service == "pgvector":
+            return self.pgvector_storage_format != "bit"
+        return super()._supports_keyset_search()
+
     def pgvector_search_vectors(
         self,
         collection_id,
@@ -202,20 +388,86 @@ class LLMStorePgVector(models.Model):
         offset=0,
         query_operator="<=>",
         min_similarity=0.5,
+        **kwargs,
     ):
         """
         Search for similar vectors in the collection
 
+        Returns:
+            list of dicts with 'id', 'score', and 'metadata'
+        """
+        return self.pgvector_search_vectors_multi(
+            [collection_id],
+            query_vector,
+            limit=limit,
+            filter=filter,
+            offset=offset,
+            query_operator=query_operator,
+            min_similarity=min_similarity,
+            **kwargs,
+        )
+
+    def pgvector_search_vectors_multi(
+        self,
+        collection_ids,
+        query_vector,
+        limit=10,
+        filter=None,
+        offset=0,
+        query_operator="<=>",
+        min_similarity=0.5,
+        probes=None,
+        ef_search=None,
+        query_text=None,
+        search_mode="vector",
+        vector_weight=1.0,
+        lexical_weight=1.0,
+        rrf_k=60,
+        search_after=None,
+        search_depth=0,
+        **kwargs,
+    ):
+        """
+        Search for similar vectors in collections sharing an embedding model,
+        with a single query.
+
+        A chunk belonging to several of the collections is returned once.
+        ``filter`` is a domain on llm.knowledge.chunk applied in the same
+        query, see _get_filter_sql, selective filters being searched exactly,
+        see _get_filter_selectivity. ``probes`` and ``ef_search`` override
+        the store settings of the IVFFlat and HNSW index scans for this
+        search. With a ``search_mode`` of hybrid or lexical, the full-text
+        matches of ``query_text`` are fused with the vector results, see
+        _get_hybrid_search_sql. ``search_after`` is a (score, chunk id)
+        cursor of a vector search, only results ranked after it are returned,
+        and ``search_depth`` the number of results ranked before it, which
+        the index scan must reach past, see _get_search_settings.
+
         Returns:
             list of dicts with 'id', 'score', and 'metadata'
         """
         self.ensure_one()
 
-        collection = self.env["llm.knowledge.collection"].browse(collection_id)
-        if not collection.exists() or not collection.embedding_model_id:
+        collections = (
+            self.env["llm.knowledge.collection"].browse(collection_ids).exists()
+        )
+        embedding_models = collections.mapped("embedding_model_id")
+        if not embedding_models:
             return []
+        if len(embedding_models) > 1:
+            raise UserError(
+                _("Collections searched together must share their embedding model")
+            )
+        embedding_model_id = embedding_models.id
 
-        embedding_model_id = collection.embedding_model_id.id
+        storage_format = self.pgvector_storage_format or "vector"
+        column = f"e.{self._get_storage_column()}"
+        vector_type = "vector" if storage_format == "vector" else "halfvec"
+
+        # The distance must be computed on the indexed expression for the
+        # vector index to be used
+        dimensions = embedding_models.embedding_dimension
+        index_expr, _opclass = self._get_index_expression(dimensions, prefix="e.")
 
         # Format the query vector using pgvector's Vector class
         register_vector(self.env.cr._cnx)
@@ -227,46 +479,318 @@ class LLMStorePgVector(models.Model):
         )
         index_hint = f"/*+ IndexScan(llm_knowledge_chunk_embedding {index_name}) */"
 
-        # Execute the query to find similar vectors
-        # Join to llm_knowledge_chunk_embedding instead of directly using chunks
-        query = f"""
-            WITH query_vector AS (
-                SELECT '{vector_str}'::vector AS vec
+        # The collection membership is a semi-join so that a chunk shared by
+        # several collections is not duplicated, and each chunk is ranked
+        # once by its distance then id
+        where_clause = f"""
+            e.embedding_model_id = %s
+            AND {column} IS NOT NULL
+            AND EXISTS (
+                SELECT 1 FROM llm_knowledge_resource_collection_rel rel
+                WHERE rel.resource_id = e.resource_id
+                AND rel.collection_id = ANY(%s)
             )
-            SELECT {index_hint} e.chunk_id, 1 - (e.embedding {query_operator} query_vector.vec) as score
-            FROM llm_knowledge_chunk_embedding e
-            JOIN llm_knowledge_chunk c ON e.chunk_id = c.id
-            JOIN llm_knowledge_resource_collection_rel rel ON c.resource_id = rel.resource_id
-            CROSS JOIN query_vector
-            WHERE rel.collection_id = %s
-            AND e.embedding_model_id = %s
-            AND e.embedding IS NOT NULL
-            AND (1 - (e.embedding {query_operator} query_vector.vec)) >= %s
-            ORDER BY score DESC
-            LIMIT %s
-            OFFSET %s
         """
+        where_params = [embedding_model_id, collections.ids]
+        exact_filter, selectivity = False, 1.0
+        if filter:
+            filter_sql, filter_params = self._get_filter_sql(filter)
+            where_clause += f" AND {filter_sql}"
+            where_params += filter_params
+            exact_filter, selectivity = self._get_filter_selectivity(
+                where_clause, where_params, index_name
+            )
 
-        self.env.cr.execute(
-            query, (collection_id, embedding_model_id, min_similarity, limit, offset)
-        )
-        results = self.env.cr.fetchall()
+        hybrid = search_mode in ("hybrid", "lexical") and bool(query_text)
+        if hybrid:
+            # Each ranking contributes candidates, fused and paginated after
+            vector_limit = (
+                (limit + (offset or 0)) * HYBRID_CANDIDATE_FACTOR if limit else None
+            )
+            vector_offset = 0
+        else:
+            vector_limit, vector_offset = limit, offset
+
+        if storage_format == "bit":
+            # Fetch candidates by Hamming distance on the quantized index,
+            # then re-rank them with the float16 distance
+            candidate_limit = (
+                (vector_limit + (vector_offset or 0))
+                * max(self.pgvector_rerank_factor or 1, 1)
+                if vector_limit
+                else None
+            )
+            settings, exact = self._get_search_settings(
+                probes=probes,
+                ef_search=ef_search,
+                depth=candidate_limit or 0,
+                index_name=index_name,
+                selectivity=selectivity,
+            )
+            exact = exact or exact_filter
+            quantized_expr = f"binary_quantize({column})" if exact else index_expr
+            if exact:
+                index_hint = ""
+            distance_expr = f"(c.{HALF_COLUMN} {query_operator} query_vector.vec)"
+            query = f"""
+                WITH query_vector AS (
+                    SELECT '{vector_str}'::halfvec AS vec
+                ),
+                candidates AS (
+                    SELECT {index_hint} e.chunk_id, e.{HALF_COLUMN}, e.chunk_metadata
+                    FROM llm_knowledge_chunk_embedding e
+                    CROSS JOIN query_vector
+                    WHERE {where_clause}
+                    ORDER BY {quantized_expr} <~> binary_quantize(query_vector.vec)
+                    LIMIT %s
+                )
+                SELECT c.chunk_id, 1 - {distance_expr} as score, c.chunk_metadata
+                FROM candidates c
+                CROSS JOIN query_vector
+                WHERE (1 - {distance_expr}) >= %s
+                ORDER BY {distance_expr}
+                LIMIT %s
+                OFFSET %s
+            """
+            params = where_params + [
+                candidate_limit,
+                min_similarity,
+                vector_limit,
+                vector_offset,
+            ]
+        else:
+            depth = vector_limit and (
+                (search_depth or 0) + (vector_offset or 0) + vector_limit
+            )
+            settings, exact = self._get_search_settings(
+                probes=probes,
+                ef_search=ef_search,
+                depth=depth or 0,
+                index_name=index_name,
+                selectivity=selectivity,
+            )
+            exact = exact or exact_filter
+            # The distance of the column itself is not served by the index,
+            # so that the table is scanned exactly
+            distance_expr = (
+                f"({column} {query_operator} query_vector.vec)"
+                if exact
+                else f"({index_expr} {query_operator} query_vector.vec)"
+            )
+            if exact:
+                index_hint = ""
+            keyset_clause = ""
+            keyset_params = []
+            if search_after and not hybrid:
+                # Compared on the returned score expression so that the
+                # cursor row itself is excluded despite float rounding
+                keyset_clause = f"""
+                    AND (
+                        (1 - {distance_expr}) < %s
+                        OR ((1 - {distance_expr}) = %s AND e.chunk_id > %s)
+                    )
+                """
+                score, chunk_id = search_after
+                keyset_params = [score, score, chunk_id]
+            query = f"""
+                WITH query_vector AS (
+                    SELECT '{vector_str}'::{vector_type} AS vec
+                )
+                SELECT {index_hint} e.chunk_id, 1 - {distance_expr} as score,
+                    e.chunk_metadata
+                FROM llm_knowledge_chunk_embedding e
+                CROSS JOIN query_vector
+                WHERE {where_clause}
+                AND (1 - {distance_expr}) >= %s
+                {keyset_clause}
+                ORDER BY {distance_expr}, e.chunk_id
+                LIMIT %s
+                OFFSET %s
+            """
+            params = where_params + [min_similarity]
+            params += keyset_params + [vector_limit, vector_offset]
+
+        if hybrid:
+            query, params = self._get_hybrid_search_sql(
+                query,
+                params,
+                where_clause,
+                where_params,
+                query_text,
+                candidate_limit=vector_limit,
+                vector_weight=vector_weight if search_mode == "hybrid" else 0.0,
+                lexical_weight=lexical_weight,
+                rrf_k=rrf_k,
+                limit=limit,
+                offset=offset,
+            )
+
+        with self._search_settings(settings):
+            self.env.cr.execute(query, params)
+            results = self.env.cr.fetchall()
 
         # Format results with chunk IDs as the main identifiers
-        formatted_results = []
-        chunk_ids = []
+        return [
+            {
+                "id": chunk_id,
+                "score": score,
+                "metadata": metadata or {},
+            }
+            for chunk_id, score, metadata in results
+        ]
+
+    def _get_hybrid_search_sql(
+        self,
+        vector_query,
+        vector_params,
+        where_clause,
+        where_params,
+        query_text,
+        candidate_limit,
+        vector_weight,
+        lexical_weight,
+        rrf_k,
+        limit,
+        offset,
+    ):
+        """Fuse a vector search query with a full-text ranking of the chunks
 
-        for chunk_id, score in results:
-            chunk_ids.append(chunk_id)
-            formatted_results.append(
-                {
-                    "id": chunk_id,
-                    "score": score,
-                    "metadata": {},  # We don't store additional metadata currently
-                }
+        The chunks matching ``query_text`` on the full-text index of their
+        content are ranked by ts_rank_cd, and each chunk scores the sum of
+        weight / (rrf_k + rank) over the rankings it appears in (reciprocal
+        rank fusion). Scores are divided by their maximum, so they stay
+        between 0 and 1, but are not comparable to similarities. The vector
+        query is ranked after its similarity threshold is applied. A null
+        ``vector_weight`` skips the vector ranking.
+
+        Returns:
+            tuple: (query, params) selecting chunk_id, score, chunk_metadata
+        """
+        rrf_k = max(rrf_k or 0, 0)
+        vector_weight = max(vector_weight or 0.0, 0.0)
+        lexical_weight = max(lexical_weight or 0.0, 0.0)
+        max_score = (vector_weight + lexical_weight) / (rrf_k + 1) or 1.0
+        tsvector = f"to_tsvector('{FULLTEXT_CONFIG}', c.content)"
+
+        if vector_weight:
+            vector_hits = f"""
+                SELECT v.chunk_id, v.chunk_metadata,
+                    row_number() OVER (ORDER BY v.score DESC, v.chunk_id) AS rank
+                FROM ({vector_query}) v
+            """
+            params = list(vector_params)
+        else:
+            vector_hits = """
+                SELECT NULL::integer AS chunk_id, NULL::jsonb AS chunk_metadata,
+                    NULL::bigint AS rank
+                WHERE FALSE
+            """
+            params = []
+
+        query = f"""
+            WITH vector_hits AS ({vector_hits}),
+            lexical_hits AS (
+                SELECT l.chunk_id, l.chunk_metadata,
+                    row_number() OVER (ORDER BY l.rank DESC, l.chunk_id) AS rank
+                FROM (
+                    SELECT e.chunk_id, e.chunk_metadata,
+                        ts_rank_cd({tsvector}, query.q) AS rank
+                    FROM llm_knowledge_chunk_embedding e
+                    JOIN llm_knowledge_chunk c ON c.id = e.chunk_id
+                    CROSS JOIN websearch_to_tsquery(
+                        '{FULLTEXT_CONFIG}', %s
+                    ) AS query(q)
+                    WHERE {where_clause}
+                    AND {tsvector} @@ query.q
+                    ORDER BY rank DESC
+                    LIMIT %s
+                ) l
             )
+            SELECT COALESCE(v.chunk_id, l.chunk_id) AS chunk_id,
+                (
+                    COALESCE(%s::float / (%s + v.rank), 0)
+                    + COALESCE(%s::float / (%s + l.rank), 0)
+                ) / %s AS score,
+                COALESCE(v.chunk_metadata, l.chunk_metadata)
+            FROM vector_hits v
+            FULL OUTER JOIN lexical_hits l ON l.chunk_id = v.chunk_id
+            ORDER BY score DESC, 1
+            LIMIT %s
+            OFFSET %s
+        """
+        params += [query_text, *where_params, candidate_limit]
+        params += [vector_weight, rrf_k, lexical_weight, rrf_k, max_score]
+        params += [limit, offset]
+        return query, params
+
+    def _get_filter_sql(self, domain):
+        """Translate a domain on llm.knowledge.chunk into a condition on the
+        embedding table (aliased ``e``) of a vector search
+
+        Leaves on the chunk id, resource, resource model and sequence use
+        the columns copied on the embedding table, ``metadata.<key>``
+        leaves use its GIN indexed metadata. Any other leaf is resolved by
+        the ORM as a sub-query on the chunks, so the filter is always exact.
+        The vector index is not aware of it though, see
+        _get_filter_selectivity.
 
-        return formatted_results
+        Returns:
+            tuple: (SQL condition, list of parameters)
+        """
+        tokens = iter(expression.normalize_domain(domain))
+
+        def parse():
+            token = next(tokens)
+            if token == expression.NOT_OPERATOR:
+                sql, params = parse()
+                return f"(NOT {sql})", params
+            if token in (expression.AND_OPERATOR, expression.OR_OPERATOR):
+                left_sql, left_params = parse()
+                right_sql, right_params = parse()
+                operator = "AND" if token == expression.AND_OPERATOR else "OR"
+                params = left_params + right_params
+                return f"({left_sql} {operator} {right_sql})", params
+            return self._get_filter_leaf_sql(token)
+
+        return parse()
+
+    def _get_filter_leaf_sql(self, leaf):
+        leaf = tuple(leaf)
+        if leaf == expression.TRUE_LEAF:
+            return "TRUE", []
+        if leaf == expression.FALSE_LEAF:
+            return "FALSE", []
+        field, operator, value = leaf
+        operator = operator.lower()
+
+        if field.startswith("metadata.") and operator in ("=", "!=", "in", "not in"):
+            key = field[len("metadata.") :]
+            values = value if operator in ("in", "not in") else [value]
+            sql = "e.chunk_metadata @> ANY(%s::jsonb[])"
+            params = [[json.dumps({key: v}) for v in values]]
+            if operator in ("!=", "not in"):
+                sql = f"NOT COALESCE({sql}, FALSE)"
+            return sql, params
+
+        column = FILTER_COLUMNS.get(field)
+        if column and operator in ("in", "not in"):
+            ids = [v for v in value if v] if isinstance(value, (list, tuple)) else None
+            if ids is not None and len(ids) == len(value):
+                sql = f"e.{column} = ANY(%s)"
+                return (sql if operator == "in" else f"NOT ({sql})"), [list(ids)]
+        elif column and operator in FILTER_OPERATORS:
+            if value is False or value is None:
+                if operator == "=":
+                    return f"e.{column} IS NULL", []
+                if operator == "!=":
+                    return f"e.{column} IS NOT NULL", []
+            elif not isinstance(value, (list, tuple, dict)):
+                return f"e.{column} {operator} %s", [value]
+
+        # Let the ORM translate the leaf, including access rules
+        query = self.env["llm.knowledge.chunk"]._search([leaf])
+        sub_sql, sub_params = query.subselect()
+        return f"e.chunk_id IN ({sub_sql})", list(sub_params)
 
     # -------------------------------------------------------------------------
     # Vector Index Management
@@ -276,88 +800,186 @@ class LLMStorePgVector(models.Model):
         """Generate a consistent index name based on table and embedding model"""
         return f"{table_name}_emb_model_{embedding_model_id}_idx"
 
+    @api.model
+    def _vector_index_exists(self, index_name):
+        """Whether the index exists, memoized once it is found
+
+        The memo is a set of this module rather than an ormcache, whose
+        clearing would clear all the caches of the registry. Dropping or
+        swapping the index forgets it, see _forget_vector_index, and so does
+        rolling back the transaction it was found in.
+        """
+        key = (self.env.cr.dbname, index_name)
+        if key in known_vector_indexes:
+            return True
+        self.env.cr.execute("SELECT to_regclass(%s) IS NOT NULL", (index_name,))
+        exists = self.env.cr.fetchone()[0]
+        if exists:
+            known_vector_indexes.add(key)
+            self.env.cr.postrollback.add(partial(known_vector_indexes.discard, key))
+        return exists
+
+    @api.model
+    def _forget_vector_index(self, index_name):
+        """Check the existence of the index again on its next use"""
+        known_vector_indexes.discard((self.env.cr.dbname, index_name))
+
+    def _get_ivfflat_lists(self, row_count):
+        """Number of IVFFlat lists: configured, or derived from the row count
+        as recommended by pgvector (rows / 1000, sqrt(rows) above 1M rows)"""
+        if self.pgvector_ivfflat_lists:
+            return self.pgvector_ivfflat_lists
+        if row_count > 1000000:
+            return max(int(math.sqrt(row_count)), 1)
+        return max(row_count // 1000, 1)
+
+    def _get_storage_column(self):
+        """Column holding the embeddings in the storage format of the store"""
+        return STORAGE_COLUMNS[self.pgvector_storage_format or "vector"]
+
+    def _get_index_expression(self, dimensions, prefix=""):
+        """Indexed expression and operator class of the storage format
+
+        Returns:
+            tuple: (SQL expression, operator class)
+        """
+        dim_spec = f"({int(dimensions)})" if dimensions else ""
+        storage_format = self.pgvector_storage_format or "vector"
+        if storage_format == "halfvec":
+            return f"{prefix}{HALF_COLUMN}::halfvec{dim_spec}", "halfvec_cosine_ops"
+        if storage_format == "bit":
+            return (
+                f"binary_quantize({prefix}{HALF_COLUMN})::bit{dim_spec}",
+                "bit_hamming_ops",
+            )
+        return f"{prefix}embedding::vector{dim_spec}", "vector_cosine_ops"
+
+    def _count_model_embeddings(self, embedding_model_id, limit=None):
+        """Number of embeddings of the model, counted up to ``limit`` when
+        given"""
+        self.env.cr.execute(
+            f"""
+            SELECT count(*) FROM (
+                SELECT 1 FROM llm_knowledge_chunk_embedding
+                WHERE embedding_model_id = %s
+                AND {self._get_storage_column()} IS NOT NULL
+                LIMIT %s
+            ) AS embeddings
+            """,
+            (embedding_model_id, limit),
+        )
+        return self.env.cr.fetchone()[0]
+
+    def _get_vector_index_sql(
+        self,
+        index_name,
+        embedding_model_id,
+        dimensions,
+        row_count,
+        index_method=None,
+        concurrently=False,
+    ):
+        """SQL creating the partial vector index of an embedding model"""
+        table_name = "llm_knowledge_chunk_embedding"
+        index_expr, opclass = self._get_index_expression(dimensions)
+        index_method = index_method or self.pgvector_index_method or "ivfflat"
+        if index_method == "hnsw":
+            options = (
+                f"m = {int(self.pgvector_hnsw_m or 16)}, "
+                f"ef_construction = {int(self.pgvector_hnsw_ef_construction or 64)}"
+            )
+        else:
+            options = f"lists = {int(self._get_ivfflat_lists(row_count))}"
+        concurrently_spec = "CONCURRENTLY" if concurrently else ""
+        return f"""
+            CREATE INDEX {concurrently_spec} IF NOT EXISTS {index_name}
+            ON {table_name}
+            USING {index_method}(({index_expr}) {opclass})
+            WITH ({options})
+            WHERE embedding_model_id = {int(embedding_model_id)}
+            AND {self._get_storage_column()} IS NOT NULL
+        """
+
     def _create_vector_index(self, embedding_model_id, dimensions=None, force=False):
-        """Create a vector index for the specified embedding model"""
-        self.ensure_one()
+        """Create a vector index for the specified embedding model
 
-        # Get the embedding model to determine dimensions if not provided
-        if not dimensions and embedding_model_id:
-            embedding_model = self.env["llm.model"].browse(embedding_model_id)
-            if embedding_model.exists():
-                # Generate a sample embedding to determine dimensions
-                sample_embedding = embedding_model.embedding("")[0]
-                dimensions = len(sample_embedding) if sample_embedding else None
+        The build is deferred until the model has at least
+        pgvector_index_min_rows embeddings, since an IVFFlat index trained on
+        an empty or tiny table gives poor recall. Until then, embeddings are
+        only counted up to that number. Once the index is known to exist,
+        this makes no query, see _vector_index_exists.
+        """
+        self.ensure_one()
 
         cr = self.env.cr
         table_name = "llm_knowledge_chunk_embedding"
 
-        # Register vector with this cursor
-        register_vector(cr._cnx)
-
         # Generate index name
         index_name = self._get_index_name(table_name, embedding_model_id)
 
-        # Check if index already exists
         if force:
             # Drop existing index if force is True
             cr.execute(f"DROP INDEX IF EXISTS {index_name}")
-        else:
-            # Check if index exists
-            cr.execute(
-                """
-                    SELECT 1 FROM pg_indexes
-                    WHERE indexname = %s
-                """,
-                (index_name,),
-            )
+            self._forget_vector_index(index_name)
+        elif self._vector_index_exists(index_name):
+            return True
 
-            # If index already exists, return early
-            if cr.fetchone():
-                _logger.info(f"Index {index_name} already exists, skipping creation")
-                return True
+        min_rows = self.pgvector_index_min_rows or 0
+        if min_rows:
+            row_count = self._count_model_embeddings(embedding_model_id, min_rows)
+            if row_count < min_rows:
+                _logger.debug(
+                    f"Deferring vector index {index_name}: {row_count} embeddings"
+                )
+                return False
+        row_count = self._count_model_embeddings(embedding_model_id)
+
+        # Get the embedding model dimensions if not provided
+        if not dimensions and embedding_model_id:
+            embedding_model = self.env["llm.model"].browse(embedding_model_id)
+            if embedding_model.exists():
+                dimensions = embedding_model.get_embedding_dimension() or None
+        if self.pgvector_storage_format == "bit" and not dimensions:
+            _logger.warning(
+                f"Cannot build binary quantized index {index_name} without "
+                "the embedding dimension"
+            )
+            return False
 
-        # Determine the dimension specification
-        dim_spec = f"({dimensions})" if dimensions else ""
+        # Register vector with this cursor
+        register_vector(cr._cnx)
 
         # Determine index method
         index_method = self.pgvector_index_method or "ivfflat"
 
         try:
-            # Create appropriate index for this embedding model
-            if index_method == "ivfflat":
-                # Create IVFFlat index
-                cr.execute(
-                    f"""
-                    CREATE INDEX {index_name} ON {table_name}
-                    USING ivfflat((embedding::vector{dim_spec}) vector_cosine_ops)
-                    WHERE embedding_model_id = %s AND embedding IS NOT NULL
-                """,
-                    (embedding_model_id,),
-                )
-            elif index_method == "hnsw":
-                # Try HNSW index if available in pgvector version
-                try:
+            try:
+                with cr.savepoint():
                     cr.execute(
-                        f"""
-                        CREATE INDEX {index_name} ON {table_name}
-                        USING hnsw((embedding::vector{dim_spec}) vector_cosine_ops)
-                        WHERE embedding_model_id = %s AND embedding IS NOT NULL
-                    """,
-                        (embedding_model_id,),
-                    )
-                except Exception as e:
-                    # Fallback to IVFFlat if HNSW is not available
-                    _logger.warning(
-                        f"HNSW index not supported, falling back to IVFFlat: {str(e)}"
+                        self._get_vector_index_sql(
+                            index_name,
+                            embedding_model_id,
+                            dimensions,
+                            row_count,
+                            index_method=index_method,
+                        )
                     )
-                    cr.execute(
-                        f"""
-                        CREATE INDEX {index_name} ON {table_name}
-                        USING ivfflat((embedding::vector{dim_spec}) vector_cosine_ops)
-                        WHERE embedding_model_id = %s AND embedding IS NOT NULL
-                    """,
-                        (embedding_model_id,),
+            except Exception as e:
+                if index_method != "hnsw":
+                    raise
+                # Fallback to IVFFlat if HNSW is not available
+                _logger.warning(
+                    f"HNSW index not supported, falling back to IVFFlat: {str(e)}"
+                )
+                cr.execute(
+                    self._get_vector_index_sql(
+                        index_name,
+                        embedding_model_id,
+                        dimensions,
+                        row_count,
+                        index_method="ivfflat",
                     )
+                )
 
             _logger.info(
                 f"Created vector index {index_name} for embedding model {embedding_model_id}"
@@ -367,6 +989,371 @@ class LLMStorePgVector(models.Model):
             _logger.error(f"Error creating vector index: {str(e)}")
             return False
 
+    def action_rebuild_vector_indexes(self):
+        """Rebuild the vector indexes of the embedding models of this store
+
+        Each index is built under a temporary name with CREATE INDEX
+        CONCURRENTLY, so searches and inserts are not blocked, then swapped
+        with the current one in a single transaction, so that searches
+        always find an index, and the previous index is dropped last.
+        Useful once a table has grown far past the size the IVFFlat lists
+        were derived from, or after changing the index parameters.
+        """
+        self.ensure_one()
+        embedding_models = (
+            self.env["llm.knowledge.collection"]
+            .search([("store_id", "=", self.id)])
+            .mapped("embedding_model_id")
+        )
+        table_name = "llm_knowledge_chunk_embedding"
+        build_params = []
+        for embedding_model in embedding_models:
+            dimensions = embedding_model.get_embedding_dimension() or None
+            if self.pgvector_storage_format == "bit" and not dimensions:
+                continue
+            build_params.append(
+                (
+                    self._get_index_name(table_name, embedding_model.id),
+                    embedding_model.id,
+                    dimensions,
+                    self._count_model_embeddings(embedding_model.id),
+                )
+            )
+        # Make the dimensions detected above visible to the new cursor
+        self.env.cr.commit()
+
+        # CONCURRENTLY cannot run inside a transaction block
+        cr = self.pool.cursor()
+        try:
+            cr._cnx.autocommit = True
+            for index_name, embedding_model_id, dimensions, row_count in build_params:
+                new_index_name = f"{index_name}_new"
+                old_index_name = f"{index_name}_old"
+                cr.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {new_index_name}")
+                cr.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {old_index_name}")
+                cr.execute(
+                    self._get_vector_index_sql(
+                        new_index_name,
+                        embedding_model_id,
+                        dimensions,
+                        row_count,
+                        concurrently=True,
+                    )
+                )
+                # Statements of a single query run in one transaction
+                cr.execute(
+                    f"""
+                    ALTER INDEX IF EXISTS {index_name} RENAME TO {old_index_name};
+                    ALTER INDEX {new_index_name} RENAME TO {index_name};
+                    """
+                )
+                cr.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {old_index_name}")
+                self._forget_vector_index(index_name)
+                _logger.info(f"Rebuilt vector index {index_name}")
+        finally:
+            cr._cnx.autocommit = False
+            cr.close()
+
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Vector Indexes Rebuilt"),
+                "message": _("%s vector index(es) rebuilt.") % len(build_params),
+                "type": "success",
+                "sticky": False,
+            },
+        }
+
+    def _get_embedding_table_size(self):
+        self.env.cr.execute(
+            "SELECT pg_total_relation_size('llm_knowledge_chunk_embedding')"
+        )
+        return self.env.cr.fetchone()[0]
+
+    def action_migrate_storage_format(self):
+        """Convert the embeddings of this store to its storage format
+
+        Embeddings of the store's embedding models are moved between the
+        float32 and float16 columns in batches, each committed separately
+        so that the table stays available, then the vector indexes are
+        rebuilt for the storage format. Embeddings not converted yet are
+        not found by searches until the migration is over.
+        """
+        self.ensure_one()
+        cr = self.env.cr
+        target = self._get_storage_column()
+        source = HALF_COLUMN if target == "embedding" else "embedding"
+        vector_type = "vector" if target == "embedding" else "halfvec"
+        if target == HALF_COLUMN:
+            self._ensure_half_column()
+        elif not self._half_column_exists():
+            # Never stored in float16, nothing to convert
+            source = None
+        embedding_models = (
+            self.env["llm.knowledge.collection"]
+            .search([("store_id", "=", self.id)])
+            .mapped("embedding_model_id")
+        )
+        size_before = self._get_embedding_table_size()
+        converted = 0
+        for embedding_model in embedding_models:
+            self._drop_vector_index(embedding_model.id)
+            while source:
+                cr.execute(
+                    f"""
+                    UPDATE llm_knowledge_chunk_embedding
+                    SET {target} = {source}::{vector_type}, {source} = NULL
+                    WHERE id IN (
+                        SELECT id FROM llm_knowledge_chunk_embedding
+                        WHERE embedding_model_id = %s AND {source} IS NOT NULL
+                        LIMIT %s
+                    )
+                    """,
+                    (embedding_model.id, STORAGE_MIGRATION_BATCH_SIZE),
+                )
+                batch_count = cr.rowcount
+                converted += batch_count
+                cr.commit()
+                if batch_count < STORAGE_MIGRATION_BATCH_SIZE:
+                    break
+            self._create_vector_index(embedding_model.id)
+            cr.commit()
+        self.env["llm.knowledge.chunk.embedding"].invalidate_model()
+        size_after = self._get_embedding_table_size()
+        _logger.info(
+            f"Migrated {converted} embeddings of store {self.name} to "
+            f"{self.pgvector_storage_format}: table and indexes "
+            f"{size_before} -> {size_after} bytes"
+        )
+
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Storage Migrated"),
+                "message": _(
+                    "%(count)s embedding(s) converted. Table and indexes size: "
+                    "%(before)s MB before, %(after)s MB after (space freed by "
+                    "the conversion is reclaimed by VACUUM)."
+                )
+                % {
+                    "count": converted,
+                    "before": round(size_before / 1048576, 1),
+                    "after": round(size_after / 1048576, 1),
+                },
+                "type": "success",
+                "sticky": True,
+            },
+        }
+
+    @api.model
+    @tools.ormcache()
+    def _get_pgvector_version(self):
+        """Version of the vector extension as a tuple of integers, empty when
+        it is not installed"""
+        self.env.cr.execute(
+            "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+        )
+        row = self.env.cr.fetchone()
+        if not row:
+            return ()
+        return tuple(int(part) for part in row[0].split(".") if part.isdigit())
+
+    @api.model
+    def _half_column_exists(self):
+        self.env.cr.execute(
+            """
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'llm_knowledge_chunk_embedding' AND column_name = %s
+            """,
+            (HALF_COLUMN,),
+        )
+        return bool(self.env.cr.fetchone())
+
+    @api.model
+    def _ensure_half_column(self):
+        """Create the float16 column of the embeddings, used by the halfvec
+        and bit storage formats
+
+        The column is added on demand rather than declared as a field, so
+        that the module installs and upgrades on pgvector versions without
+        the halfvec type.
+        """
+        if self._half_column_exists():
+            return
+        if self._get_pgvector_version() < (0, 7):
+            raise ValidationError(
+                _(
+                    "The halfvec and bit storage formats require pgvector 0.7 or "
+                    "later, the database has pgvector %s."
+                )
+                % ".".join(map(str, self._get_pgvector_version()))
+            )
+        self.env.cr.execute(
+            f"""
+            ALTER TABLE llm_knowledge_chunk_embedding
+            ADD COLUMN IF NOT EXISTS {HALF_COLUMN} halfvec
+            """
+        )
+        _logger.info(f"Created column {HALF_COLUMN} of llm_knowledge_chunk_embedding")
+
+    @api.constrains("service", "pgvector_storage_format")
+    def _check_pgvector_storage_format(self):
+        for store in self:
+            if store.service == "pgvector" and store.pgvector_storage_format in (
+                "halfvec",
+                "bit",
+            ):
+                store._ensure_half_column()
+
+    def _get_filter_selectivity(self, where_clause, where_params, index_name):
+        """How to search the embeddings matching the filter of a search
+
+        An index scan returns the nearest embeddings, up to ef_search or the
+        rows of the probed lists, before the filter is applied, so a
+        selective filter leaves fewer results than requested, or none.
+        Filters matching at most ``pgvector_exact_filter_rows`` embeddings,
+        counted up to that limit, are searched exactly by computing the
+        distance of each of them: results are complete and the cost is
+        bounded by the limit. Larger ones keep the index, scanned deeper in
+        proportion to the share of its rows matching the filter, as estimated
+        by the planner, see _get_search_settings: latency grows as that share
+        shrinks, and recall stays approximate.
+
+        Returns:
+            tuple: (whether to search the matching embeddings exactly,
+            estimated share of the rows of the index matching the filter)
+        """
+        threshold = self.pgvector_exact_filter_rows
+        if not threshold:
+            return False, 1.0
+        cr = self.env.cr
+        cr.execute(
+            f"""
+            SELECT count(*) FROM (
+                SELECT 1 FROM llm_knowledge_chunk_embedding e
+                WHERE {where_clause}
+                LIMIT %s
+            ) AS matching
+            """,
+            where_params + [threshold + 1],
+        )
+        if cr.fetchone()[0] <= threshold:
+            return True, 1.0
+        stats = self._get_index_stats(index_name)
+        if not stats:
+            return False, 1.0
+        cr.execute(
+            f"""
+            EXPLAIN (FORMAT JSON)
+            SELECT 1 FROM llm_knowledge_chunk_embedding e WHERE {where_clause}
+            """,
+            where_params,
+        )
+        plan = cr.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimated = max(plan[0]["Plan"]["Plan Rows"], threshold)
+        return False, min(estimated / stats[0], 1.0)
+
+    def _get_index_stats(self, index_name):
+        """(rows, lists) of a vector index, from the catalog statistics
+
+        Returns:
+            tuple: (estimated number of rows, number of lists of an IVFFlat
+            index), or None when the index does not exist or was never
+            analyzed
+        """
+        self.env.cr.execute(
+            """
+            SELECT reltuples, reloptions FROM pg_class
+            WHERE relname = %s AND relkind = 'i'
+            """,
+            (index_name,),
+        )
+        row = self.env.cr.fetchone()
+        if not row or not row[0] or row[0] < 0:
+            return None
+        reltuples, reloptions = row
+        lists = IVFFLAT_DEFAULT_LISTS
+        for option in reloptions or []:
+            name, _sep, value = option.partition("=")
+            if name == "lists" and value.isdigit():
+                lists = int(value)
+        return reltuples, lists
+
+    def _get_search_settings(
+        self, probes=None, ef_search=None, depth=0, index_name=None, selectivity=1.0
+    ):
+        """Recall/latency knobs of the index scan of a search
+
+        An HNSW scan returns at most ef_search rows, and an IVFFlat scan the
+        rows of its probed lists, so rows ranked after them are never
+        returned, even with an OFFSET or a keyset cursor. ``depth`` is the
+        number of rows the scan must reach: ef_search is raised to it, up to
+        its maximum, and probes to the lists holding about twice that many
+        rows. Deeper HNSW scans go on with an iterative index scan on
+        pgvector 0.8, otherwise the table must be scanned exactly.
+
+        Filtered rows are dropped after the scan, so with a ``selectivity``,
+        the share of the rows matching the filter, the scan must reach
+        depth / selectivity rows. Filtered HNSW scans are also iterative on
+        pgvector 0.8, which goes on until enough rows pass the filter.
+
+        Returns:
+            tuple: (settings to apply with _search_settings, whether the
+            index scan cannot reach ``depth``)
+        """
+        probes = probes or self.pgvector_ivfflat_probes
+        ef_search = ef_search or self.pgvector_hnsw_ef_search
+        settings = {}
+        exact = False
+        if depth and selectivity < 1:
+            depth = math.ceil(depth / max(selectivity, 1e-9))
+        hnsw = (self.pgvector_index_method or "ivfflat") == "hnsw"
+        if hnsw and selectivity < 1 and self._get_pgvector_version() >= (0, 8):
+            settings["hnsw.iterative_scan"] = "strict_order"
+        if depth and hnsw:
+            if depth > (ef_search or HNSW_DEFAULT_EF_SEARCH):
+                ef_search = min(depth, HNSW_MAX_EF_SEARCH)
+                if depth > ef_search:
+                    if self._get_pgvector_version() >= (0, 8):
+                        settings["hnsw.iterative_scan"] = "strict_order"
+                    else:
+                        exact = True
+        elif depth and index_name:
+            stats = self._get_index_stats(index_name)
+            if stats:
+                rows, lists = stats
+                needed = math.ceil(2 * depth * lists / rows)
+                probes = min(max(probes or 1, needed), lists)
+        if probes:
+            settings["ivfflat.probes"] = int(probes)
+        if ef_search:
+            settings["hnsw.ef_search"] = int(ef_search)
+        return settings, exact
+
+    @contextmanager
+    def _search_settings(self, settings):
+        """Apply settings to the queries of the block only
+
+        SET LOCAL would last until the end of the transaction, and apply to
+        the later searches of the request. Previous values are restored
+        after the block, and on error by rolling back to a savepoint.
+        """
+        cr = self.env.cr
+        with cr.savepoint(flush=False):
+            previous = {}
+            for name, value in settings.items():
+                cr.execute("SELECT current_setting(%s, true)", (name,))
+                previous[name] = cr.fetchone()[0]
+                cr.execute("SELECT set_config(%s, %s, true)", (name, str(value)))
+            yield
+            for name, value in previous.items():
+                if value is not None:
+                    cr.execute("SELECT set_config(%s, %s, true)", (name, value))
+
     def _drop_vector_index(self, embedding_model_id=None):
         """Drop vector index for the specified embedding model"""
         self.ensure_one()
@@ -376,6 +1363,7 @@ class LLMStorePgVector(models.Model):
             # Drop specific index for this model
             index_name = self._get_index_name(table_name, embedding_model_id)
             self.env.cr.execute(f"DROP INDEX IF EXISTS {index_name}")
+            self._forget_vector_index(index_name)
             _logger.info(f"Dropped vector index {index_name}")
         else:
             # Try to find all indexes for this table
@@ -390,6 +1378,7 @@ class LLMStorePgVector(models.Model):
             for index in indexes:
                 if "emb_model_" in index[0]:
                     self.env.cr.execute(f"DROP INDEX IF EXISTS {index[0]}")
+                    self._forget_vector_index(index[0])
                     _logger.info(f"Dropped vector index {index[0]}")
 
         return True
@@ -29,7 +29,10 @@ class LLMStoreQdrant(models.Model):
         return self._default_sanitize_collection_name(name)
 
     def _get_qdrant_client(self):
-        """Get a Qdrant client for the current store configuration."""
+        """Get the Qdrant client of the current store configuration.
+
+        The client is shared across calls, see _get_cached_client.
+        """
         self.ensure_one()
         if self.service != "qdrant":
             return None
@@ -45,8 +48,7 @@ class LLMStoreQdrant(models.Model):
             kwargs["api_key"] = self.api_key
 
         try:
-            client = QdrantClient(**kwargs)
-            return client
+            return self._get_cached_client(lambda: QdrantClient(**kwargs))
         except Exception as err:
             _logger.error(
                 f"Failed to connect to Qdrant server at {kwargs.get('url') or kwargs.get('host')}: {str(err)}"
@@ -68,7 +70,16 @@ class LLMStoreQdrant(models.Model):
 
         qdrant_collection_name = self.get_santized_collection_name(collection_id)
 
-        return client.collection_exists(collection_name=qdrant_collection_name)
+        return self._collection_exists_cached(
+            qdrant_collection_name,
+            lambda: client.collection_exists(collection_name=qdrant_collection_name),
+        )
+
+    def qdrant_check_connection(self):
+        """Check that the Qdrant server answers."""
+        self.ensure_one()
+        self._get_qdrant_client().get_collections()
+        return True
 
     def qdrant_create_collection(
         self, collection_id, dimension=None, metadata=None, **kwargs
@@ -79,21 +90,18 @@ class LLMStoreQdrant(models.Model):
         if not client:
             raise UserError(_("Failed to connect to Qdrant server"))
 
-        collection_record = self.env["llm.knowledge.collection"].browse(collection_id)
-        if not dimension and collection_record.embedding_model_id:
-            embedding_model = self.env["llm.model"].browse(
-                collection_record.embedding_model_id.id
-            )
-            if embedding_model.exists():
-                # Generate a sample embedding to determine dimensions
-                sample_embedding = embedding_model.embedding("")[0]
-                dimension = len(sample_embedding) if sample_embedding else None
         qdrant_collection_name = self.get_santized_collection_name(collection_id)
 
         if self.qdrant_collection_exists(collection_id):
             # TODO: could check dimension mismatch here if needed
             return True
 
+        collection_record = self.env["llm.knowledge.collection"].browse(collection_id)
+        if not dimension and collection_record.embedding_model_id:
+            dimension = (
+                collection_record.embedding_model_id.get_embedding_dimension() or None
+            )
+
         try:
             vector_params = qdrant_models.VectorParams(
                 size=dimension, distance=qdrant_models.Distance.COSINE
@@ -124,6 +132,7 @@ class LLMStoreQdrant(models.Model):
         result = client.delete_collection(
             collection_name=qdrant_collection_name, timeout=30
         )
+        self._forget_collection(qdrant_collection_name)
         if result is not True:
             _logger.warning(
                 f"Qdrant delete_collection for {qdrant_collection_name} returned {result}. Assuming success if no exception."
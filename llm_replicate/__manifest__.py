@@ -9,7 +9,7 @@
     "version": "16.0.1.1.0",
     "depends": ["llm"],
     "external_dependencies": {
-        "python": ["replicate"],
+        "python": ["replicate", "httpx"],
     },
     "data": [
         "data/llm_publisher.xml",
@@ -1,3 +1,4 @@
+import httpx
 import replicate
 
 from odoo import api, models
@@ -13,7 +14,14 @@ class LLMProvider(models.Model):
 
     def replicate_get_client(self):
         """Get Replicate client instance"""
-        return replicate.Client(api_token=self.api_key)
+        pool_size = self.connection_pool_size or None
+        return replicate.Client(
+            api_token=self.api_key,
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+            ),
+        )
 
     def replicate_chat(self, messages, model=None, stream=False, **kwargs):
         """Send chat messages using Replicate"""
@@ -39,17 +47,24 @@ class LLMProvider(models.Model):
 
     def replicate_embedding(self, texts, model=None):
         """Generate embeddings using Replicate"""
+        return self.replicate_get_embedding_function(model)(texts)
+
+    def replicate_get_embedding_function(self, model=None):
         model = self.get_model(model, "embedding")
+        client, model_name = self.client, model.name
+
+        def embed(texts):
+            if not isinstance(texts, list):
+                texts = [texts]
 
-        if not isinstance(texts, list):
-            texts = [texts]
+            response = client.run(model_name, input={"sentences": texts})
 
-        response = self.client.run(model.name, input={"sentences": texts})
+            # Ensure we return a list of embeddings
+            if len(texts) == 1:
+                return [response] if not isinstance(response, list) else response
+            return response
 
-        # Ensure we return a list of embeddings
-        if len(texts) == 1:
-            return [response] if not isinstance(response, list) else response
-        return response
+        return embed
 
     def replicate_models(self, model_id=None):
         self.ensure_one()
@@ -9,6 +9,7 @@
         - Resource retrieval interfaces
         - Resource parsing interfaces
         - HTTP retrieval for external URLs
+        - Background processing queue
     """,
     "category": "Technical",
     "version": "16.0.1.0.0",
@@ -21,7 +22,9 @@
     "data": [
         "security/ir.model.access.csv",
         "data/server_actions.xml",
+        "data/ir_cron.xml",
         "views/llm_resource_views.xml",
+        "views/llm_pipeline_job_views.xml",
         "views/menu.xml",
     ],
     "images": [
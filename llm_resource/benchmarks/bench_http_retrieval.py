@@ -0,0 +1,147 @@
+"""
+Benchmark of the retrieval of HTTP resources against local test servers.
+
+Starts ``--hosts`` local HTTP servers answering after ``--latency`` seconds
+with an HTML page, its ETag and Last-Modified date, and 304 Not Modified
+to conditional requests matching them. URL attachments are created for
+``--urls`` pages spread over the servers, then timed:
+
+- ``sequential``: ``_http_prefetch`` with a single worker
+- ``concurrent``: ``_http_prefetch`` with the configured workers
+- ``retrieve``: the full retrieval of the resources, downloads included
+- ``re-retrieve``: the same, sending conditional requests
+
+Usage:
+    python3 llm_resource/benchmarks/bench_http_retrieval.py -c odoo.conf -d db \\
+        [--urls 200] [--hosts 4] [--latency 0.05]
+
+Nothing is committed.
+"""
+
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import odoo
+from odoo import SUPERUSER_ID, api
+
+PAGE = "<html><body><h1>Page {path}</h1>{paragraphs}</body></html>"
+PARAGRAPH = "<p>Content of the page, repeated to weigh a few kilobytes.</p>"
+LAST_MODIFIED = "Mon, 05 Oct 2026 10:00:00 GMT"
+# Requests answered by the servers, and how many of them with a 304
+SERVED = {"requests": 0, "not_modified": 0}
+SERVED_LOCK = threading.Lock()
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """Serve an HTML page per path, honoring conditional requests"""
+
+    latency = 0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        etag = f'"{abs(hash(self.path))}"'
+        not_modified = self.headers.get("If-None-Match") == etag
+        with SERVED_LOCK:
+            SERVED["requests"] += 1
+            SERVED["not_modified"] += int(not_modified)
+        if not_modified:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = PAGE.format(path=self.path, paragraphs=PARAGRAPH * 100).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_servers(count, latency):
+    PageHandler.latency = latency
+    servers = []
+    for _i in range(count):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    return servers
+
+
+def timed(label, func):
+    served = dict(SERVED)
+    start = time.perf_counter()
+    func()
+    duration = time.perf_counter() - start
+    sent = SERVED["requests"] - served["requests"]
+    not_modified = SERVED["not_modified"] - served["not_modified"]
+    print(f"{label:>12}: {duration:.2f}s, {sent} requests, {not_modified} not modified")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-c", "--config")
+    parser.add_argument("-d", "--database", required=True)
+    parser.add_argument("--urls", type=int, default=200)
+    parser.add_argument("--hosts", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    odoo.tools.config.parse_config(["-c", args.config] if args.config else [])
+    registry = odoo.registry(args.database)
+    servers = start_servers(args.hosts, args.latency)
+
+    try:
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            ports = [server.server_address[1] for server in servers]
+            urls = [
+                f"http://127.0.0.1:{ports[index % len(ports)]}/page/{index}"
+                for index in range(args.urls)
+            ]
+            attachments = env["ir.attachment"].create(
+                [
+                    {"name": f"Page {index}", "type": "url", "url": url}
+                    for index, url in enumerate(urls)
+                ]
+            )
+            resources = env["llm.resource"].create(
+                [
+                    {
+                        "name": attachment.name,
+                        "model_id": env["ir.model"]._get_id("ir.attachment"),
+                        "res_id": attachment.id,
+                        "retriever": "http",
+                    }
+                    for attachment in attachments
+                ]
+            )
+            set_param = env["ir.config_parameter"].set_param
+            get_param = env["ir.config_parameter"].get_param
+            max_workers = get_param("llm_resource.http_max_workers", "8")
+
+            set_param("llm_resource.http_max_workers", "1")
+            timed("sequential", resources._http_prefetch)
+            set_param("llm_resource.http_max_workers", max_workers)
+            timed("concurrent", resources._http_prefetch)
+
+            timed("retrieve", resources.retrieve)
+            # Downloaded URL attachments were turned into binary ones
+            attachments.write({"type": "url"})
+            resources.write({"state": "draft"})
+            timed("re-retrieve", resources.retrieve)
+            cr.rollback()
+    finally:
+        for server in servers:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,3 +4,4 @@ from . import llm_resource_retriever
 from . import llm_resource_parser
 from . import llm_resource_http
 from . import ir_attachment
+from . import llm_pipeline_job
@@ -9,14 +9,17 @@ class IrAttachment(models.Model):
         is_markdown = (
             self.name.lower().endswith(".md") and self.mimetype == "stream/octet-stream"
         )
-        # TODO: optimize this later for not loading raw data in memory
-        return [
-            {
-                "field_name": "datas",
-                "mimetype": "text/markdown" if is_markdown else self.mimetype,
-                "rawcontent": self.raw,
-            }
-        ]
+        field = {
+            "field_name": "datas",
+            "mimetype": "text/markdown" if is_markdown else self.mimetype,
+        }
+        if self.mimetype == "application/pdf" and self.store_fname:
+            # PDFs are read from the filestore by the parsers which need them,
+            # see llm.resource._get_field_rawcontent
+            field.update(filepath=self._full_path(self.store_fname), rawcontent=None)
+        else:
+            field["rawcontent"] = self.raw
+        return [field]
 
     def llm_get_retrieval_details(self):
         """Provides details needed by llm.resource to retrieve content.
@@ -0,0 +1,104 @@
+"""
+Page by page text extraction of PDF documents.
+
+Large documents are read in batches of consecutive pages so that their pages
+are never all loaded at once. When the PDF is a file, batches can be
+extracted in a pool of worker processes, each opening the file on its own.
+Workers are spawned rather than forked, so that they do not inherit the
+database connections, locks and threads of the Odoo worker, and only run
+PyMuPDF, never the ORM. They import this module in a new interpreter, which
+requires the addon to be importable from the Python path; otherwise pages are
+extracted in process.
+"""
+
+import itertools
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None
+
+_logger = logging.getLogger(__name__)
+
+
+def open_pdf(source):
+    """Open a PDF from a file path, without reading it all, or from bytes"""
+    if isinstance(source, str):
+        return pymupdf.open(source)
+    return pymupdf.open(stream=source, filetype="pdf")
+
+
+def get_page_texts(doc, start, end, max_chars=0):
+    """Text of the pages [start, end) of an open document"""
+    texts = []
+    for page_num in range(start, end):
+        text = doc[page_num].get_text()
+        texts.append(text[:max_chars] if max_chars else text)
+    return texts
+
+
+def extract_page_texts(source, start, end, max_chars=0):
+    """Text of the pages [start, end) of a PDF, run in worker processes"""
+    with open_pdf(source) as doc:
+        return get_page_texts(doc, start, end, max_chars)
+
+
+def iter_page_texts(doc, source, page_count, batch_size, max_chars=0, workers=0):
+    """Yield (first page number, page texts) of consecutive batches of pages
+
+    Args:
+        doc: The open document, used when pages are extracted in process
+        source: File path or bytes of the document
+        page_count: Number of pages to extract
+        batch_size: Number of pages per batch
+        max_chars: Characters kept per page, 0 for all
+        workers: Number of worker processes, batches are extracted in
+            process when lower than 2 or when the PDF is not a file. At
+            most two batches per worker are extracted ahead of the caller.
+    """
+    batch_size = max(batch_size, 1)
+    batches = [
+        (start, min(start + batch_size, page_count))
+        for start in range(0, page_count, batch_size)
+    ]
+    if workers < 2 or not isinstance(source, str) or len(batches) < 2:
+        for start, end in batches:
+            yield start, get_page_texts(doc, start, end, max_chars)
+        return
+
+    done = 0
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+
+        def submit(batch):
+            start, end = batch
+            return start, executor.submit(
+                extract_page_texts, source, start, end, max_chars
+            )
+
+        remaining = iter(batches)
+        pending = deque(
+            submit(batch) for batch in itertools.islice(remaining, 2 * workers)
+        )
+        while pending:
+            start, future = pending.popleft()
+            try:
+                texts = future.result()
+            except (BrokenProcessPool, ImportError) as e:
+                _logger.warning(
+                    f"PDF worker processes failed, extracting in process: {e}"
+                )
+                break
+            next_batch = next(remaining, None)
+            if next_batch:
+                pending.append(submit(next_batch))
+            done += 1
+            yield start, texts
+
+    for start, end in batches[done:]:
+        yield start, get_page_texts(doc, start, end, max_chars)
@@ -0,0 +1,296 @@
+import logging
+import time
+from datetime import timedelta
+
+from odoo import _, api, fields, models
+
+from .llm_resource import STALE_LOCK_MINUTES
+
+_logger = logging.getLogger(__name__)
+
+# Defaults of the system parameters tuning the workers, see _get_queue_settings
+DEFAULT_STAGE_CONCURRENCY = 4
+DEFAULT_JOB_BATCH_SIZE = 10
+DEFAULT_WORKER_TIME_LIMIT = 240
+DEFAULT_JOB_RETENTION_DAYS = 7
+
+# Retry delays double from the base, up to the max, in seconds
+RETRY_BACKOFF_BASE = 60
+RETRY_BACKOFF_MAX = 3600
+
+
+class LLMPipelineJob(models.Model):
+    """Stage of the processing of a resource, run in the background
+
+    Each job runs one stage of the pipeline on its resource, then queues the
+    job of the next stage. Workers are scheduled actions claiming pending
+    jobs with SKIP LOCKED, so that several of them can run at once, and
+    stages are run on batches of resources with their usual methods, which
+    lock the resources with `_lock`.
+    """
+
+    _name = "llm.pipeline.job"
+    _description = "LLM Resource Pipeline Job"
+    _order = "priority, scheduled_at, id"
+
+    resource_id = fields.Many2one(
+        "llm.resource",
+        string="Resource",
+        required=True,
+        index=True,
+        ondelete="cascade",
+    )
+    stage = fields.Selection(
+        [
+            ("retrieve", "Retrieve"),
+            ("parse", "Parse"),
+        ],
+        required=True,
+        index=True,
+    )
+    state = fields.Selection(
+        [
+            ("pending", "Pending"),
+            ("running", "Running"),
+            ("done", "Done"),
+            ("failed", "Failed"),
+            ("cancelled", "Cancelled"),
+        ],
+        default="pending",
+        required=True,
+        index=True,
+    )
+    priority = fields.Integer(
+        default=10,
+        help="Jobs with a lower priority are run first",
+    )
+    scheduled_at = fields.Datetime(
+        string="Scheduled On",
+        default=fields.Datetime.now,
+        required=True,
+        help="The job is not run before this date",
+    )
+    attempts = fields.Integer(readonly=True)
+    max_attempts = fields.Integer(default=5)
+    started_at = fields.Datetime(string="Started On", readonly=True)
+    finished_at = fields.Datetime(string="Finished On", readonly=True)
+    duration = fields.Float(string="Duration (s)", readonly=True, group_operator="avg")
+    last_error = fields.Text(readonly=True)
+
+    def name_get(self):
+        stages = dict(self._fields["stage"]._description_selection(self.env))
+        return [
+            (job.id, f"{job.resource_id.display_name} - {stages.get(job.stage)}")
+            for job in self
+        ]
+
+    @api.model
+    def _get_queue_settings(self):
+        """Settings of the workers, from system parameters:
+
+        - ``llm_resource.pipeline_concurrency_<stage>``: jobs of a stage
+          running at once across all workers
+        - ``llm_resource.pipeline_batch_size``: jobs run together
+        - ``llm_resource.pipeline_time_limit``: seconds after which a worker
+          stops claiming jobs
+        """
+        get_param = self.env["ir.config_parameter"].sudo().get_param
+        stages = [stage for stage, _label in self._fields["stage"].selection]
+        return {
+            "concurrency": {
+                stage: int(
+                    get_param(
+                        f"llm_resource.pipeline_concurrency_{stage}",
+                        DEFAULT_STAGE_CONCURRENCY,
+                    )
+                )
+                for stage in stages
+            },
+            "batch_size": int(
+                get_param("llm_resource.pipeline_batch_size", DEFAULT_JOB_BATCH_SIZE)
+            ),
+            "time_limit": int(
+                get_param("llm_resource.pipeline_time_limit", DEFAULT_WORKER_TIME_LIMIT)
+            ),
+        }
+
+    @api.model
+    def _cron_run_jobs(self):
+        """Run pending jobs until none is left or the time limit is reached.
+        Called by a scheduled action."""
+        settings = self._get_queue_settings()
+        deadline = time.monotonic() + settings["time_limit"]
+        self._requeue_stale_jobs()
+        while time.monotonic() < deadline:
+            ran = False
+            for stage, concurrency in settings["concurrency"].items():
+                jobs = self._claim(stage, concurrency, settings["batch_size"])
+                if jobs:
+                    jobs._run()
+                    ran = True
+            if not ran:
+                break
+        return True
+
+    @api.model
+    def _requeue_stale_jobs(self):
+        """Put back in the queue the jobs of workers which died, detected the
+        same way as stale resource locks"""
+        stale_date = fields.Datetime.now() - timedelta(minutes=STALE_LOCK_MINUTES)
+        stale_jobs = self.search(
+            [("state", "=", "running"), ("started_at", "<", stale_date)]
+        )
+        if stale_jobs:
+            _logger.warning(f"Requeuing {len(stale_jobs)} stale pipeline jobs")
+            stale_jobs.write({"state": "pending", "started_at": False})
+            self.env.cr.commit()
+
+    @api.model
+    def _claim(self, stage, concurrency, batch_size):
+        """Mark as running the next pending jobs of a stage, within its
+        concurrency, and commit so that other workers skip them
+
+        Workers count and claim the jobs of a stage one at a time, under a
+        transaction advisory lock of the stage, otherwise two of them could
+        both count the same running jobs and claim more than the concurrency
+        together. A worker which does not get the lock claims nothing this
+        time.
+        """
+        cr = self.env.cr
+        # New transaction, whose snapshot includes the jobs claimed by the
+        # worker which held the lock last
+        cr.commit()
+        cr.execute(
+            "SELECT pg_try_advisory_xact_lock(hashtext(%s), hashtext(%s))",
+            (self._name, stage),
+        )
+        if not cr.fetchone()[0]:
+            return self.browse()
+
+        jobs = self.browse()
+        running = self.search_count([("stage", "=", stage), ("state", "=", "running")])
+        limit = min(batch_size, concurrency - running)
+        if limit > 0:
+            cr.execute(
+                """
+                SELECT id FROM llm_pipeline_job
+                WHERE state = 'pending' AND stage = %s AND scheduled_at <= %s
+                ORDER BY priority, scheduled_at, id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+                """,
+                (stage, fields.Datetime.now(), limit),
+            )
+            jobs = self.browse([row[0] for row in cr.fetchall()])
+            if jobs:
+                jobs.write({"state": "running", "started_at": fields.Datetime.now()})
+        # Releases the lock
+        cr.commit()
+        return jobs
+
+    def _run(self):
+        """Run the stage of jobs of the same stage and queue the next ones
+
+        Jobs whose resource already went past the stage are done, and jobs
+        whose resource is locked by another process are postponed without
+        counting an attempt.
+        """
+        stage = self[0].stage
+        start = time.monotonic()
+        moved_on = self.filtered(lambda j: j.resource_id._get_pipeline_stage() != stage)
+        locked = (self - moved_on).filtered(lambda j: j.resource_id._is_locked())
+        jobs = self - moved_on - locked
+        moved_on._mark_done(0.0)
+        locked.write(
+            {
+                "state": "pending",
+                "started_at": False,
+                "scheduled_at": fields.Datetime.now()
+                + timedelta(seconds=RETRY_BACKOFF_BASE),
+            }
+        )
+        self.env.cr.commit()
+        if not jobs:
+            return
+
+        error = None
+        try:
+            jobs.resource_id._run_pipeline_stage(stage)
+            self.env.cr.commit()
+        except Exception as e:
+            self.env.cr.rollback()
+            _logger.exception(f"Pipeline stage {stage} failed")
+            error = str(e)
+        duration = (time.monotonic() - start) / len(jobs)
+
+        completed = jobs.filtered(
+            lambda j: j.resource_id._get_pipeline_stage() != stage
+        )
+        completed._mark_done(duration)
+        (jobs - completed)._retry(
+            error or _("The resource did not leave the %s stage.") % stage
+        )
+        self.env.cr.commit()
+
+    def _mark_done(self, duration):
+        """Mark jobs as done and queue the next stage of their resources"""
+        if not self:
+            return
+        self.write(
+            {
+                "state": "done",
+                "finished_at": fields.Datetime.now(),
+                "duration": duration,
+            }
+        )
+        for job in self:
+            job.resource_id._enqueue_pipeline_job(priority=job.priority)
+
+    def _retry(self, error):
+        """Schedule jobs again with an exponential backoff, or fail them once
+        out of attempts"""
+        now = fields.Datetime.now()
+        for job in self:
+            attempts = job.attempts + 1
+            vals = {"attempts": attempts, "last_error": error, "started_at": False}
+            if attempts >= job.max_attempts:
+                vals.update(state="failed", finished_at=now)
+            else:
+                delay = min(RETRY_BACKOFF_BASE * 2 ** (attempts - 1), RETRY_BACKOFF_MAX)
+                vals.update(
+                    state="pending", scheduled_at=now + timedelta(seconds=delay)
+                )
+            job.write(vals)
+
+    def action_retry(self):
+        self.filtered(lambda j: j.state in ("failed", "cancelled")).write(
+            {
+                "state": "pending",
+                "attempts": 0,
+                "scheduled_at": fields.Datetime.now(),
+                "finished_at": False,
+            }
+        )
+        return True
+
+    def action_cancel(self):
+        self.filtered(lambda j: j.state == "pending").write({"state": "cancelled"})
+        return True
+
+    @api.autovacuum
+    def _gc_finished_jobs(self):
+        """Delete the jobs done or cancelled since
+        ``llm_resource.pipeline_job_retention_days``"""
+        days = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param(
+                "llm_resource.pipeline_job_retention_days", DEFAULT_JOB_RETENTION_DAYS
+            )
+        )
+        self.search(
+            [
+                ("state", "in", ("done", "cancelled")),
+                ("write_date", "<", fields.Datetime.now() - timedelta(days=days)),
+            ]
+        ).unlink()
@@ -1,3 +1,4 @@
+import hashlib
 import logging
 from datetime import timedelta
 
@@ -5,6 +6,9 @@ from odoo import _, api, fields, models
 
 _logger = logging.getLogger(__name__)
 
+# Locks older than this are considered left by a process which died
+STALE_LOCK_MINUTES = 10
+
 
 class LLMResource(models.Model):
     _name = "llm.resource"
@@ -49,6 +53,13 @@ class LLMResource(models.Model):
         string="Content",
         help="Markdown representation of the resource content",
     )
+    content_hash = fields.Char(
+        string="Content Fingerprint",
+        readonly=True,
+        copy=False,
+        help="SHA-256 of the content at its last parsing, used to skip the "
+        "processing of unchanged content",
+    )
     external_url = fields.Char(
         string="External URL",
         compute="_compute_external_url",
@@ -133,7 +144,7 @@ class LLMResource(models.Model):
         for record in self:
             record.kanban_state = "blocked" if record.lock_date else "normal"
 
-    def _lock(self, state_filter=None, stale_lock_minutes=10):
+    def _lock(self, state_filter=None, stale_lock_minutes=STALE_LOCK_MINUTES):
         """Lock resources for processing and return the ones successfully locked"""
         now = fields.Datetime.now()
         stale_lock_threshold = now - timedelta(minutes=stale_lock_minutes)
@@ -155,10 +166,29 @@ class LLMResource(models.Model):
 
         return unlocked_docs
 
+    def _is_locked(self):
+        """Whether the resource is being processed by another process"""
+        self.ensure_one()
+        stale_lock_threshold = fields.Datetime.now() - timedelta(
+            minutes=STALE_LOCK_MINUTES
+        )
+        return bool(self.lock_date and self.lock_date >= stale_lock_threshold)
+
     def _unlock(self):
         """Unlock resources after processing"""
         return self.write({"lock_date": False})
 
+    def _get_content_hash(self):
+        """Fingerprint of the current content of the resource"""
+        self.ensure_one()
+        return hashlib.sha256((self.content or "").encode()).hexdigest()
+
+    def _get_unchanged_content_state(self):
+        """State of a resource whose content is the same as at its last
+        parsing, so that the following stages are not run again."""
+        self.ensure_one()
+        return "parsed"
+
     def process_resource(self):
         """
         Process resources through retrieval and parsing.
@@ -177,6 +207,59 @@ class LLMResource(models.Model):
 
         return True
 
+    def _get_pipeline_stage(self):
+        """Next stage of the pipeline to run on the resource, False when
+        there is none"""
+        self.ensure_one()
+        return {"draft": "retrieve", "retrieved": "parse"}.get(self.state, False)
+
+    def _run_pipeline_stage(self, stage):
+        """Run a stage of the pipeline on the resources, see llm.pipeline.job"""
+        return getattr(self, stage)()
+
+    def _enqueue_pipeline_job(self, priority=10):
+        """Queue the next stage of the resources to be run in the background,
+        unless a job of theirs is already queued
+
+        Returns:
+            llm.pipeline.job recordset of the queued jobs
+        """
+        # Users only read jobs, queuing them is part of processing resources
+        Job = self.env["llm.pipeline.job"].sudo()
+        queued_ids = set(
+            Job.search(
+                [
+                    ("resource_id", "in", self.ids),
+                    ("state", "in", ("pending", "running")),
+                ]
+            ).resource_id.ids
+        )
+        vals_list = []
+        for resource in self:
+            stage = resource._get_pipeline_stage()
+            if stage and resource.id not in queued_ids:
+                vals_list.append(
+                    {"resource_id": resource.id, "stage": stage, "priority": priority}
+                )
+        return Job.create(vals_list) if vals_list else Job
+
+    def _notify_enqueued(self, jobs):
+        """Notification of resources queued for processing"""
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Resources Queued"),
+                "message": _(
+                    "%(queued)s of %(total)s resources queued for processing in "
+                    "the background, the others are already queued or processed."
+                )
+                % {"queued": len(jobs), "total": len(self)},
+                "type": "success",
+                "sticky": False,
+            },
+        }
+
     def action_open_resource(self):
         """Open the resource in form view."""
         self.ensure_one()
@@ -208,25 +291,8 @@ class LLMResource(models.Model):
             }
 
         resources = self.browse(active_ids)
-        # Process all selected resources
-        result = resources.process_resource()
-        if result:
-            return {
-                "type": "ir.actions.client",
-                "tag": "reload",
-            }
-
-        else:
-            return {
-                "type": "ir.actions.client",
-                "tag": "display_notification",
-                "params": {
-                    "title": _("Processing Failed"),
-                    "message": _("Mass processing resources failed"),
-                    "sticky": False,
-                    "type": "danger",
-                },
-            }
+        # Queue all selected resources, workers process them in the background
+        return resources._notify_enqueued(resources._enqueue_pipeline_job())
 
     def action_mass_unlock(self):
         """
@@ -2,16 +2,50 @@ import base64
 import logging
 import mimetypes
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urljoin, urlparse
 
 import requests
 from markdownify import markdownify as md
+from requests.adapters import HTTPAdapter
 
-from odoo import _, api, models
+from odoo import _, api, fields, models
 from odoo.exceptions import UserError
+from odoo.tools import split_every
 
 _logger = logging.getLogger(__name__)
 
+HTTP_TIMEOUT = 30
+HTTP_USER_AGENT = "Mozilla/5.0 (compatible; Odoo LLM Resource/1.0)"
+HTTP_NOT_MODIFIED = 304
+DEFAULT_HTTP_MAX_WORKERS = 8
+DEFAULT_HTTP_MAX_PER_HOST = 2
+# Resources downloaded ahead of their processing, bounding the memory held
+HTTP_PREFETCH_BATCH_SIZE = 50
+# Request headers only valid for the URL of the resource, not its refreshes
+CONDITIONAL_HEADERS = ("If-None-Match", "If-Modified-Since")
+
+_http_session = None
+_http_session_lock = threading.Lock()
+# Responses downloaded by the retrieve() call running in this thread
+_prefetched = threading.local()
+
+
+def get_http_session():
+    """Process wide requests session, so that connections to a host are kept
+    alive and reused across resources and retrievals."""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _http_session = session
+        return _http_session
+
+
 # Regex to find meta refresh tags
 # Handles single or double quotes around url and content values
 META_REFRESH_RE = re.compile(
@@ -23,6 +57,21 @@ META_REFRESH_RE = re.compile(
 class LLMResourceHTTPRetriever(models.Model):
     _inherit = "llm.resource"
 
+    http_etag = fields.Char(
+        string="HTTP ETag",
+        readonly=True,
+        copy=False,
+        help="ETag of the last download, sent back to only download the URL "
+        "again when it changed",
+    )
+    http_last_modified = fields.Char(
+        string="HTTP Last Modified",
+        readonly=True,
+        copy=False,
+        help="Last-Modified date of the last download, sent back to only "
+        "download the URL again when it changed",
+    )
+
     @api.model
     def _get_available_retrievers(self):
         """Get all available retriever methods"""
@@ -30,6 +79,125 @@ class LLMResourceHTTPRetriever(models.Model):
         retrievers.append(("http", "HTTP Retriever"))
         return retrievers
 
+    def retrieve(self):
+        """Download the URLs of HTTP resources concurrently, by batches, then
+        process them in turn"""
+        http_resources = self.filtered(
+            lambda r: r.state == "draft" and r.retriever == "http"
+        )
+        others = self - http_resources
+        result = super(LLMResourceHTTPRetriever, others).retrieve() if others else False
+        for batch_ids in split_every(HTTP_PREFETCH_BATCH_SIZE, http_resources.ids):
+            batch = self.browse(batch_ids)
+            previous = getattr(_prefetched, "responses", None)
+            _prefetched.responses = batch._http_prefetch()
+            try:
+                result = super(LLMResourceHTTPRetriever, batch).retrieve() or result
+            finally:
+                _prefetched.responses = previous
+        return result
+
+    def _http_prefetch(self):
+        """Fetch the URLs of the resources with a bounded pool of threads.
+
+        At most ``llm_resource.http_max_workers`` requests run at once, and
+        at most ``llm_resource.http_max_per_host`` per host. The threads do
+        not use the ORM, requests are prepared here.
+
+        Returns:
+            dict: {resource id: (response, final url) or the raised exception}
+        """
+        requests_by_resource = {}
+        for resource in self:
+            if resource.lock_date or resource.res_model not in self.env:
+                continue
+            record = self.env[resource.res_model].browse(resource.res_id)
+            if not record.exists() or not hasattr(record, "llm_get_retrieval_details"):
+                continue
+            retrieval_details = record.llm_get_retrieval_details()
+            if not retrieval_details or retrieval_details["type"] != "url":
+                continue
+            url = record[retrieval_details["field"]]
+            if url:
+                requests_by_resource[resource.id] = (
+                    url,
+                    resource._http_get_request_headers(retrieval_details, record),
+                )
+        if not requests_by_resource:
+            return {}
+
+        get_param = self.env["ir.config_parameter"].sudo().get_param
+        max_workers = int(
+            get_param("llm_resource.http_max_workers", DEFAULT_HTTP_MAX_WORKERS)
+        )
+        max_per_host = int(
+            get_param("llm_resource.http_max_per_host", DEFAULT_HTTP_MAX_PER_HOST)
+        )
+        host_slots = {
+            urlparse(url).netloc: threading.Semaphore(max(max_per_host, 1))
+            for url, _headers in requests_by_resource.values()
+        }
+
+        def fetch(url, headers):
+            with host_slots[urlparse(url).netloc]:
+                return self._http_fetch_final_response(url, headers)
+
+        results = {}
+        workers = max(min(max_workers, len(requests_by_resource)), 1)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(fetch, url, headers): resource_id
+                for resource_id, (url, headers) in requests_by_resource.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as err:
+                    results[futures[future]] = err
+        return results
+
+    def _http_get_request_headers(self, retrieval_details, record):
+        """Headers of the request downloading the resource.
+
+        The validators of the previous download are sent along, unless its
+        content is missing, so that an unchanged URL answers 304 Not Modified.
+        Neither the content nor the downloaded file are read to check it.
+        """
+        self.ensure_one()
+        headers = {"User-Agent": HTTP_USER_AGENT}
+        content_field = retrieval_details["target_fields"].get("content")
+        if not content_field:
+            has_file = False
+        elif record._name == "ir.attachment" and content_field in ("datas", "raw"):
+            has_file = bool(record.store_fname or record.file_size)
+        else:
+            # Size of binary fields instead of their data
+            has_file = bool(record.with_context(bin_size=True)[content_field])
+        if self._http_has_content() or has_file:
+            if self.http_etag:
+                headers["If-None-Match"] = self.http_etag
+            if self.http_last_modified:
+                headers["If-Modified-Since"] = self.http_last_modified
+        return headers
+
+    def _http_get_unchanged_state(self):
+        """State of a resource whose URL was not modified since its last
+        download, its content being kept as is."""
+        self.ensure_one()
+        if self._http_has_content():
+            return self._get_unchanged_content_state()
+        return "retrieved"
+
+    def _http_has_content(self):
+        """Whether the resource has a content, without loading it"""
+        self.ensure_one()
+        self.flush_recordset(["content"])
+        self.env.cr.execute(
+            "SELECT COALESCE(content, '') != '' FROM llm_resource WHERE id = %s",
+            (self.id,),
+        )
+        return self.env.cr.fetchone()[0]
+
     def retrieve_http(self, retrieval_details, record):
         """
         Implementation for HTTP retrieval when the attachment has an external URL
@@ -101,10 +269,18 @@ class LLMResourceHTTPRetriever(models.Model):
         :raises: requests.exceptions.RequestException on request failures
         """
         _logger.info(f"Fetching final response for URL: {initial_url}")
-        response = requests.get(
-            initial_url, timeout=30, headers=headers, allow_redirects=True
+        session = get_http_session()
+        response = session.get(
+            initial_url, timeout=HTTP_TIMEOUT, headers=headers, allow_redirects=True
         )
         response.raise_for_status()
+        if response.status_code == HTTP_NOT_MODIFIED:
+            return response, response.url
+        refresh_headers = {
+            key: value
+            for key, value in headers.items()
+            if key not in CONDITIONAL_HEADERS
+        }
 
         current_url = response.url
         if current_url != initial_url:
@@ -132,10 +308,10 @@ class LLMResourceHTTPRetriever(models.Model):
                             f"Detected meta refresh. Following from '{current_url}' to '{refresh_target_absolute}'"
                         )
 
-                        response = requests.get(
+                        response = session.get(
                             refresh_target_absolute,
-                            timeout=30,
-                            headers=headers,
+                            timeout=HTTP_TIMEOUT,
+                            headers=refresh_headers,
                             allow_redirects=True,
                         )
                         response.raise_for_status()
@@ -293,10 +469,31 @@ class LLMResourceHTTPRetriever(models.Model):
         _logger.info(
             f"Starting HTTP retrieval for {record.name} from initial URL: {initial_url}"
         )
-        headers = {"User-Agent": "Mozilla/5.0 (compatible; Odoo LLM Resource/1.0)"}
+        prefetched = getattr(_prefetched, "responses", None) or {}
+        if self.id in prefetched:
+            fetched = prefetched.pop(self.id)
+            if isinstance(fetched, Exception):
+                raise fetched
+            final_response, final_url = fetched
+        else:
+            headers = self._http_get_request_headers(retrieval_details, record)
+            final_response, final_url = self._http_fetch_final_response(
+                initial_url, headers
+            )
 
-        final_response, final_url = self._http_fetch_final_response(
-            initial_url, headers
+        if final_response.status_code == HTTP_NOT_MODIFIED:
+            self._post_styled_message(
+                f"Content of URL {initial_url} is unchanged since its last retrieval",
+                "info",
+            )
+            return {"state": self._http_get_unchanged_state()}
+
+        self.write(
+            {
+                "http_etag": final_response.headers.get("ETag") or False,
+                "http_last_modified": final_response.headers.get("Last-Modified")
+                or False,
+            }
         )
 
         file_details = self._http_determine_file_details(final_response, final_url)
@@ -1,17 +1,20 @@
-import base64
+import hashlib
 import json
 import logging
-
-try:
-    import pymupdf
-except ImportError:
-    pymupdf = None
+from collections import defaultdict
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
 
+from .llm_pdf_pages import iter_page_texts, open_pdf
+
 _logger = logging.getLogger(__name__)
 
+# What the PDF parser does with embedded images, see _get_pdf_parse_options
+PDF_IMAGE_MODES = ("dedup", "all", "skip")
+DEFAULT_PDF_IMAGES = "dedup"
+DEFAULT_PDF_PAGE_BATCH_SIZE = 20
+
 
 class LLMResourceParser(models.Model):
     _inherit = "llm.resource"
@@ -41,6 +44,7 @@ class LLMResourceParser(models.Model):
             return False
 
         for resource in resources:
+            previous_hash = resource.content_hash
             try:
                 # Get the related record
                 record = self.env[resource.res_model].browse(resource.res_id)
@@ -59,11 +63,18 @@ class LLMResourceParser(models.Model):
                     success = resource._parse_field(record, field)
 
                 if success:
-                    resource.write({"state": "parsed"})
+                    content_hash = resource._get_content_hash()
+                    if content_hash == previous_hash:
+                        # Same content as the last parsing, keep what the
+                        # following stages already produced from it
+                        state = resource._get_unchanged_content_state()
+                        message = "Resource content unchanged since last parsing"
+                    else:
+                        state = "parsed"
+                        message = "Resource successfully parsed"
+                    resource.write({"state": state, "content_hash": content_hash})
                     self.env.cr.commit()
-                    resource._post_styled_message(
-                        "Resource successfully parsed", "success"
-                    )
+                    resource._post_styled_message(message, "success")
                 else:
                     resource._post_styled_message(
                         "Parsing completed but did not return success", "warning"
@@ -112,6 +123,13 @@ class LLMResourceParser(models.Model):
         else:
             return self._parse_default
 
+    def _get_field_rawcontent(self, field):
+        """Raw content of a field, read from its file when it was not loaded"""
+        if field.get("rawcontent") is None and field.get("filepath"):
+            with open(field["filepath"], "rb") as file:
+                return file.read()
+        return field["rawcontent"]
+
     def _parse_field(self, record, field):
         self.ensure_one()
         parser_method = self._get_parser(record, field["field_name"], field["mimetype"])
@@ -223,74 +241,171 @@ class LLMResourceParser(models.Model):
 
         return True
 
+    def _get_pdf_parse_options(self):
+        """Settings of the PDF parser, from system parameters:
+
+        - ``llm_resource.pdf_images``: "dedup" to attach each distinct image
+          once, "all" to attach every occurrence, "skip" to ignore images
+        - ``llm_resource.pdf_max_pages``: pages parsed, 0 for all
+        - ``llm_resource.pdf_max_page_chars``: characters kept per page,
+          0 for all
+        - ``llm_resource.pdf_max_page_images``: images kept per page,
+          0 for all
+        - ``llm_resource.pdf_page_batch_size``: pages read at once
+        - ``llm_resource.pdf_workers``: processes extracting page texts,
+          0 to extract them in the worker itself
+        """
+        get_param = self.env["ir.config_parameter"].sudo().get_param
+        images = get_param("llm_resource.pdf_images", DEFAULT_PDF_IMAGES)
+        if images not in PDF_IMAGE_MODES:
+            images = DEFAULT_PDF_IMAGES
+        return {
+            "images": images,
+            "max_pages": int(get_param("llm_resource.pdf_max_pages", 0)),
+            "max_page_chars": int(get_param("llm_resource.pdf_max_page_chars", 0)),
+            "max_page_images": int(get_param("llm_resource.pdf_max_page_images", 0)),
+            "batch_size": int(
+                get_param(
+                    "llm_resource.pdf_page_batch_size", DEFAULT_PDF_PAGE_BATCH_SIZE
+                )
+            ),
+            "workers": int(get_param("llm_resource.pdf_workers", 0)),
+        }
+
     def _parse_pdf(self, record, field):
-        """Parse PDF file and extract text and images"""
-        # Decode attachment data
+        """Parse PDF file and extract text and images
 
+        Pages are read in batches and their images attached as they are
+        parsed, so that neither the whole document nor all of its images are
+        held in memory. The text of the batches is collected and written to
+        the content once. See _get_pdf_parse_options for the settings.
+        """
         if field["mimetype"] != "application/pdf":
             return False
 
-        # Open PDF using PyMuPDF
-        text_content = []
-        image_count = 0
-        page_count = 0
-        # no need to decode as passing raw data should work here
-        pdf_data = field["rawcontent"]
+        options = self._get_pdf_parse_options()
+        # Files of the filestore are opened from disk instead of being loaded
+        source = field.get("filepath") or field["rawcontent"]
+        image_refs = {}
+        if options["images"] == "dedup":
+            image_refs = self._get_pdf_known_images()
+        parts = []
 
-        # Create a BytesIO object from the PDF data
-        with pymupdf.open(stream=pdf_data, filetype="pdf") as doc:
-            # Store page count before document is closed
+        with open_pdf(source) as doc:
             page_count = doc.page_count
+            if options["max_pages"]:
+                page_count = min(page_count, options["max_pages"])
+
+            for start, texts in iter_page_texts(
+                doc,
+                source,
+                page_count,
+                options["batch_size"],
+                max_chars=options["max_page_chars"],
+                workers=options["workers"],
+            ):
+                page_images = self._pdf_attach_page_images(
+                    record, doc, start, start + len(texts), options, image_refs
+                )
+                for page_num, text in enumerate(texts, start):
+                    parts.append(f"## Page {page_num + 1}\n\n{text}")
+                    for image_name, image_url in page_images.get(page_num, []):
+                        parts.append(f"\n![{image_name}]({image_url})\n")
 
-            # Process each page
-            for page_num in range(page_count):
-                page = doc[page_num]
-
-                # Extract text
-                text = page.get_text()
-                text_content.append(f"## Page {page_num + 1}\n\n{text}")
-
-                # Extract images
-                image_list = page.get_images(full=True)
-                for img_index, img in enumerate(image_list):
-                    xref = img[0]
-                    try:
-                        base_image = doc.extract_image(xref)
-                        if base_image:
-                            # Store image as attachment
-                            image_data = base_image["image"]
-                            image_ext = base_image["ext"]
-                            image_name = f"image_{page_num}_{img_index}.{image_ext}"
-
-                            # Create attachment for the image
-                            img_attachment = record.env["ir.attachment"].create(
-                                {
-                                    "name": image_name,
-                                    "datas": base64.b64encode(image_data),
-                                    "res_model": "llm.resource",
-                                    "res_id": self.id,
-                                    "mimetype": f"image/{image_ext}",
-                                }
-                            )
-
-                            # Add image reference to markdown content
-                            if img_attachment:
-                                image_url = f"/web/image/{img_attachment.id}"
-                                text_content.append(f"\n![{image_name}]({image_url})\n")
-                                image_count += 1
-                    except Exception as e:
-                        self._post_styled_message(
-                            f"Error extracting image: {str(e)}", "warning"
-                        )
-
-        # Join all content
-        final_content = "\n\n".join(text_content)
-
-        # Update resource with extracted content
-        self.content = final_content
-
+        self.content = "\n\n".join(parts)
         return True
 
+    def _get_pdf_known_images(self):
+        """(name, url) of the images already attached to the resource, by
+        checksum, so that parsing it again does not duplicate them"""
+        attachments = self.env["ir.attachment"].search(
+            [
+                ("res_model", "=", "llm.resource"),
+                ("res_id", "=", self.id),
+                ("mimetype", "=like", "image/%"),
+            ]
+        )
+        return {
+            attachment.checksum: (attachment.name, f"/web/image/{attachment.id}")
+            for attachment in attachments
+        }
+
+    def _pdf_attach_page_images(self, record, doc, start, end, options, image_refs):
+        """Attach the images of the pages [start, end) with a single create
+
+        When the images option is "dedup", images are looked up by xref and
+        by checksum in ``image_refs``, which is updated with the new ones.
+
+        Returns:
+            dict: {page number: [(image name, image url)]}
+        """
+        if options["images"] == "skip":
+            return {}
+        dedup = options["images"] == "dedup"
+        # Known (name, url) or index in new_images of the images of each page
+        page_images = defaultdict(list)
+        new_images = []
+        new_index = {}
+        for page_num in range(start, end):
+            image_list = doc[page_num].get_images(full=True)
+            if options["max_page_images"]:
+                image_list = image_list[: options["max_page_images"]]
+            for img_index, img in enumerate(image_list):
+                xref = img[0]
+                if dedup and xref in image_refs:
+                    page_images[page_num].append(image_refs[xref])
+                    continue
+                if dedup and xref in new_index:
+                    page_images[page_num].append(new_index[xref])
+                    continue
+                try:
+                    base_image = doc.extract_image(xref)
+                except Exception as e:
+                    self._post_styled_message(
+                        f"Error extracting image: {str(e)}", "warning"
+                    )
+                    continue
+                if not base_image:
+                    continue
+                image_data = base_image["image"]
+                checksum = hashlib.sha1(image_data).hexdigest()
+                if dedup and checksum in image_refs:
+                    image_refs[xref] = image_refs[checksum]
+                    page_images[page_num].append(image_refs[checksum])
+                    continue
+                if dedup and checksum in new_index:
+                    new_index[xref] = new_index[checksum]
+                    page_images[page_num].append(new_index[checksum])
+                    continue
+                image_ext = base_image["ext"]
+                if dedup:
+                    new_index[xref] = new_index[checksum] = len(new_images)
+                page_images[page_num].append(len(new_images))
+                new_images.append(
+                    {
+                        "name": f"image_{page_num}_{img_index}.{image_ext}",
+                        # raw avoids a base64 copy of the image
+                        "raw": image_data,
+                        "res_model": "llm.resource",
+                        "res_id": self.id,
+                        "mimetype": f"image/{image_ext}",
+                    }
+                )
+
+        new_refs = []
+        if new_images:
+            attachments = record.env["ir.attachment"].create(new_images)
+            new_refs = [
+                (vals["name"], f"/web/image/{attachment.id}")
+                for vals, attachment in zip(new_images, attachments)  # noqa: B905
+            ]
+        for key, index in new_index.items():
+            image_refs[key] = new_refs[index]
+        return {
+            page_num: [new_refs[ref] if isinstance(ref, int) else ref for ref in refs]
+            for page_num, refs in page_images.items()
+        }
+
     def _parse_text(self, _, field):
         self.content = field["rawcontent"]
         return True
@@ -19,6 +19,7 @@
         "security/ir.model.access.csv",
         "views/llm_store_views.xml",
         "views/llm_store_menu_views.xml",
+        "data/ir_cron.xml",
     ],
     "license": "LGPL-3",
     "installable": True,
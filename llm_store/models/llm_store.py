@@ -1,8 +1,24 @@
+import hashlib
+import heapq
+import itertools
+import logging
 import re
+from contextlib import contextmanager
 
-from odoo import _, api, fields, models
+from odoo import _, api, fields, models, tools
 from odoo.exceptions import UserError
 
+from odoo.addons.llm.models.llm_client_registry import LLMClientRegistry
+
+_logger = logging.getLogger(__name__)
+
+# Clients and collection handles of the stores, shared across calls and
+# threads, see _get_cached_client
+store_client_registry = LLMClientRegistry(max_size=256)
+
+# Fields changing how store clients are built
+CONNECTION_FIELDS = {"service", "connection_uri", "api_key"}
+
 
 class LLMStore(models.Model):
     _name = "llm.store"
@@ -24,6 +40,32 @@ class LLMStore(models.Model):
     # Additional metadata
     metadata = fields.Json(string="Store Metadata")
 
+    # Health of the connection, refreshed by a scheduled action
+    connection_status = fields.Selection(
+        [
+            ("unknown", "Unknown"),
+            ("ok", "Reachable"),
+            ("error", "Unreachable"),
+        ],
+        default="unknown",
+        readonly=True,
+        copy=False,
+    )
+    connection_checked_at = fields.Datetime(
+        string="Connection Checked On", readonly=True, copy=False
+    )
+    connection_error = fields.Char(readonly=True, copy=False)
+
+    def write(self, vals):
+        res = super().write(vals)
+        if CONNECTION_FIELDS & set(vals):
+            store_client_registry.invalidate(self.env.cr.dbname, self.ids)
+        return res
+
+    def unlink(self):
+        store_client_registry.invalidate(self.env.cr.dbname, self.ids)
+        return super().unlink()
+
     def _dispatch(self, method, *args, **kwargs):
         """Dispatch method call to appropriate service implementation"""
         if not self.service:
@@ -37,6 +79,106 @@ class LLMStore(models.Model):
 
         return getattr(self, service_method)(*args, **kwargs)
 
+    # Client Management
+    def _get_client_key(self, *extra):
+        """Build the registry key of a client or handle of this store.
+
+        The api key is hashed so that secrets are not kept as dict keys, and
+        any credential or endpoint change results in a new client even in
+        workers which did not see the write.
+        """
+        self.ensure_one()
+        api_key_hash = hashlib.sha256((self.api_key or "").encode()).hexdigest()
+        return (
+            self.env.cr.dbname,
+            self.id,
+            self.service,
+            api_key_hash,
+            self.connection_uri or "",
+            *extra,
+        )
+
+    def _get_cached_client(self, factory, *extra):
+        """Return the object cached for this store under ``extra``, building
+        it with ``factory`` if needed.
+
+        Store clients are thread safe, so a single instance per store is
+        shared by every call of the worker. ``extra`` identifies other
+        objects of the store, such as collection handles. ``None`` results
+        are not cached.
+        """
+        return store_client_registry.get(self._get_client_key(*extra), factory)
+
+    def _forget_cached_client(self, *extra):
+        """Drop the object cached for this store under ``extra``."""
+        store_client_registry.discard(self._get_client_key(*extra))
+
+    def _collection_exists_cached(self, collection_name, check):
+        """Existence of a collection, only checked until it is found.
+
+        The memo is expired explicitly, by `_forget_collection` when the
+        collection is deleted, and when an operation on the collection fails
+        in workers which did not delete it, see `_forget_collection_on_error`.
+
+        Args:
+            collection_name: Name of the collection in the store
+            check: Callable asking the store whether the collection exists
+        """
+        return bool(
+            self._get_cached_client(
+                lambda: check() or None, "collection_exists", collection_name
+            )
+        )
+
+    def _forget_collection(self, collection_name):
+        """Forget the memoized state of a deleted collection."""
+        self._forget_cached_client("collection_exists", collection_name)
+        self._forget_cached_client("collection", collection_name)
+
+    @contextmanager
+    def _forget_collection_on_error(self, collection_id):
+        """Forget the memoized state of a collection when an operation on it
+        fails, as it may have been deleted elsewhere"""
+        try:
+            yield
+        except Exception:
+            self._forget_collection(self.get_santized_collection_name(collection_id))
+            raise
+
+    # Health Checks
+    def _check_connection(self):
+        """Check the connection of each store with `<service>_check_connection`
+
+        Clients are not checked when they are used, so a broken connection
+        is reported here and its cached client dropped to be rebuilt.
+        """
+        for store in self:
+            if not store.service or not hasattr(
+                store, f"{store.service}_check_connection"
+            ):
+                continue
+            try:
+                store._dispatch("check_connection")
+            except Exception as err:
+                _logger.warning(f"Store {store.name} is unreachable: {err}")
+                store_client_registry.invalidate(store.env.cr.dbname, store.ids)
+                vals = {"connection_status": "error", "connection_error": str(err)}
+            else:
+                vals = {"connection_status": "ok", "connection_error": False}
+            vals["connection_checked_at"] = fields.Datetime.now()
+            store.write(vals)
+        return True
+
+    @api.model
+    def _cron_check_connections(self):
+        """Check the connection of every active store. Called by a scheduled
+        action."""
+        return self.search([])._check_connection()
+
+    def action_check_connection(self):
+        self._check_connection()
+        return True
+
     @api.model
     def _selection_service(self):
         """Get all available services from store implementations"""
@@ -77,7 +219,10 @@ class LLMStore(models.Model):
         Returns:
             Boolean indicating success
         """
-        return self._dispatch("delete_collection", collection_id, **kwargs)
+        self.ensure_one()
+        result = self._dispatch("delete_collection", collection_id, **kwargs)
+        self._forget_collection(self.get_santized_collection_name(collection_id))
+        return result
 
     def list_collections(self, **kwargs):
         """List all collections
@@ -130,8 +275,10 @@ class LLMStore(models.Model):
         """Sanitize a collection name based on the store type."""
         return self._dispatch("sanitize_collection_name", name)
 
+    @tools.ormcache("self.service", "collection_id")
     def get_santized_collection_name(self, collection_id):
-        """Generate a sanitized collection name for the given ID."""
+        """Generate a sanitized collection name for the given ID, memoized
+        per service."""
         db_name = self.env.cr.dbname
         raw_name = f"odoo_{db_name}_{collection_id}"
         return self.sanitize_collection_name(raw_name)
@@ -152,9 +299,10 @@ class LLMStore(models.Model):
         Returns:
             List of inserted vector IDs
         """
-        return self._dispatch(
-            "insert_vectors", collection_id, vectors, metadata, ids, **kwargs
-        )
+        with self._forget_collection_on_error(collection_id):
+            return self._dispatch(
+                "insert_vectors", collection_id, vectors, metadata, ids, **kwargs
+            )
 
     def _delete_vectors(self, collection_id, ids, **kwargs):
         """Delete vectors from a collection
@@ -167,7 +315,8 @@ class LLMStore(models.Model):
         Returns:
             Number of vectors deleted
         """
-        return self._dispatch("delete_vectors", collection_id, ids, **kwargs)
+        with self._forget_collection_on_error(collection_id):
+            return self._dispatch("delete_vectors", collection_id, ids, **kwargs)
 
     def _search_vectors(
         self, collection_id, query_vector, limit=10, filter=None, **kwargs
@@ -184,9 +333,94 @@ class LLMStore(models.Model):
         Returns:
             List of search results (vector IDs, scores, and metadata)
         """
-        return self._dispatch(
-            "search_vectors", collection_id, query_vector, limit, filter, **kwargs
+        with self._forget_collection_on_error(collection_id):
+            return self._dispatch(
+                "search_vectors", collection_id, query_vector, limit, filter, **kwargs
+            )
+
+    def _search_vectors_multi(
+        self, collection_ids, query_vector, limit=10, filter=None, **kwargs
+    ):
+        """Search for similar vectors in several collections of this store
+
+        The collections must share the embedding model of query_vector.
+        Stores may implement `<service>_search_vectors_multi` to answer with
+        a single request, otherwise each collection is searched in turn and
+        the results are merged.
+
+        Args:
+            collection_ids: IDs of the collections
+            query_vector: Query vector to search for
+            limit: Maximum number of results to return
+            filter: Optional metadata filter expression
+            **kwargs: Additional store-specific parameters
+
+        Returns:
+            List of search results, best score first, once per vector ID
+        """
+        if self.service and hasattr(self, f"{self.service}_search_vectors_multi"):
+            return self._dispatch(
+                "search_vectors_multi",
+                collection_ids,
+                query_vector,
+                limit,
+                filter,
+                **kwargs,
+            )
+        return self._merge_search_results(
+            [
+                self._search_vectors(
+                    collection_id, query_vector, limit=limit, filter=filter, **kwargs
+                )
+                for collection_id in collection_ids
+            ],
+            limit=limit,
+        )
+
+    @api.model
+    def _merge_search_results(self, result_lists, limit=None):
+        """K-way merge of search results each sorted by descending score
+
+        Results are ordered by score, then by ID, and a vector ID found in
+        several lists is only kept with its best score. Scores of all lists
+        must be on the same scale, such as similarities of the same metric.
+
+        Returns:
+            List of search results
+        """
+        sorted_lists = [
+            sorted(results, key=lambda r: (-r.get("score", 0.0), r.get("id")))
+            for results in result_lists
+        ]
+        merged = heapq.merge(
+            *sorted_lists, key=lambda r: (-r.get("score", 0.0), r.get("id"))
         )
+        seen = set()
+        unique = (
+            r for r in merged if r.get("id") not in seen and not seen.add(r.get("id"))
+        )
+        return list(itertools.islice(unique, limit or None))
+
+    def _supports_hybrid_search(self):
+        """Whether this store fuses lexical and vector rankings itself
+
+        Stores returning True accept ``query_text``, ``search_mode``,
+        ``vector_weight``, ``lexical_weight`` and ``rrf_k`` in
+        `_search_vectors_multi`, otherwise the caller ranks the full-text
+        matches and fuses them with the vector results.
+        """
+        return False
+
+    def _supports_keyset_search(self):
+        """Whether `_search_vectors_multi` accepts a ``search_after`` cursor
+
+        The cursor is the (score, vector ID) of a previous result, and only
+        results ranked after it, by descending score then ID, are returned.
+        ``search_depth`` is the number of results ranked before the cursor,
+        for stores whose index scans only reach a limited number of results.
+        Otherwise the caller fetches results from the start and skips them.
+        """
+        return False
 
     # Index Management
     def create_index(self, collection_id, index_type=None, **kwargs):
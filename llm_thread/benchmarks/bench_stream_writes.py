@@ -0,0 +1,124 @@
+"""
+Benchmark of the database writes and events of a streamed assistant message.
+
+Replays a stream of content chunks into ``create_message_from_stream`` and
+reports the writes of the message, the queries, the CPU time and the bytes
+of the events sent to the client, in two modes:
+
+- ``per-chunk``: the body is rendered and written for every chunk, and a
+  full ``message_format`` snapshot is sent instead of every delta, as
+  before the write buffer
+- ``buffered``: the flush settings of the thread, deltas being sent
+
+The stream is read from ``--recording``, a JSON lines file of provider
+chunks, or generated with ``--chunks`` markdown chunks.
+
+Usage:
+    python3 llm_thread/benchmarks/bench_stream_writes.py -c odoo.conf -d db \\
+        [--chunks 5000] [--recording stream.jsonl]
+
+Nothing is committed.
+"""
+
+import argparse
+import json
+import time
+
+import odoo
+from odoo import SUPERUSER_ID, api
+
+from odoo.addons.llm_mail_message_subtypes.const import LLM_ASSISTANT_SUBTYPE_XMLID
+from odoo.addons.llm_thread.models.llm_thread_utils import (
+    LLMStreamWriteBuffer,
+    LLMThreadUtils,
+)
+
+TOKENS = ["The ", "**total** ", "of ", "the ", "order ", "is ", "42", ".\n\n", "- "]
+
+
+def load_stream(args):
+    if args.recording:
+        with open(args.recording) as recording:
+            return [json.loads(line) for line in recording if line.strip()]
+    return [{"content": TOKENS[index % len(TOKENS)]} for index in range(args.chunks)]
+
+
+def replay(env, thread, chunks, per_chunk):
+    """Stream chunks into a new message, returning the measures of the run"""
+    Message = env["mail.message"]
+    writes = LLMStreamWriteBuffer.get_stats()["writes"]
+    queries = env.cr.sql_log_count
+    sent = 0
+    cpu = time.process_time()
+    start = time.perf_counter()
+
+    events = Message.create_message_from_stream(
+        thread, iter(chunks), LLM_ASSISTANT_SUBTYPE_XMLID
+    )
+    for event in events:
+        if per_chunk and event["type"] == "message_delta":
+            event = LLMThreadUtils.snapshot_event(
+                "message_update", Message.browse(event["message_id"]), event["seq"]
+            )
+        sent += len(json.dumps(event))
+    env.flush_all()
+
+    return {
+        "writes": LLMStreamWriteBuffer.get_stats()["writes"] - writes,
+        "queries": env.cr.sql_log_count - queries,
+        "cpu": time.process_time() - cpu,
+        "wall": time.perf_counter() - start,
+        "sent": sent,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-c", "--config")
+    parser.add_argument("-d", "--database", required=True)
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--recording")
+    args = parser.parse_args()
+
+    odoo.tools.config.parse_config(["-c", args.config] if args.config else [])
+    registry = odoo.registry(args.database)
+    chunks = load_stream(args)
+
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        model = env["llm.model"].search(
+            [("model_use", "in", ["chat", "multimodal"])], limit=1
+        )
+        if not model:
+            raise SystemExit("A chat model is needed to create the thread")
+        thread = env["llm.thread"].create(
+            {
+                "name": "Stream benchmark",
+                "provider_id": model.provider_id.id,
+                "model_id": model.id,
+            }
+        )
+        print(f"{len(chunks)} chunks")
+        buffered = {
+            "stream_flush_interval_ms": thread.stream_flush_interval_ms,
+            "stream_flush_chars": thread.stream_flush_chars,
+        }
+        for per_chunk in (True, False):
+            if per_chunk:
+                thread.write({"stream_flush_interval_ms": 0, "stream_flush_chars": 0})
+            else:
+                thread.write(buffered)
+            result = replay(env, thread, chunks, per_chunk)
+            mode = "per-chunk" if per_chunk else "buffered"
+            print(
+                f"{mode:>9}: {result['writes']} writes, {result['queries']} queries, "
+                f"{result['cpu']:.2f}s CPU, {result['wall']:.2f}s, "
+                f"{result['sent'] / 1024:.0f} KB sent"
+            )
+        cr.rollback()
+
+
+if __name__ == "__main__":
+    main()
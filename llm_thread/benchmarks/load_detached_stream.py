@@ -0,0 +1,162 @@
+"""
+Load test of streaming generations, with and without a long-lived cursor.
+
+Runs N generations at once against a mock provider streaming slowly, in
+each mode of ``llm.thread.stream_detached``, and reports the peak number of
+database connections of the database, and how many of them were idle in a
+transaction, sampled from pg_stat_activity.
+
+Usage:
+    python3 llm_thread/benchmarks/load_detached_stream.py -c odoo.conf -d db \\
+        [--streams 50] [--chunks 20] [--delay 0.1]
+
+Threads and messages created by the run are deleted at the end.
+"""
+
+import argparse
+import threading
+import time
+from unittest.mock import patch
+
+import odoo
+from odoo import SUPERUSER_ID, api
+
+from odoo.addons.llm_thread.models.llm_thread_detached import LLMDetachedGeneration
+
+
+def mock_stream(chunks, delay):
+    """Stream of a slow provider, as returned by llm.model.chat"""
+
+    def start_assistant_stream(thread):
+        def stream():
+            for index in range(chunks):
+                time.sleep(delay)
+                yield {"content": f"token {index} "}
+
+        return stream()
+
+    return start_assistant_stream
+
+
+def sample_connections(registry, stop, peaks):
+    """Record the peak connections and idle in transaction connections"""
+    with registry.cursor() as cr:
+        while not stop.is_set():
+            cr.execute(
+                """
+                SELECT count(*), count(*) FILTER (
+                    WHERE state = 'idle in transaction'
+                )
+                FROM pg_stat_activity
+                WHERE datname = current_database() AND pid != pg_backend_pid()
+                """
+            )
+            total, idle_in_transaction = cr.fetchone()
+            cr.rollback()
+            peaks["connections"] = max(peaks["connections"], total)
+            peaks["idle_in_transaction"] = max(
+                peaks["idle_in_transaction"], idle_in_transaction
+            )
+            time.sleep(0.02)
+
+
+def run_generation(registry, thread_id, detached, errors):
+    try:
+        if detached:
+            generation = LLMDetachedGeneration(registry, SUPERUSER_ID, {}, thread_id)
+            for _event in generation.generate("Hello"):
+                pass
+            return
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            for _event in env["llm.thread"].browse(thread_id).generate("Hello"):
+                pass
+    except Exception as e:
+        errors.append(e)
+
+
+def run(registry, thread_ids, detached):
+    stop = threading.Event()
+    peaks = {"connections": 0, "idle_in_transaction": 0}
+    errors = []
+    sampler = threading.Thread(target=sample_connections, args=(registry, stop, peaks))
+    sampler.start()
+    start = time.monotonic()
+    workers = [
+        threading.Thread(
+            target=run_generation, args=(registry, thread_id, detached, errors)
+        )
+        for thread_id in thread_ids
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    duration = time.monotonic() - start
+    stop.set()
+    sampler.join()
+    mode = "detached" if detached else "attached"
+    print(
+        f"{mode:>9}: {len(thread_ids)} streams in {duration:.1f}s, "
+        f"peak connections {peaks['connections']}, "
+        f"peak idle in transaction {peaks['idle_in_transaction']}, "
+        f"{len(errors)} errors"
+    )
+    for error in errors[:3]:
+        print(f"           {error!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-c", "--config")
+    parser.add_argument("-d", "--database", required=True)
+    parser.add_argument("--streams", type=int, default=50)
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.1)
+    args = parser.parse_args()
+
+    odoo.tools.config.parse_config(["-c", args.config] if args.config else [])
+    # Each stream and the sampler need their own connection
+    odoo.tools.config["db_maxconn"] = max(
+        odoo.tools.config["db_maxconn"], args.streams + 8
+    )
+    registry = odoo.registry(args.database)
+
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        model = env["llm.model"].search(
+            [("model_use", "in", ["chat", "multimodal"])], limit=1
+        )
+        if not model:
+            raise SystemExit("A chat model is needed to create the threads")
+        threads = env["llm.thread"].create(
+            [
+                {
+                    "name": f"Load test {index}",
+                    "provider_id": model.provider_id.id,
+                    "model_id": model.id,
+                }
+                for index in range(args.streams)
+            ]
+        )
+        thread_ids = threads.ids
+
+    try:
+        with patch.object(
+            registry["llm.thread"],
+            "_start_assistant_stream",
+            mock_stream(args.chunks, args.delay),
+        ):
+            for detached in (False, True):
+                run(registry, thread_ids, detached)
+    finally:
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            env["llm.thread"].browse(thread_ids).message_ids.unlink()
+            env["llm.thread"].browse(thread_ids).unlink()
+
+
+if __name__ == "__main__":
+    main()
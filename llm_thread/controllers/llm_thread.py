@@ -4,6 +4,8 @@ from odoo import _, api, http, registry
 from odoo.exceptions import MissingError
 from odoo.http import Response, request
 
+from ..models.llm_thread_detached import LLMDetachedGeneration
+
 
 class LLMThreadController(http.Controller):
     @http.route(
@@ -35,49 +37,77 @@ class LLMThreadController(http.Controller):
 
     def _llm_thread_generate(self, dbname, env, thread_id, user_message_body):
         """Generate LLM responses with streaming and safe yielding."""
-        with registry(dbname).cursor() as cr:
+        db_registry = registry(dbname)
+        with db_registry.cursor() as cr:
+            thread_env = api.Environment(cr, env.uid, env.context)
+            llmThread = thread_env["llm.thread"].browse(int(thread_id))
+            exists = bool(llmThread.exists())
+            detached = exists and llmThread.stream_detached
+        if not exists:
+            yield from self._safe_yield(
+                f"data: {json.dumps({'type': 'error', 'error': 'LLM Thread not found.'})}\n\n".encode()
+            )
+            return
+
+        if detached:
+            # No cursor is held while waiting on the provider, the
+            # generation opens short-lived ones to persist its messages
+            generation = LLMDetachedGeneration(
+                db_registry, env.uid, env.context, int(thread_id)
+            )
+            events = generation.generate(user_message_body)
+            yield from self._stream_events(events, events.close)
+            return
+
+        with db_registry.cursor() as cr:
             env = api.Environment(cr, env.uid, env.context)
             llmThread = env["llm.thread"].browse(int(thread_id))
-            if not llmThread.exists():
-                yield from self._safe_yield(
-                    f"data: {json.dumps({'type': 'error', 'error': 'LLM Thread not found.'})}\n\n".encode()
-                )
-                return
-
-            client_connected = True
-            try:
-                for response in llmThread.generate(user_message_body):
-                    json_data = json.dumps(response, default=str)
-                    success = yield from self._safe_yield(
-                        f"data: {json_data}\n\n".encode()
-                    )
-                    if not success:
-                        client_connected = False
-                        break
-
-            except GeneratorExit:
-                # Client disconnected explicitly
-                client_connected = False
-                if llmThread.exists() and llmThread._read_is_locked_decorated():
-                    llmThread._unlock()
-                return
 
-            except Exception as e:
+            def unlock():
                 if llmThread.exists() and llmThread._read_is_locked_decorated():
                     llmThread._unlock()
 
-                if client_connected:
-                    success = yield from self._safe_yield(
-                        f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n".encode()
-                    )
-                    if not success:
-                        client_connected = False
-
-            finally:
-                if client_connected:
-                    yield from self._safe_yield(
-                        f"data: {json.dumps({'type': 'done'})}\n\n".encode()
-                    )
+            yield from self._stream_events(
+                llmThread.generate(user_message_body), unlock
+            )
+
+    def _stream_events(self, events, on_abort):
+        """Send generation events to the client as SSE.
+
+        ``on_abort`` is called when the client disconnects or the generation
+        fails, to release the thread.
+        """
+        client_connected = True
+        try:
+            for response in events:
+                json_data = json.dumps(response, default=str)
+                success = yield from self._safe_yield(f"data: {json_data}\n\n".encode())
+                if not success:
+                    client_connected = False
+                    on_abort()
+                    break
+
+        except GeneratorExit:
+            # Client disconnected explicitly
+            client_connected = False
+            on_abort()
+            return
+
+        except Exception as e:
+            on_abort()
+
+            if client_connected:
+                success = yield from self._safe_yield(
+                    f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n".encode()
+                )
+                if not success:
+                    client_connected = False
+
+        finally:
+            if client_connected:
+                yield from self._safe_yield(
+                    f"data: {json.dumps({'type': 'done'})}\n\n".encode()
+                )
 
     @http.route("/llm/thread/generate", type="http", auth="user", csrf=True)
     def llm_thread_generate(self, thread_id, message=None, **kwargs):
@@ -1,16 +1,22 @@
 import functools
+import itertools
 import json
+from contextlib import nullcontext
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
 
 from odoo.addons.llm_mail_message_subtypes.const import (
+    LLM_ASSISTANT_ROLE,
     LLM_ASSISTANT_SUBTYPE_XMLID,
-    LLM_TOOL_RESULT_SUBTYPE_XMLID,
+    LLM_TOOL_ROLE,
     LLM_USER_SUBTYPE_XMLID,
 )
 
-from .llm_thread_utils import LLMThreadUtils
+from .llm_thread_utils import LLMStreamWriteBuffer, LLMThreadUtils
+
+# Tokens added by providers around each message (role, separators)
+MESSAGE_TOKEN_OVERHEAD = 4
 
 
 def execute_with_new_cursor(func_to_decorate):
@@ -86,6 +92,25 @@ class LLMThread(models.Model):
         help="Tools that can be used by the LLM in this thread",
     )
 
+    stream_flush_interval_ms = fields.Integer(
+        string="Stream Flush Interval (ms)",
+        default=250,
+        help="Maximum delay between two database writes of a message being streamed.",
+    )
+    stream_flush_chars = fields.Integer(
+        string="Stream Flush Size (chars)",
+        default=512,
+        help="Number of streamed characters after which the message is written "
+        "to the database, regardless of the flush interval.",
+    )
+    stream_detached = fields.Boolean(
+        string="Release Database Connection While Streaming",
+        default=True,
+        help="Consume the provider stream without an open transaction, using "
+        "short-lived cursors only to persist messages. Prevents long "
+        "generations from holding a database connection.",
+    )
+
     @api.model_create_multi
     def create(self, vals_list):
         """Set default title if not provided"""
@@ -133,12 +158,7 @@ class LLMThread(models.Model):
             mail.message recordset containing the messages
         """
         self.ensure_one()
-        subtypes_to_fetch = [
-            self.env.ref(LLM_USER_SUBTYPE_XMLID, raise_if_not_found=False),
-            self.env.ref(LLM_ASSISTANT_SUBTYPE_XMLID, raise_if_not_found=False),
-            self.env.ref(LLM_TOOL_RESULT_SUBTYPE_XMLID, raise_if_not_found=False),
-        ]
-        subtype_ids = [st.id for st in subtypes_to_fetch if st]
+        subtype_ids = list(self.env["mail.message"]._get_llm_subtype_xmlid_map())
         order_clause = f"create_date {order}, id {order}"
         domain = [
             ("model", "=", self._name),
@@ -151,6 +171,56 @@ class LLMThread(models.Model):
         )
         return messages
 
+    def _get_message_history_for_model(self, system_prompt=None):
+        """Get the most recent messages fitting the model's prompt token budget
+
+        Messages are walked from newest to oldest and counted with the model
+        tokenizer until the context window, minus the tokens reserved for the
+        output and the system prompt, is full. An assistant message with tool
+        calls and its tool results are kept or dropped together. The newest
+        message is always included. Without a known context window, the whole
+        history is returned.
+
+        Returns:
+            mail.message recordset in chronological order
+        """
+        self.ensure_one()
+        model = self.model_id
+        budget = model.get_prompt_token_budget()
+        if not budget:
+            return self._get_message_history_recordset()
+        if system_prompt:
+            budget -= model.count_tokens(system_prompt)
+
+        history = self._get_message_history_recordset(order="DESC")
+        roles = history._get_llm_roles()
+        selected_ids = []
+        used = 0
+        unit_ids, unit_tokens = [], 0
+        for message in history:
+            role = roles[message.id]
+            tokens = (
+                model.count_tokens(message._get_llm_history_text())
+                + MESSAGE_TOKEN_OVERHEAD
+            )
+            if role == LLM_TOOL_ROLE:
+                # Wait for the assistant message holding the tool call
+                unit_ids.append(message.id)
+                unit_tokens += tokens
+                continue
+            if unit_ids and not (role == LLM_ASSISTANT_ROLE and message.tool_calls):
+                # Tool results without their tool call would be dropped
+                unit_ids, unit_tokens = [], 0
+            unit_ids.append(message.id)
+            unit_tokens += tokens
+            if selected_ids and used + unit_tokens > budget:
+                break
+            selected_ids.extend(unit_ids)
+            used += unit_tokens
+            unit_ids, unit_tokens = [], 0
+
+        return self.env["mail.message"].browse(selected_ids[::-1])
+
     def _get_last_message_from_history(self):
         """Get the last message from the message history."""
         self.ensure_one()
@@ -185,71 +255,138 @@ class LLMThread(models.Model):
             return True
         return False
 
-    def _next_step(self, last_message):
-        """Dispatch to the next generator based on message type."""
-        if (
-            last_message.is_llm_user_message()
-            or last_message.is_llm_tool_result_message()
-        ):
-            return self._get_assistant_response()
-        if last_message.is_llm_assistant_message() and last_message.tool_calls:
-            return self._process_tool_calls(last_message)
-        return last_message
+    def _get_default_cursor_factory(self):
+        """Cursor factory of generations run in the environment of the
+        thread, see generate"""
+        env = self.env
+        return lambda: nullcontext(env)
 
-    def generate(self, user_message_body):
-        self.ensure_one()
-        if self.is_locked:
-            raise UserError(
-                _("This thread is already generating a response. Please wait.")
+    def _next_step(self, last_message_id, cursor_factory):
+        """Dispatch to the next generator based on message type.
+
+        Returns:
+            int: id of the message produced by the step
+        """
+        with cursor_factory() as env:
+            last_message = env["mail.message"].browse(last_message_id)
+            respond = (
+                last_message.is_llm_user_message()
+                or last_message.is_llm_tool_result_message()
+            )
+            tool_calls = last_message.is_llm_assistant_message() and bool(
+                last_message.tool_calls
             )
-        self._lock()
+        if respond:
+            message = yield from self._get_assistant_response(cursor_factory)
+            return message.id if message else None
+        if tool_calls:
+            return (
+                yield from self._process_tool_calls(last_message_id, cursor_factory)
+            )
+        return last_message_id
+
+    def generate(self, user_message_body, cursor_factory=None):
+        """Generate the response to user_message_body, or to the last message
+        of the thread, yielding UI events.
+
+        ``cursor_factory`` returns a context manager giving the environment
+        of each database access of the generation, by default the one of the
+        thread. Detached generations give a short-lived cursor each time,
+        see LLMDetachedGeneration, so that none is held while the provider
+        is waited on or events are sent. Records are browsed again in each
+        of these environments, only ids are kept across them.
+        """
+        self.ensure_one()
+        cursor_factory = cursor_factory or self._get_default_cursor_factory()
+        with cursor_factory() as env:
+            thread = self.with_env(env)
+            if thread.is_locked:
+                raise UserError(
+                    _("This thread is already generating a response. Please wait.")
+                )
+            thread._lock()
 
         try:
             # orchestrate via hooks
-            last = self._init_message(user_message_body)
-            if user_message_body:
-                yield {"type": "message_create", "message": last.message_format()[0]}
-            while self._should_continue(last):
-                last = yield from self._next_step(last)
-            return last
+            events = []
+            with cursor_factory() as env:
+                last = self.with_env(env)._init_message(user_message_body)
+                last_id = last.id
+                if user_message_body:
+                    events.append(
+                        LLMThreadUtils.snapshot_event("message_create", last, 0)
+                    )
+            yield from events
+            while last_id:
+                with cursor_factory() as env:
+                    last = env["mail.message"].browse(last_id)
+                    if not self.with_env(env)._should_continue(last):
+                        break
+                last_id = yield from self._next_step(last_id, cursor_factory)
+            return self.env["mail.message"].browse(last_id)
         finally:
-            self._unlock()
+            with cursor_factory() as env:
+                self.with_env(env)._unlock()
 
-    def _process_tool_calls(self, assistant_msg):
+    def _process_tool_calls(self, assistant_msg_id, cursor_factory):
         self.ensure_one()
-        defs = json.loads(assistant_msg.tool_calls or "[]")
-        last_tool_msg = None
+        with cursor_factory() as env:
+            assistant_msg = env["mail.message"].browse(assistant_msg_id)
+            defs = json.loads(assistant_msg.tool_calls or "[]")
+        last_tool_msg_id = None
         for tool_def in defs:
             last_tool_msg = yield from self.env["mail.message"].stream_llm_tool_result(
                 thread=self,
                 tool_call_def=tool_def,
+                cursor_factory=cursor_factory,
             )
-        return last_tool_msg
+            last_tool_msg_id = last_tool_msg.id
+        return last_tool_msg_id
 
     def _get_system_prompt(self):
         """Hook: return a system prompt for chat. Override in other modules. If needed"""
         self.ensure_one()
         return None
 
-    def _get_assistant_response(self):
+    def _start_assistant_stream(self):
+        """Send the history to the model and return its response stream."""
         self.ensure_one()
-        message_history_rs = self._get_message_history_recordset()
+        system_prompt = self._get_system_prompt()
+        message_history_rs = self._get_message_history_for_model(system_prompt)
         tool_rs = self.tool_ids
         chat_kwargs = {
             "messages": message_history_rs,
             "tools": tool_rs,
             "stream": True,
-            "system_prompt": self._get_system_prompt(),
+            "system_prompt": system_prompt,
         }
-        stream_response = self.model_id.chat(**chat_kwargs)
+        return self.model_id.chat(**chat_kwargs)
+
+    def _get_assistant_response(self, cursor_factory=None):
+        self.ensure_one()
+        cursor_factory = cursor_factory or self._get_default_cursor_factory()
+        with cursor_factory() as env:
+            # Providers may return a generator only sending the request when
+            # first read: its first chunk is read in this environment, the
+            # rest of the stream without one
+            stream_response = iter(self.with_env(env)._start_assistant_stream())
+            stream_response = itertools.chain(
+                [next(stream_response, {})], stream_response
+            )
         assistant_msg = yield from self.env["mail.message"].create_message_from_stream(
             self,
             stream_response,
             LLM_ASSISTANT_SUBTYPE_XMLID,
             placeholder_text="Thinking...",
+            cursor_factory=cursor_factory,
         )
         return assistant_msg
 
+    @api.model
+    def get_stream_write_stats(self):
+        """Return the process wide counters of coalesced streaming writes."""
+        return LLMStreamWriteBuffer.get_stats()
+
     def _execute_tool(self, tool_name, arguments_str):
         """Execute a tool and return the result."""
         self.ensure_one()
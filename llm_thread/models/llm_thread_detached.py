@@ -0,0 +1,44 @@
+"""
+Generation of thread responses without a long-lived database cursor.
+
+``llm.thread.generate`` runs in the cursor of the thread by default, for the
+whole generation, including the time spent waiting on the provider, so every
+streaming chat holds a database connection. Here the same generation is run
+with a cursor factory opening short-lived cursors, only to run the thread
+hooks, create messages, persist their coalesced content and execute tools.
+The provider stream is consumed and events are sent with no open transaction.
+"""
+
+from contextlib import contextmanager
+
+from odoo import api
+
+
+class LLMDetachedGeneration:
+    """Cursor factory of a generation run without a long-lived cursor.
+
+    Yields the same UI events as ``llm.thread.generate``, which it runs, so
+    that overrides of the generation methods of the thread apply.
+    """
+
+    def __init__(self, registry, uid, context, thread_id):
+        self.registry = registry
+        self.uid = uid
+        self.context = context
+        self.thread_id = thread_id
+
+    @contextmanager
+    def environment(self):
+        """Environment on a new cursor, committed when leaving the block."""
+        with self.registry.cursor() as cr:
+            yield api.Environment(cr, self.uid, self.context)
+
+    def generate(self, user_message_body):
+        with self.environment() as env:
+            thread = env["llm.thread"].browse(self.thread_id)
+        # The thread is only used through environments of the factory
+        return (
+            yield from thread.generate(
+                user_message_body, cursor_factory=self.environment
+            )
+        )
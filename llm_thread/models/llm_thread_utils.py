@@ -2,6 +2,11 @@
 Utility helper for LLM message construction and formatting.
 """
 
+import json
+import logging
+import threading
+import time
+
 import emoji
 import markdown2
 
@@ -10,6 +15,8 @@ from odoo.addons.llm_mail_message_subtypes.const import (
     LLM_TOOL_RESULT_SUBTYPE_XMLID,
 )
 
+_logger = logging.getLogger(__name__)
+
 
 class LLMThreadUtils:
     @staticmethod
@@ -55,3 +62,204 @@ class LLMThreadUtils:
             }
             return {k: v for k, v in vals.items() if v is not None}
         return {}
+
+    @staticmethod
+    def snapshot_event(event_type, message, seq):
+        """Full ``message_format`` payload, sent when a message is created
+        and once its stream is over."""
+        return {
+            "type": event_type,
+            "seq": seq,
+            "message": message.message_format()[0],
+        }
+
+    @staticmethod
+    def delta_event(message_id, seq, delta):
+        """Text appended to the message body since the previous event."""
+        return {
+            "type": "message_delta",
+            "message_id": message_id,
+            "seq": seq,
+            "delta": delta,
+        }
+
+    @staticmethod
+    def patch_event(message_id, seq, changes):
+        """Only the message fields which changed since the previous event."""
+        return {
+            "type": "message_patch",
+            "message_id": message_id,
+            "seq": seq,
+            "changes": changes,
+        }
+
+    @staticmethod
+    def stream_to_message(stream, buffer, post_message, final_event):
+        """Stream provider chunks (content/tool_calls/error) into a message.
+
+        The database is only reached through the callbacks, so that no
+        cursor needs to be open while the stream is read:
+
+        - ``post_message()`` creates the message once content or tool calls
+          arrive, binds ``buffer`` to it and returns (message id,
+          ``message_create`` event)
+        - ``buffer`` is the LLMStreamWriteBuffer coalescing the writes of
+          the body and tool calls, closed on error and at the end. Events
+          are sent for every change, whether it was written or not
+        - ``final_event(message_id, seq)`` returns the ``message_update``
+          event sent once the stream is over
+
+        Yields UI events, and finally returns the message id, None if
+        nothing was streamed or the provider reported an error.
+        """
+        message_id = None
+        seq = 0
+        acc, calls = "", []
+
+        def render_body():
+            return markdown2.markdown(acc)
+
+        for chunk in stream:
+            if message_id is None and (chunk.get("content") or chunk.get("tool_calls")):
+                message_id, event = post_message()
+                yield event
+
+            if chunk.get("content"):
+                acc += chunk["content"]
+                seq += 1
+                yield LLMThreadUtils.delta_event(message_id, seq, chunk["content"])
+                buffer.add({"body": render_body}, size=len(chunk["content"]))
+
+            valid = [
+                c
+                for c in chunk.get("tool_calls") or []
+                if isinstance(c, dict) and c.get("id")
+            ]
+            if valid:
+                calls.extend(valid)
+                tool_calls = json.dumps(calls)
+                # The client gets every change, the buffer only decides
+                # when it is written
+                seq += 1
+                yield LLMThreadUtils.patch_event(
+                    message_id, seq, {"tool_calls": tool_calls}
+                )
+                buffer.add({"tool_calls": tool_calls})
+
+            if chunk.get("error"):
+                if message_id is not None:
+                    buffer.close()
+                yield {"type": "error", "error": chunk["error"]}
+                return None
+
+        if message_id is None:
+            return None
+
+        buffer.close()
+        yield final_event(message_id, seq + 1)
+        return message_id
+
+
+class LLMStreamWriteBuffer:
+    """Coalesce the writes done on a message while its content is streamed.
+
+    Values are accumulated with ``add`` and written in a single ``write``
+    once ``flush_interval_ms`` elapsed or ``flush_chars`` characters were
+    buffered since the last flush. Values may be callables, they are only
+    evaluated when flushed (e.g. to render markdown once per write).
+    ``close`` must be called to guarantee the final flush. With a
+    ``cursor_factory``, see ``llm.thread.generate``, each write is done in
+    an environment of its own and only the id of the message is kept.
+
+    Process wide counters of requested updates and actual writes are kept
+    in ``stats`` to help tuning the thresholds under load.
+    """
+
+    stats = {"messages": 0, "updates": 0, "writes": 0}
+    _stats_lock = threading.Lock()
+
+    def __init__(
+        self, message=None, flush_interval_ms=250, flush_chars=512, cursor_factory=None
+    ):
+        self.message = message
+        self.message_id = message.id if message else None
+        self.cursor_factory = cursor_factory
+        self.flush_interval_ms = flush_interval_ms
+        self.flush_chars = flush_chars
+        self.pending = {}
+        self.pending_chars = 0
+        self.updates = 0
+        self.writes = 0
+        self.last_flush = time.monotonic()
+
+    def bind(self, message):
+        """Write to ``message``, when the buffer is created before it."""
+        self.message = message
+        self.message_id = message.id
+
+    @property
+    def writes_saved(self):
+        return self.updates - self.writes
+
+    def _is_due(self):
+        if self.flush_chars and self.pending_chars >= self.flush_chars:
+            return True
+        elapsed_ms = (time.monotonic() - self.last_flush) * 1000
+        return elapsed_ms >= (self.flush_interval_ms or 0)
+
+    def add(self, vals, size=0):
+        """Buffer ``vals`` and flush them if a threshold is reached.
+
+        Returns:
+            bool: True if the buffer was written to the message
+        """
+        self.pending.update(vals)
+        self.pending_chars += size
+        self.updates += 1
+        if self._is_due():
+            return self.flush()
+        return False
+
+    def flush(self):
+        """Write pending values to the message, if any."""
+        self.last_flush = time.monotonic()
+        self.pending_chars = 0
+        if not self.pending:
+            return False
+        vals = {
+            key: value() if callable(value) else value
+            for key, value in self.pending.items()
+        }
+        self.pending = {}
+        self._write(vals)
+        self.writes += 1
+        return True
+
+    def _write(self, vals):
+        if not self.cursor_factory:
+            self.message.write(vals)
+            return
+        with self.cursor_factory() as env:
+            env["mail.message"].browse(self.message_id).write(vals)
+
+    def close(self):
+        """Final flush, recording the counters of this buffer."""
+        flushed = self.flush()
+        with self._stats_lock:
+            self.stats["messages"] += 1
+            self.stats["updates"] += self.updates
+            self.stats["writes"] += self.writes
+        _logger.debug(
+            "Streamed message %s: %s updates coalesced into %s writes",
+            self.message_id,
+            self.updates,
+            self.writes,
+        )
+        return flushed
+
+    @classmethod
+    def get_stats(cls):
+        with cls._stats_lock:
+            stats = dict(cls.stats)
+        stats["writes_saved"] = stats["updates"] - stats["writes"]
+        return stats
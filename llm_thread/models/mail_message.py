@@ -1,14 +1,14 @@
 import json
 
-import markdown2
-
-from odoo import _, api, fields, models
+from odoo import _, api, fields, models, tools
 from odoo.exceptions import MissingError, UserError, ValidationError
 
 from odoo.addons.llm_mail_message_subtypes.const import (
     LLM_TOOL_RESULT_SUBTYPE_XMLID,
 )
 
+from .llm_thread_utils import LLMStreamWriteBuffer, LLMThreadUtils
+
 
 class MailMessage(models.Model):
     _inherit = "mail.message"
@@ -23,8 +23,7 @@ class MailMessage(models.Model):
     def _check_tool_message_integrity(self):
         for record in self:
             if record.tool_call_id and record.subtype_id:
-                tool_message_subtype = self.env.ref(LLM_TOOL_RESULT_SUBTYPE_XMLID)
-                if record.subtype_id.id != tool_message_subtype.id:
+                if not record.is_llm_tool_result_message():
                     raise ValidationError(
                         "Tool Call ID can only be set for Tool Messages."
                     )
@@ -43,6 +42,16 @@ class MailMessage(models.Model):
         )
         return fields_list
 
+    def _get_llm_history_text(self):
+        """Text of the message as sent to the model, used to count its tokens."""
+        self.ensure_one()
+        parts = [
+            tools.html2plaintext(self.body) if self.body else "",
+            self.tool_calls or "",
+            self.tool_call_result or "",
+        ]
+        return "\n".join(part for part in parts if part)
+
     def set_user_gov(self, message_id, vote_value):  # Add message_id argument
         """
         Finds a message by ID and sets the user vote, performing validation checks.
@@ -71,58 +80,59 @@ class MailMessage(models.Model):
 
     @api.model
     def create_message_from_stream(
-        self, thread, stream, subtype_xmlid, placeholder_text="…"
+        self, thread, stream, subtype_xmlid, placeholder_text="…", cursor_factory=None
     ):
         """
         thread: the llm.thread record
         stream: iterator of provider chunks (content/tool_calls/error)
         subtype_xmlid: assistant vs tool result XMLID
+        cursor_factory: environments of the database accesses, see
+            llm.thread.generate, the one of thread by default
+
+        Only ``message_create`` and the final ``message_update`` carry a
+        full ``message_format`` snapshot. In between, content chunks are
+        pushed as ``message_delta`` events with the new text and tool calls
+        as ``message_patch`` events with the changed fields. Every event
+        holds a per message ``seq`` number so the client can drop stale
+        ones. Body and tool calls writes are coalesced by a
+        LLMStreamWriteBuffer configured on the thread, and always flushed
+        on error and at the end of the stream.
 
         Yields UI events, and finally returns the full message record.
+        See LLMThreadUtils.stream_to_message.
         """
-        msg = None
-        acc, calls = "", []
+        cursor_factory = cursor_factory or thread._get_default_cursor_factory()
+        with cursor_factory() as env:
+            thread_env = thread.with_env(env)
+            buffer = LLMStreamWriteBuffer(
+                flush_interval_ms=thread_env.stream_flush_interval_ms,
+                flush_chars=thread_env.stream_flush_chars,
+                cursor_factory=cursor_factory,
+            )
 
-        for chunk in stream:
-            if msg is None and (chunk.get("content") or chunk.get("tool_calls")):
-                msg = thread._post_message(
+        def post_message():
+            with cursor_factory() as env:
+                msg = thread.with_env(env)._post_message(
                     subtype_xmlid=subtype_xmlid,
                     body=placeholder_text,
                     author_id=False,
                 )
-                yield {"type": "message_create", "message": msg.message_format()[0]}
-
-            if chunk.get("content"):
-                acc += chunk["content"]
-                msg.write({"body": markdown2.markdown(acc)})
-                yield {"type": "message_chunk", "message": msg.message_format()[0]}
-
-            if chunk.get("tool_calls"):
-                valid = [
-                    c
-                    for c in chunk["tool_calls"]
-                    if isinstance(c, dict) and c.get("id")
-                ]
-                calls.extend(valid)
-                msg.write({"tool_calls": json.dumps(calls)})
-                yield {"type": "message_update", "message": msg.message_format()[0]}
-
-            if chunk.get("error"):
-                yield {"type": "error", "error": chunk["error"]}
-                return
-
-        # final write & update
-        msg.write(
-            {
-                **({"body": markdown2.markdown(acc)} if acc else {}),
-                **({"tool_calls": json.dumps(calls)} if calls else {}),
-            }
+                buffer.bind(msg)
+                return msg.id, LLMThreadUtils.snapshot_event("message_create", msg, 0)
+
+        def final_event(message_id, seq):
+            with cursor_factory() as env:
+                return LLMThreadUtils.snapshot_event(
+                    "message_update", env["mail.message"].browse(message_id), seq
+                )
+
+        message_id = yield from LLMThreadUtils.stream_to_message(
+            stream, buffer, post_message, final_event
         )
-        yield {"type": "message_update", "message": msg.message_format()[0]}
-        return msg
+        return self.browse(message_id) if message_id else None
 
     @api.model
-    def stream_llm_tool_result(self, thread, tool_call_def):
+    def stream_llm_tool_result(self, thread, tool_call_def, cursor_factory=None):
         """
         Stream a single tool call:
          1) create a placeholder tool‐result message,
@@ -130,40 +140,51 @@ class MailMessage(models.Model):
          3) execute the tool,
          4) write the result & yield a "message_update",
          5) return the final message record.
+
+        The placeholder, then the tool execution and result, are each done
+        in an environment of ``cursor_factory``, see llm.thread.generate,
+        which is left before the events are yielded.
         """
+        cursor_factory = cursor_factory or thread._get_default_cursor_factory()
         call_id = tool_call_def.get("id")
         fn = tool_call_def.get("function", {})
         name = fn.get("name", "unknown_tool")
         args = fn.get("arguments")
 
         # 1) placeholder
-        msg = thread._post_message(
-            subtype_xmlid=LLM_TOOL_RESULT_SUBTYPE_XMLID,
-            tool_call_id=call_id,
-            tool_call_definition=json.dumps(tool_call_def),
-            tool_call_result=None,
-            body=f"Executing: {name}…",
-            author_id=False,
-            tool_name=name,
-        )
-        yield {"type": "message_create", "message": msg.message_format()[0]}
+        with cursor_factory() as env:
+            msg = thread.with_env(env)._post_message(
+                subtype_xmlid=LLM_TOOL_RESULT_SUBTYPE_XMLID,
+                tool_call_id=call_id,
+                tool_call_definition=json.dumps(tool_call_def),
+                tool_call_result=None,
+                body=f"Executing: {name}…",
+                author_id=False,
+                tool_name=name,
+            )
+            msg_id = msg.id
+            event = LLMThreadUtils.snapshot_event("message_create", msg, 0)
+        yield event
 
         # 2) execute + update
-        try:
-            # to isolate tool call, otherwise transaction error can cause the transaction to fail
-            # and the transaction will be rolled back(aborted state)
-            with self.env.cr.savepoint():
-                result = thread._execute_tool(name, args)
-                if not result:
-                    raise UserError(f"No result returned from tool '{name}'")
-                body = f"Result for {name}"
-                write_vals = {"tool_call_result": json.dumps(result), "body": body}
-        except Exception as e:
-            write_vals = {
-                "tool_call_result": json.dumps({"error": str(e)}),
-                "body": f"Error executing {name}",
-            }
-        msg.write(write_vals)
-        yield {"type": "message_update", "message": msg.message_format()[0]}
-
-        return msg
+        with cursor_factory() as env:
+            try:
+                # to isolate tool call, otherwise transaction error can cause the transaction to fail
+                # and the transaction will be rolled back(aborted state)
+                with env.cr.savepoint():
+                    result = thread.with_env(env)._execute_tool(name, args)
+                    if not result:
+                        raise UserError(f"No result returned from tool '{name}'")
+                    body = f"Result for {name}"
+                    write_vals = {"tool_call_result": json.dumps(result), "body": body}
+            except Exception as e:
+                write_vals = {
+                    "tool_call_result": json.dumps({"error": str(e)}),
+                    "body": f"Error executing {name}",
+                }
+            msg = env["mail.message"].browse(msg_id)
+            msg.write(write_vals)
+            event = LLMThreadUtils.snapshot_event("message_update", msg, 1)
+        yield event
+
+        return self.browse(msg_id)
@@ -1,6 +1,7 @@
 /** @odoo-module **/
 
 import { attr } from "@mail/model/model_field";
+import { escape } from "@web/core/utils/strings";
 import { registerPatch } from "@mail/model/model_core";
 
 registerPatch({
@@ -53,13 +54,16 @@ registerPatch({
           const data = JSON.parse(event.data);
           switch (data.type) {
             case "message_create":
-              this._handleMessageCreate(data.message);
+              this._handleMessageCreate(data.message, data.seq);
               break;
-            case "message_chunk":
-              this._handleMessageUpdate(data.message);
+            case "message_delta":
+              this._handleMessageDelta(data);
+              break;
+            case "message_patch":
+              this._handleMessagePatch(data);
               break;
             case "message_update":
-              this._handleMessageUpdate(data.message);
+              this._handleMessageUpdate(data.message, data.seq);
               break;
             case "error":
               this._closeEventSource();
@@ -108,19 +112,88 @@ registerPatch({
       }
     },
 
-    _handleMessageCreate(message) {
-      const result = this.messaging.models.Message.insert(
-        this.messaging.models.Message.convertData(message)
-      );
+    _handleMessageCreate(message, seq = 0) {
+      const result = this.messaging.models.Message.insert({
+        ...this.messaging.models.Message.convertData(message),
+        llmStreamSeq: seq,
+      });
       return result;
     },
 
-    _handleMessageUpdate(message) {
+    /**
+     * Apply a full snapshot, unless a more recent event was already applied.
+     * @param {Object} message - message_format payload
+     * @param {Number} [seq] - Sequence number of the event
+     */
+    _handleMessageUpdate(message, seq) {
       const result = this.messaging.models.Message.findFromIdentifyingData({
         id: message.id,
       });
+      if (result && !(seq < result.llmStreamSeq)) {
+        result.update({
+          ...this.messaging.models.Message.convertData(message),
+          llmStreamingText: "",
+          llmStreamSeq: seq === undefined ? result.llmStreamSeq : seq,
+        });
+      }
+      return result;
+    },
+
+    /**
+     * Return the streamed message targeted by an incremental event, or
+     * undefined when the event is older than the last one applied.
+     * @param {Number} message_id - Id of the streamed message
+     * @param {Number} seq - Sequence number of the event
+     */
+    _getStreamedMessage(message_id, seq) {
+      const result = this.messaging.models.Message.findFromIdentifyingData({
+        id: message_id,
+      });
+      if (!result || seq <= result.llmStreamSeq) {
+        return undefined;
+      }
+      return result;
+    },
+
+    /**
+     * Append streamed text to a message without waiting for the server to
+     * render and persist it. The final message_update replaces the
+     * temporary body with the rendered one.
+     * @param {Object} data - message_delta event
+     * @param {Number} data.message_id - Id of the streamed message
+     * @param {Number} data.seq - Sequence number of the event
+     * @param {String} data.delta - Text appended since the previous event
+     */
+    _handleMessageDelta({ message_id, seq, delta }) {
+      const result = this._getStreamedMessage(message_id, seq);
+      if (result) {
+        const llmStreamingText = result.llmStreamingText + delta;
+        result.update({
+          llmStreamingText,
+          llmStreamSeq: seq,
+          body: `<p>${escape(llmStreamingText).replace(/\n/g, "<br/>")}</p>`,
+        });
+      }
+      return result;
+    },
+
+    /**
+     * Apply the fields which changed since the previous event.
+     * @param {Object} data - message_patch event
+     * @param {Number} data.message_id - Id of the streamed message
+     * @param {Number} data.seq - Sequence number of the event
+     * @param {Object} data.changes - Changed message_format fields
+     */
+    _handleMessagePatch({ message_id, seq, changes }) {
+      const result = this._getStreamedMessage(message_id, seq);
       if (result) {
-        result.update(this.messaging.models.Message.convertData(message));
+        result.update({
+          ...this.messaging.models.Message.convertData({
+            id: message_id,
+            ...changes,
+          }),
+          llmStreamSeq: seq,
+        });
       }
       return result;
     },
@@ -55,6 +55,18 @@ registerPatch({
     user_vote: attr({
       default: 0,
     }),
+    /**
+     * Raw text accumulated from message_delta events while streaming.
+     */
+    llmStreamingText: attr({
+      default: "",
+    }),
+    /**
+     * Sequence number of the last streaming event applied to the message.
+     */
+    llmStreamSeq: attr({
+      default: -1,
+    }),
     /**
      * Compute parsed tool call definition from llm_tool_call_definition field.
      */
@@ -0,0 +1,117 @@
+"""
+Benchmark of the request build of a long thread, with the payload cache.
+
+Creates a thread of ``--messages`` user and assistant messages on the
+given provider, an OpenAI or Ollama one, and times ``format_messages`` on
+its history:
+
+- ``cold``: no payload cached, every message is formatted
+- ``warm``: every payload is read from ``llm_format_cache``
+- ``next turn``: a new message was posted since the last build
+
+Usage:
+    python3 llm_tool/benchmarks/bench_format_cache.py -c odoo.conf -d db \\
+        --provider NAME [--messages 300] [--rounds 5]
+
+Nothing is committed.
+"""
+
+import argparse
+import time
+
+import odoo
+from odoo import SUPERUSER_ID, api
+
+from odoo.addons.llm_mail_message_subtypes.const import (
+    LLM_ASSISTANT_SUBTYPE_XMLID,
+    LLM_USER_SUBTYPE_XMLID,
+)
+
+BODY = (
+    "Here is the **summary** of order {index}:\n\n"
+    "- 3 chairs at 45.00\n- 1 table at 230.00\n\n"
+    "The `total` is 365.00, due in 30 days."
+)
+
+
+def post(thread, index):
+    user = index % 2 == 0
+    return thread._post_message(
+        subtype_xmlid=LLM_USER_SUBTYPE_XMLID if user else LLM_ASSISTANT_SUBTYPE_XMLID,
+        body=BODY.format(index=index),
+        author_id=thread.env.user.partner_id.id if user else False,
+    )
+
+
+def timed(label, rounds, prepare, func):
+    total = 0
+    for _i in range(rounds):
+        prepare()
+        start = time.perf_counter()
+        func()
+        total += time.perf_counter() - start
+    print(f"{label:>10}: {total / rounds * 1000:.1f} ms per request build")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("-c", "--config")
+    parser.add_argument("-d", "--database", required=True)
+    parser.add_argument("--provider", required=True)
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    odoo.tools.config.parse_config(["-c", args.config] if args.config else [])
+    registry = odoo.registry(args.database)
+
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        provider = env["llm.provider"].search([("name", "=", args.provider)], limit=1)
+        model = env["llm.model"].search(
+            [
+                ("provider_id", "=", provider.id),
+                ("model_use", "in", ["chat", "multimodal"]),
+            ],
+            limit=1,
+        )
+        if not model:
+            raise SystemExit(f"No chat model of a provider named {args.provider}")
+        thread = env["llm.thread"].create(
+            {
+                "name": "Format benchmark",
+                "provider_id": provider.id,
+                "model_id": model.id,
+            }
+        )
+        for index in range(args.messages):
+            post(thread, index)
+        print(f"Thread of {args.messages} messages on {provider.service}")
+
+        def history():
+            return thread.message_ids.sorted("id")
+
+        def build():
+            provider.format_messages(history())
+            env.flush_all()
+
+        def clear_cache():
+            history().write({"llm_format_cache": None})
+            env.flush_all()
+            env.invalidate_all()
+
+        def post_next():
+            post(thread, len(thread.message_ids))
+            env.flush_all()
+            env.invalidate_all()
+
+        timed("cold", args.rounds, clear_cache, build)
+        timed("warm", args.rounds, env.invalidate_all, build)
+        timed("next turn", args.rounds, post_next, build)
+        cr.rollback()
+
+
+if __name__ == "__main__":
+    main()
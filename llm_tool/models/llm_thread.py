@@ -1,3 +1,4 @@
+import copy
 import json
 import logging
 
@@ -26,6 +27,43 @@ class LLMProvider(models.Model):
 
         return False
 
+    def _format_messages_cached(self, messages, format_name, format_version):
+        """Format messages with `<format_name>_format_message`, reusing the
+        payloads cached on the messages.
+
+        Only messages formatted for the first time (or changed since) go
+        through the provider formatter; their payload is then stored in
+        `llm_format_cache` under `<format_name>:<format_version>`. Bumping
+        the version of a formatter invalidates its cached payloads.
+
+        Returns:
+            list: formatted message (or None) for each message, in order
+        """
+        cache_key = f"{format_name}:{format_version}"
+        formatted_messages = []
+        new_payloads = {}
+        for message in messages:
+            cache = message.llm_format_cache or {}
+            if cache_key in cache:
+                formatted = cache[cache_key]
+            else:
+                formatted = getattr(message, f"{format_name}_format_message")()
+                new_payloads[message] = dict(cache, **{cache_key: formatted})
+            # Callers may alter the payloads, never hand out the cached ones
+            formatted_messages.append(copy.deepcopy(formatted))
+
+        for message, cache in new_payloads.items():
+            # Bypass write() which would invalidate the cache being stored
+            self.env.cr.execute(
+                "UPDATE mail_message SET llm_format_cache = %s WHERE id = %s",
+                (json.dumps(cache), message.id),
+            )
+        if new_payloads:
+            self.env["mail.message"].browse(
+                [message.id for message in new_payloads]
+            ).invalidate_recordset(["llm_format_cache"])
+        return formatted_messages
+
     def _prepare_chat_params(
         self, model, messages, stream, tools, system_prompt, **kwargs
     ):
@@ -1,5 +1,15 @@
 from odoo import fields, models
 
+# Fields whose change invalidates the provider formatted payloads
+LLM_FORMAT_SOURCE_FIELDS = {
+    "body",
+    "subtype_id",
+    "tool_calls",
+    "tool_call_id",
+    "tool_call_definition",
+    "tool_call_result",
+}
+
 
 class MailMessage(models.Model):
     _inherit = "mail.message"
@@ -30,3 +40,16 @@ class MailMessage(models.Model):
         readonly=True,
         copy=False,
     )
+    llm_format_cache = fields.Json(
+        string="LLM Format Cache",
+        help="Provider formatted payloads of this message, keyed by format name and version.",
+        readonly=True,
+        copy=False,
+    )
+
+    def write(self, vals):
+        if "llm_format_cache" not in vals and LLM_FORMAT_SOURCE_FIELDS.intersection(
+            vals
+        ):
+            vals = dict(vals, llm_format_cache=None)
+        return super().write(vals)
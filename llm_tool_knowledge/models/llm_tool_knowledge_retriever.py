@@ -1,5 +1,5 @@
 import logging
-from typing import Any
+from typing import Any, Literal, Optional
 
 from odoo import api, models
 
@@ -47,6 +47,7 @@ class LLMToolKnowledgeRetriever(models.Model):
         top_k: int = 5,
         top_n: int = 3,
         similarity_cutoff: float = 0.5,
+        search_mode: Optional[Literal["vector", "hybrid", "lexical"]] = None,
     ) -> dict[str, Any]:
         """
         Retrieve relevant knowledge from the resource database using semantic search.
@@ -64,9 +65,10 @@ class LLMToolKnowledgeRetriever(models.Model):
             top_k: Maximum number of chunks to retrieve per resource. Higher values return more context from each resource but may include less relevant passages.
             top_n: Maximum number of distinct resources to retrieve results from. Increase this value to get information from more diverse sources.
             similarity_cutoff: Minimum semantic similarity threshold (0.0-1.0) for including results. Higher values (e.g., 0.7) return only highly relevant results.
+            search_mode: How chunks are matched: 'vector' by meaning, 'lexical' by exact keywords, 'hybrid' by both. Use 'hybrid' or 'lexical' when the query contains identifiers such as product codes, references or invoice numbers. Defaults to the setting of the collection.
         """
         _logger.info(
-            f"Executing Knowledge Retriever with: query={query}, collection_id={collection_id}, top_k={top_k}, top_n={top_n}, similarity_cutoff={similarity_cutoff}"
+            f"Executing Knowledge Retriever with: query={query}, collection_id={collection_id}, top_k={top_k}, top_n={top_n}, similarity_cutoff={similarity_cutoff}, search_mode={search_mode}"
         )
         collection = None
         if collection_id:
@@ -83,6 +85,7 @@ class LLMToolKnowledgeRetriever(models.Model):
             limit=search_limit,
             collection_id=collection.id,
             query_min_similarity=similarity_cutoff,
+            search_mode=search_mode,
         )
 
         result_data = self._process_search_results(
@@ -97,6 +100,7 @@ class LLMToolKnowledgeRetriever(models.Model):
             "collection_id": collection.id,
             "results": result_data,
             "total_chunks": len(result_data),
+            "search_mode": search_mode or collection.search_mode,
             "embedding_model": collection.embedding_model_id.name
             if collection.embedding_model_id
             else "Unknown",